@@ -5,14 +5,14 @@ Check balances for native token and all deployed tokens
 
 import argparse
 import os
-from web3 import Web3
-from config import get_web3, get_contract, format_amount
 
 
 def check_balances(address: str, rpc_url: str = None):
     """Check all balances for an address"""
+    from config import checksum, format_amount, get_web3, read, BALANCE_OF_SELECTOR
+    
     w3 = get_web3(rpc_url)
-    address = Web3.to_checksum_address(address)
+    address = checksum(address)
     
     print(f"\n=== Balances for {address} ===\n")
     
@@ -24,8 +24,9 @@ def check_balances(address: str, rpc_url: str = None):
     usdc_address = os.getenv("USDC_ADDRESS")
     if usdc_address:
         try:
-            usdc = get_contract(w3, "MockUSDC", usdc_address)
-            usdc_balance = usdc.functions.balanceOf(address).call()
+            usdc_balance = read(
+                w3, checksum(usdc_address), BALANCE_OF_SELECTOR, ['address'], [address], 'uint256'
+            )
             print(f"MockUSDC: {format_amount(usdc_balance)}")
         except Exception as e:
             print(f"MockUSDC: Error - {e}")
@@ -36,8 +37,9 @@ def check_balances(address: str, rpc_url: str = None):
     eurc_address = os.getenv("EURC_ADDRESS")
     if eurc_address:
         try:
-            eurc = get_contract(w3, "MockEURC", eurc_address)
-            eurc_balance = eurc.functions.balanceOf(address).call()
+            eurc_balance = read(
+                w3, checksum(eurc_address), BALANCE_OF_SELECTOR, ['address'], [address], 'uint256'
+            )
             print(f"MockEURC: {format_amount(eurc_balance)}")
         except Exception as e:
             print(f"MockEURC: Error - {e}")
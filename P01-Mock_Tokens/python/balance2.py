@@ -4,9 +4,8 @@ Check balances for an address on a specific blockchain
 """
 
 import argparse
+import asyncio
 import os
-from web3 import Web3
-from config import get_web3, get_contract, format_amount
 
 
 # Blockchain configurations
@@ -27,9 +26,18 @@ BLOCKCHAINS = {
     }
 }
 
+# Maximum sub-calls per Multicall3 request in bulk mode
+BULK_CHUNK_SIZE = 300
 
-def check_balances(address: str, blockchain: str):
+
+async def check_balances(address: str, blockchain: str):
     """Check all balances for an address on specified blockchain"""
+    import aiohttp
+    from config import (
+        async_multicall3, checksum, encode_call, format_amount, format_native, get_async_web3,
+        get_token_meta, save_token_meta, BALANCE_OF_SELECTOR, GET_ETH_BALANCE_SELECTOR,
+        MULTICALL3_ADDRESS, SYMBOL_SELECTOR
+    )
     
     if blockchain not in BLOCKCHAINS:
         raise ValueError(f"Unknown blockchain: {blockchain}. Use 'arb' or 'poly'")
@@ -41,13 +49,35 @@ def check_balances(address: str, blockchain: str):
     if not rpc_url:
         raise ValueError(f"RPC URL not set. Please set {config['rpc_env']} in .env")
     
-    # Connect to blockchain
-    w3 = get_web3(rpc_url)
-    address = Web3.to_checksum_address(address)
+    address = checksum(address)
     
-    # Get chain info
-    chain_id = w3.eth.chain_id
-    block_number = w3.eth.block_number
+    # Collect native balance plus balanceOf (and symbol, unless cached) for each token
+    tokens = []
+    calls = []
+    async with aiohttp.ClientSession() as session:
+        w3 = await get_async_web3(rpc_url, session)
+        chain_id = await w3.eth.chain_id
+        calls.append((MULTICALL3_ADDRESS, encode_call(GET_ETH_BALANCE_SELECTOR, ['address'], [address])))
+        for contract_name, token_env, fallback_env in (
+            ("MockUSDC", config['usdc_env'], 'USDC_ADDRESS'),
+            ("MockEURC", config['eurc_env'], 'EURC_ADDRESS'),
+        ):
+            token_address = os.getenv(token_env) or os.getenv(fallback_env)
+            if not token_address:
+                tokens.append((contract_name, token_env, fallback_env, None, None))
+                continue
+            target = checksum(token_address)
+            symbol = get_token_meta(chain_id, target).get('symbol')
+            calls.append((target, encode_call(BALANCE_OF_SELECTOR, ['address'], [address])))
+            if symbol is None:
+                calls.append((target, encode_call(SYMBOL_SELECTOR, [], [])))
+            tokens.append((contract_name, token_env, fallback_env, token_address, symbol))
+        
+        # Block number and a single eth_call for all balance reads, concurrently
+        block_number, results = await asyncio.gather(
+            w3.eth.block_number,
+            async_multicall3(w3, calls),
+        )
     
     print(f"\n{'='*60}")
     print(f"Blockchain: {config['name']} (Chain ID: {chain_id})")
@@ -56,41 +86,109 @@ def check_balances(address: str, blockchain: str):
     print(f"{'='*60}\n")
     
     # Native balance
-    native_balance = w3.eth.get_balance(address)
-    native_balance_formatted = w3.from_wei(native_balance, 'ether')
-    print(f"Native Token ({config['native_token']}): {native_balance_formatted:.6f} {config['native_token']}")
-    
-    # MockUSDC balance
-    usdc_address = os.getenv(config['usdc_env']) or os.getenv('USDC_ADDRESS')
-    if usdc_address:
-        try:
-            usdc = get_contract(w3, "MockUSDC", usdc_address)
-            usdc_balance = usdc.functions.balanceOf(address).call()
-            usdc_symbol = usdc.functions.symbol().call()
-            print(f"{usdc_symbol}: {format_amount(usdc_balance)}")
-            print(f"  Contract: {usdc_address}")
-        except Exception as e:
-            print(f"MockUSDC: Error - {e}")
-    else:
-        print(f"MockUSDC: Address not set (set {config['usdc_env']} or USDC_ADDRESS in .env)")
-    
-    # MockEURC balance
-    eurc_address = os.getenv(config['eurc_env']) or os.getenv('EURC_ADDRESS')
-    if eurc_address:
-        try:
-            eurc = get_contract(w3, "MockEURC", eurc_address)
-            eurc_balance = eurc.functions.balanceOf(address).call()
-            eurc_symbol = eurc.functions.symbol().call()
-            print(f"{eurc_symbol}: {format_amount(eurc_balance)}")
-            print(f"  Contract: {eurc_address}")
-        except Exception as e:
-            print(f"MockEURC: Error - {e}")
-    else:
-        print(f"MockEURC: Address not set (set {config['eurc_env']} or EURC_ADDRESS in .env)")
+    success, data = results[0]
+    if not success:
+        raise Exception("getEthBalance() call failed")
+    native_balance = w3.codec.decode(['uint256'], data)[0]
+    print(f"Native Token ({config['native_token']}): {format_native(native_balance)} {config['native_token']}")
+    
+    # Token balances
+    results = iter(results[1:])
+    for contract_name, token_env, fallback_env, token_address, symbol in tokens:
+        if not token_address:
+            print(f"{contract_name}: Address not set (set {token_env} or {fallback_env} in .env)")
+            continue
+        balance_ok, balance_data = next(results)
+        symbol_ok = True
+        if symbol is None:
+            symbol_ok, symbol_data = next(results)
+            if symbol_ok:
+                symbol = w3.codec.decode(['string'], symbol_data)[0]
+                save_token_meta(chain_id, token_address, symbol=symbol)
+        if not (balance_ok and symbol_ok):
+            print(f"{contract_name}: Error - balanceOf/symbol call failed")
+            continue
+        balance = w3.codec.decode(['uint256'], balance_data)[0]
+        print(f"{symbol}: {format_amount(balance)}")
+        print(f"  Contract: {token_address}")
+    
+    print()
+
+
+async def check_balances_bulk(addresses: list, blockchain: str):
+    """Check native and token balances for many addresses on specified blockchain"""
+    import aiohttp
+    from config import (
+        async_multicall3, checksum, encode_call, format_amount, format_native, get_async_web3,
+        BALANCE_OF_SELECTOR, GET_ETH_BALANCE_SELECTOR, MULTICALL3_ADDRESS
+    )
+    
+    if blockchain not in BLOCKCHAINS:
+        raise ValueError(f"Unknown blockchain: {blockchain}. Use 'arb' or 'poly'")
+    
+    config = BLOCKCHAINS[blockchain]
+    
+    # Get RPC URL from environment
+    rpc_url = os.getenv(config['rpc_env'])
+    if not rpc_url:
+        raise ValueError(f"RPC URL not set. Please set {config['rpc_env']} in .env")
+    
+    addresses = [checksum(address) for address in addresses]
+    token_addresses = [
+        (label, checksum(token_address))
+        for label, token_env, fallback_env in (
+            ("MockUSDC", config['usdc_env'], 'USDC_ADDRESS'),
+            ("MockEURC", config['eurc_env'], 'EURC_ADDRESS'),
+        )
+        if (token_address := os.getenv(token_env) or os.getenv(fallback_env))
+    ]
+    
+    # One native + one balanceOf per token for every address
+    calls = []
+    for address in addresses:
+        calls.append((MULTICALL3_ADDRESS, encode_call(GET_ETH_BALANCE_SELECTOR, ['address'], [address])))
+        for _, token_address in token_addresses:
+            calls.append((token_address, encode_call(BALANCE_OF_SELECTOR, ['address'], [address])))
+    
+    # Split into Multicall3 chunks and run them concurrently over one session
+    async with aiohttp.ClientSession() as session:
+        w3 = await get_async_web3(rpc_url, session)
+        chunks = await asyncio.gather(*[
+            async_multicall3(w3, calls[start:start + BULK_CHUNK_SIZE])
+            for start in range(0, len(calls), BULK_CHUNK_SIZE)
+        ])
+    results = iter([result for chunk in chunks for result in chunk])
+    
+    native_token = config['native_token']
+    header = f"{'Address':<44}{native_token:>24}" + "".join(f"{label:>24}" for label, _ in token_addresses)
+    
+    print(f"\n{'='*len(header)}")
+    print(f"Blockchain: {config['name']} ({len(addresses)} addresses)")
+    print(f"{'='*len(header)}\n")
+    print(header)
+    print('-' * len(header))
+    
+    for address in addresses:
+        row = f"{address:<44}"
+        success, data = next(results)
+        native = format_native(w3.codec.decode(['uint256'], data)[0]) if success else "error"
+        row += f"{native:>24}"
+        for _ in token_addresses:
+            success, data = next(results)
+            balance = format_amount(w3.codec.decode(['uint256'], data)[0]) if success else "error"
+            row += f"{balance:>24}"
+        print(row)
     
     print()
 
 
+def read_addresses(path: str) -> list:
+    """Read one address per line, skipping blank lines and # comments"""
+    with open(path) as f:
+        lines = [line.split('#', 1)[0].strip() for line in f]
+    return [line for line in lines if line]
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Check token balances on a specific blockchain",
@@ -102,6 +200,9 @@ Examples:
 
   # Check balance on Polygon Amoy
   python balance2.py 0x1234... --poly
+
+  # Check balances for every address in a file (one per line)
+  python balance2.py --file addresses.txt --arb
   
 Environment Variables:
   ARBITRUM_SEPOLIA_RPC_URL      - RPC endpoint for Arbitrum Sepolia
@@ -113,7 +214,8 @@ Environment Variables:
         """
     )
     
-    parser.add_argument("address", help="Address to check balances for")
+    parser.add_argument("address", nargs="?", help="Address to check balances for")
+    parser.add_argument("--file", help="File with one address per line (bulk mode)")
     
     # Blockchain selection (mutually exclusive)
     blockchain_group = parser.add_mutually_exclusive_group(required=True)
@@ -124,8 +226,14 @@ Environment Variables:
     
     args = parser.parse_args()
     
+    if bool(args.address) == bool(args.file):
+        parser.error("provide either an address or --file")
+    
     try:
-        check_balances(args.address, args.blockchain)
+        if args.file:
+            asyncio.run(check_balances_bulk(read_addresses(args.file), args.blockchain))
+        else:
+            asyncio.run(check_balances(args.address, args.blockchain))
     except Exception as e:
         print(f"\n❌ Error: {e}\n")
         return 1
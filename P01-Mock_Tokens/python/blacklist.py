@@ -4,20 +4,43 @@ Blacklist management operations
 """
 
 import argparse
-from web3 import Web3
-from config import (
-    get_web3, get_account, get_contract, send_transaction,
-    format_amount, print_receipt_info
-)
+
+
+def read_blacklist_state(w3, token_address: str, address: str):
+    """
+    Read isBlacklisted and balanceOf for an address in a single Multicall3
+    round-trip, or one JSON-RPC batch where Multicall3 isn't deployed (local Anvil)
+    """
+    from config import (
+        batch_eth_call, checksum, encode_call, multicall3, BALANCE_OF_SELECTOR,
+        IS_BLACKLISTED_SELECTOR, MULTICALL3_ADDRESS
+    )
+    
+    target = checksum(token_address)
+    calls = [
+        (target, encode_call(IS_BLACKLISTED_SELECTOR, ['address'], [address])),
+        (target, encode_call(BALANCE_OF_SELECTOR, ['address'], [address])),
+    ]
+    if w3.eth.get_code(MULTICALL3_ADDRESS):
+        results = multicall3(w3, calls)
+    else:
+        results = batch_eth_call(w3, calls)
+    (blacklisted_ok, blacklisted_data), (balance_ok, balance_data) = results
+    if not (blacklisted_ok and balance_ok):
+        raise Exception("isBlacklisted/balanceOf call failed")
+    is_blacklisted = w3.codec.decode(['bool'], blacklisted_data)[0]
+    balance = w3.codec.decode(['uint256'], balance_data)[0]
+    return is_blacklisted, balance
 
 
 def check_blacklist(token_address: str, address: str, rpc_url: str = None):
     """Check if address is blacklisted"""
+    from config import checksum, format_amount, get_web3
+    
     w3 = get_web3(rpc_url)
-    token = get_contract(w3, "MockUSDC", token_address)
+    address = checksum(address)
     
-    is_blacklisted = token.functions.isBlacklisted(Web3.to_checksum_address(address)).call()
-    balance = token.functions.balanceOf(Web3.to_checksum_address(address)).call()
+    is_blacklisted, balance = read_blacklist_state(w3, token_address, address)
     
     print(f"\nAddress: {address}")
     print(f"  Blacklisted: {is_blacklisted}")
@@ -33,6 +56,11 @@ def set_blacklist(
     rpc_url: str = None
 ):
     """Set blacklist status for an address"""
+    from config import (
+        checksum, get_account, get_contract, get_web3, print_receipt_info,
+        send_transaction
+    )
+    
     w3 = get_web3(rpc_url)
     account = get_account(private_key)
     token = get_contract(w3, "MockUSDC", token_address)
@@ -43,11 +71,10 @@ def set_blacklist(
     
     # Build transaction
     tx = token.functions.setBlacklisted(
-        Web3.to_checksum_address(address),
+        checksum(address),
         blacklisted
     ).build_transaction({
         "from": account.address,
-        "nonce": w3.eth.get_transaction_count(account.address),
     })
     
     # Send transaction
@@ -62,12 +89,20 @@ def wipe_blacklisted(
     rpc_url: str = None
 ):
     """Wipe balance of a blacklisted address"""
+    from config import (
+        checksum, format_amount, get_account, get_contract, get_web3, print_receipt_info,
+        read, send_transaction, BALANCE_OF_SELECTOR
+    )
+    
     w3 = get_web3(rpc_url)
     account = get_account(private_key)
     token = get_contract(w3, "MockUSDC", token_address)
+    address = checksum(address)
     
-    # Check balance before
-    balance_before = token.functions.balanceOf(Web3.to_checksum_address(address)).call()
+    # Check blacklist status and balance before
+    is_blacklisted, balance_before = read_blacklist_state(w3, token_address, address)
+    if not is_blacklisted:
+        raise ValueError(f"Address {address} is not blacklisted")
     
     print(f"\nWiping balance of blacklisted address {address}")
     print(f"Balance to wipe: {format_amount(balance_before)}")
@@ -75,10 +110,9 @@ def wipe_blacklisted(
     
     # Build transaction
     tx = token.functions.wipeBlacklisted(
-        Web3.to_checksum_address(address)
+        address
     ).build_transaction({
         "from": account.address,
-        "nonce": w3.eth.get_transaction_count(account.address),
     })
     
     # Send transaction
@@ -86,7 +120,7 @@ def wipe_blacklisted(
     print_receipt_info(receipt)
     
     # Check balance after
-    balance_after = token.functions.balanceOf(address).call()
+    balance_after = read(w3, token.address, BALANCE_OF_SELECTOR, ['address'], [address], 'uint256')
     print(f"\nBalance after wipe: {format_amount(balance_after)}")
 
 
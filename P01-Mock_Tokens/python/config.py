@@ -2,12 +2,22 @@
 Configuration and utilities for interacting with Mock Token contracts
 """
 
+import asyncio
+import functools
 import json
 import os
+import time
 from pathlib import Path
-from typing import Any, Dict
-from web3 import Web3
+from typing import Any, Dict, List, Optional, Tuple
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from web3 import AsyncWeb3, Web3
+from eth_abi import encode as abi_encode
+from eth_typing import ChecksumAddress
 from web3.contract import Contract
+from web3.middleware import async_geth_poa_middleware, geth_poa_middleware
 from eth_account import Account
 from dotenv import load_dotenv
 
@@ -17,31 +27,139 @@ load_dotenv()
 # Project root
 PROJECT_ROOT = Path(__file__).parent.parent
 
-# Role constants (keccak256 hashes)
-DEFAULT_ADMIN_ROLE = "0x0000000000000000000000000000000000000000000000000000000000000000"
-MASTER_MINTER_ROLE = Web3.keccak(text="MASTER_MINTER_ROLE").hex()
-MINTER_ROLE = Web3.keccak(text="MINTER_ROLE").hex()
-BRIDGE_ROLE = Web3.keccak(text="BRIDGE_ROLE").hex()
+# On-disk cache for immutable token metadata (name, symbol)
+TOKEN_META_CACHE_PATH = Path.home() / ".cache" / "x402" / "tokenmeta.json"
+
+# On-disk cache of ABIs extracted from Foundry artifacts (keyed by artifact mtime)
+ABI_CACHE_DIR = Path.home() / ".cache" / "x402" / "abi"
+
+# Role constants (keccak256 hashes as raw bytes32)
+DEFAULT_ADMIN_ROLE = bytes(32)
+MASTER_MINTER_ROLE = bytes(Web3.keccak(text="MASTER_MINTER_ROLE"))
+MINTER_ROLE = bytes(Web3.keccak(text="MINTER_ROLE"))
+BRIDGE_ROLE = bytes(Web3.keccak(text="BRIDGE_ROLE"))
+
+# Function selectors (first 4 bytes of the keccak256 signature hash)
+NAME_SELECTOR = bytes(Web3.keccak(text="name()")[:4])
+SYMBOL_SELECTOR = bytes(Web3.keccak(text="symbol()")[:4])
+BALANCE_OF_SELECTOR = bytes(Web3.keccak(text="balanceOf(address)")[:4])
+HAS_ROLE_SELECTOR = bytes(Web3.keccak(text="hasRole(bytes32,address)")[:4])
+MINTER_ALLOWANCE_SELECTOR = bytes(Web3.keccak(text="minterAllowance(address)")[:4])
+IS_BLACKLISTED_SELECTOR = bytes(Web3.keccak(text="isBlacklisted(address)")[:4])
+GET_ETH_BALANCE_SELECTOR = bytes(Web3.keccak(text="getEthBalance(address)")[:4])
+GET_CHAIN_ID_SELECTOR = bytes(Web3.keccak(text="getChainId()")[:4])
 
 # Decimals
 DECIMALS = 6
+_SCALE = 10**DECIMALS
+
+# Multicall3 is deployed at the same address on all major chains and testnets
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [
+    {
+        "name": "tryAggregate",
+        "type": "function",
+        "stateMutability": "payable",
+        "inputs": [
+            {"name": "requireSuccess", "type": "bool"},
+            {
+                "name": "calls",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+            },
+        ],
+        "outputs": [
+            {
+                "name": "returnData",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+            }
+        ],
+    },
+    {
+        "name": "getEthBalance",
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [{"name": "addr", "type": "address"}],
+        "outputs": [{"name": "balance", "type": "uint256"}],
+    },
+]
+
+
+# HTTP settings for RPC connections
+RPC_TIMEOUT = 10
+
+
+def _build_session() -> requests.Session:
+    """Build a keep-alive requests session with a pooled, retrying adapter"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(429, 502, 503, 504)),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Web3 instances and their HTTP sessions keyed by RPC URL
+_W3_CACHE: Dict[str, Web3] = {}
+_SESSION_CACHE: Dict[str, requests.Session] = {}
 
 
 def get_web3(rpc_url: str = None) -> Web3:
-    """Get Web3 instance with PoA middleware for compatibility"""
+    """Get Web3 instance with PoA middleware for compatibility (cached per RPC URL)"""
     if rpc_url is None:
         rpc_url = os.getenv("RPC_URL", "http://127.0.0.1:8545")
     
-    w3 = Web3(Web3.HTTPProvider(rpc_url))
+    w3 = _W3_CACHE.get(rpc_url)
+    if w3 is not None:
+        return w3
+    
+    # The provider keeps the pooled session for the lifetime of the process
+    session = _build_session()
+    w3 = Web3(Web3.HTTPProvider(
+        rpc_url,
+        request_kwargs={"timeout": RPC_TIMEOUT},
+        session=session,
+    ))
     
     # Inject PoA middleware for chains like Polygon, BSC, etc.
     # This allows handling of extraData > 32 bytes in block headers
-    from web3.middleware import geth_poa_middleware
     w3.middleware_onion.inject(geth_poa_middleware, layer=0)
     
-    if not w3.is_connected():
+    # Connectivity probe is opt-in; otherwise the first real call surfaces failures
+    if os.getenv("WEB3_PROBE") and not w3.is_connected():
         raise ConnectionError(f"Could not connect to {rpc_url}")
     
+    _W3_CACHE[rpc_url] = w3
+    _SESSION_CACHE[rpc_url] = session
+    return w3
+
+
+async def get_async_web3(rpc_url: str = None, session: aiohttp.ClientSession = None) -> AsyncWeb3:
+    """
+    Get AsyncWeb3 instance with PoA middleware for compatibility
+
+    Pass a shared aiohttp session to reuse connections across providers.
+    """
+    if rpc_url is None:
+        rpc_url = os.getenv("RPC_URL", "http://127.0.0.1:8545")
+    
+    provider = AsyncWeb3.AsyncHTTPProvider(rpc_url)
+    if session is not None:
+        await provider.cache_async_session(session)
+    
+    w3 = AsyncWeb3(provider)
+    w3.middleware_onion.inject(async_geth_poa_middleware, layer=0)
+    
     return w3
 
 
@@ -59,33 +177,326 @@ def get_account(private_key: str = None) -> Account:
     return Account.from_key(private_key)
 
 
+@functools.lru_cache(maxsize=32)
 def load_abi(contract_name: str) -> list:
-    """Load contract ABI from Foundry output"""
+    """
+    Load contract ABI from Foundry output
+
+    Artifacts also carry bytecode and metadata, so the bare ABI is cached on disk
+    and reused across runs until the artifact is rebuilt.
+    """
     abi_path = PROJECT_ROOT / "out" / f"{contract_name}.sol" / f"{contract_name}.json"
     
     if not abi_path.exists():
         raise FileNotFoundError(f"ABI file not found: {abi_path}")
     
+    cache_path = ABI_CACHE_DIR / f"{contract_name}.json"
+    artifact_mtime = abi_path.stat().st_mtime_ns
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if cached["mtime_ns"] == artifact_mtime:
+            return cached["abi"]
+    except (OSError, ValueError, KeyError):
+        pass
+    
     with open(abi_path) as f:
-        contract_json = json.load(f)
-        return contract_json["abi"]
+        abi = json.load(f)["abi"]
+    
+    try:
+        ABI_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, "w") as f:
+            json.dump({"mtime_ns": artifact_mtime, "abi": abi}, f, separators=(",", ":"))
+    except OSError:
+        pass
+    return abi
+
+
+@functools.lru_cache(maxsize=1024)
+def checksum(address: str) -> ChecksumAddress:
+    """Checksum an address, memoized to avoid re-hashing repeated inputs"""
+    return Web3.to_checksum_address(address)
+
+
+# Contract instances keyed by (id(w3), contract_name, address)
+_CONTRACT_CACHE: Dict[Tuple[int, str, str], Contract] = {}
 
 
 def get_contract(w3: Web3, contract_name: str, address: str) -> Contract:
-    """Get contract instance"""
-    abi = load_abi(contract_name)
-    return w3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+    """Get contract instance (cached per Web3 instance, name and address)"""
+    key = (id(w3), contract_name, address)
+    contract = _CONTRACT_CACHE.get(key)
+    if contract is None:
+        abi = load_abi(contract_name)
+        contract = w3.eth.contract(address=checksum(address), abi=abi)
+        _CONTRACT_CACHE[key] = contract
+    return contract
 
 
-def send_transaction(w3: Web3, account: Account, tx: Dict[str, Any]) -> Dict[str, Any]:
-    """Send transaction and wait for receipt"""
-    # Add gas estimate if not provided
-    if "gas" not in tx:
-        tx["gas"] = w3.eth.estimate_gas(tx)
+_token_meta: Optional[Dict[str, Dict[str, str]]] = None
+
+
+def _load_token_meta() -> Dict[str, Dict[str, str]]:
+    """Load the token metadata cache from disk once per process"""
+    global _token_meta
+    if _token_meta is None:
+        try:
+            with open(TOKEN_META_CACHE_PATH) as f:
+                _token_meta = json.load(f)
+        except (OSError, ValueError):
+            _token_meta = {}
+    return _token_meta
+
+
+def get_token_meta(chain_id: int, token_address: str) -> Dict[str, str]:
+    """Get cached metadata (name, symbol) for a token, empty if unknown"""
+    return _load_token_meta().get(f"{chain_id}:{checksum(token_address)}", {})
+
+
+def save_token_meta(chain_id: int, token_address: str, **fields: str):
+    """
+    Merge metadata for a token into the on-disk cache
+
+    Name and symbol are set in the token constructor, so entries never go stale.
+    """
+    cache = _load_token_meta()
+    cache.setdefault(f"{chain_id}:{checksum(token_address)}", {}).update(fields)
+    try:
+        TOKEN_META_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(TOKEN_META_CACHE_PATH, "w") as f:
+            json.dump(cache, f, indent=2)
+    except OSError:
+        pass
+
+
+def encode_call(selector: bytes, types: List[str], args: List[Any]) -> str:
+    """Encode calldata from a precomputed selector, skipping contract ABI lookups"""
+    return "0x" + (selector + abi_encode(types, args)).hex()
+
+
+def read(
+    w3: Web3,
+    to: str,
+    selector: bytes,
+    arg_types: List[str],
+    args: List[Any],
+    output_type: str,
+) -> Any:
+    """Single read via eth_call with precomputed calldata, bypassing ContractFunction"""
+    data = w3.eth.call({"to": to, "data": encode_call(selector, arg_types, args)})
+    return w3.codec.decode([output_type], data)[0]
+
+
+def get_multicall(w3: Web3) -> Contract:
+    """Get Multicall3 contract instance"""
+    return w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+
+
+def multicall3(w3: Web3, calls: List[Tuple[str, str]]) -> List[Tuple[bool, bytes]]:
+    """
+    Execute several read calls in a single eth_call via Multicall3.tryAggregate
+
+    Takes a list of (target, calldata) pairs and returns (success, returnData)
+    pairs in the same order. Failed sub-calls do not revert the whole batch.
+    """
+    payload = [(target, Web3.to_bytes(hexstr=data)) for target, data in calls]
+    return get_multicall(w3).functions.tryAggregate(False, payload).call()
+
+
+def read_many(
+    w3: Web3,
+    reads: List[Tuple[str, bytes, List[str], List[Any], str]],
+) -> List[Any]:
+    """
+    Run several reads in one Multicall3 call and decode the results
+
+    Each read is (target, selector, arg_types, args, output_type). Raises if any
+    sub-call fails.
+    """
+    results = multicall3(w3, [
+        (target, encode_call(selector, arg_types, args))
+        for target, selector, arg_types, args, _ in reads
+    ])
+    values = []
+    for (target, selector, _, _, output_type), (success, data) in zip(reads, results):
+        if not success:
+            raise Exception(f"Call 0x{selector.hex()} to {target} failed")
+        values.append(w3.codec.decode([output_type], data)[0])
+    return values
+
+
+async def async_multicall3(w3: AsyncWeb3, calls: List[Tuple[str, str]]) -> List[Tuple[bool, bytes]]:
+    """Async variant of multicall3"""
+    payload = [(target, Web3.to_bytes(hexstr=data)) for target, data in calls]
+    return await get_multicall(w3).functions.tryAggregate(False, payload).call()
+
+
+# Maximum eth_call requests per JSON-RPC batch; many public RPCs reject larger batches
+BATCH_SIZE = 10
+
+
+def _encode_batch(rpc_requests: List[Tuple[str, list]]) -> List[Dict[str, Any]]:
+    """Encode [(method, params)] as a JSON-RPC batch"""
+    return [
+        {"jsonrpc": "2.0", "method": method, "params": params, "id": request_id}
+        for request_id, (method, params) in enumerate(rpc_requests)
+    ]
+
+
+def _encode_eth_call_batch(calls: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Encode [(target, calldata)] as a JSON-RPC batch of eth_call requests"""
+    return _encode_batch([
+        ("eth_call", [{"to": target, "data": data}, "latest"])
+        for target, data in calls
+    ])
+
+
+def _decode_eth_call_batch(responses: List[Dict[str, Any]]) -> List[Tuple[bool, bytes]]:
+    """Decode a JSON-RPC batch response into (success, returnData) pairs in request order"""
+    results = []
+    for response in sorted(responses, key=lambda r: r["id"]):
+        if "error" in response:
+            results.append((False, b""))
+        else:
+            results.append((True, Web3.to_bytes(hexstr=response["result"])))
+    return results
+
+
+def _post_batch(w3: Web3, payload: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    POST a JSON-RPC batch over the pooled session for the provider's URL.
+    Nodes that reject batches answer with a single error object, raised here.
+    """
+    rpc_url = w3.provider.endpoint_uri
+    session = _SESSION_CACHE.get(rpc_url)
+    if session is None:
+        session = _SESSION_CACHE.setdefault(rpc_url, _build_session())
+    response = session.post(rpc_url, json=payload, timeout=RPC_TIMEOUT)
+    response.raise_for_status()
+    responses = response.json()
+    if not isinstance(responses, list):
+        error = responses.get("error", {}) if isinstance(responses, dict) else {}
+        raise Exception(f"JSON-RPC batch rejected: {error.get('message', responses)}")
+    return responses
+
+
+def rpc_batch(w3: Web3, rpc_requests: List[Tuple[str, list]]) -> List[Dict[str, Any]]:
+    """Send [(method, params)] as one JSON-RPC batch; responses come back in request order"""
+    return sorted(_post_batch(w3, _encode_batch(rpc_requests)), key=lambda r: r["id"])
+
+
+def send_raw_transactions(w3: Web3, raw_txs: List[bytes]) -> List[str]:
+    """Submit signed transactions in one eth_sendRawTransaction batch, returning their hashes"""
+    responses = rpc_batch(w3, [("eth_sendRawTransaction", [Web3.to_hex(raw_tx)]) for raw_tx in raw_txs])
+    tx_hashes = []
+    for response in responses:
+        if "error" in response:
+            raise Exception(f"eth_sendRawTransaction failed: {response['error'].get('message')}")
+        tx_hashes.append(response["result"])
+    return tx_hashes
+
+
+def batch_wait_for_receipts(
+    w3: Web3,
+    tx_hashes: List[str],
+    timeout: float = 120,
+    poll_interval: float = 1,
+) -> List[Dict[str, Any]]:
+    """
+    Wait for several transactions at once, polling every pending receipt in one
+    eth_getTransactionReceipt batch per interval. Receipts are returned raw
+    (hex-encoded fields) in the same order as tx_hashes.
+    """
+    receipts = {}
+    timeout_at = time.monotonic() + timeout
+    while True:
+        waiting = [tx_hash for tx_hash in tx_hashes if tx_hash not in receipts]
+        responses = rpc_batch(w3, [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in waiting])
+        for tx_hash, response in zip(waiting, responses):
+            if response.get("result"):
+                receipts[tx_hash] = response["result"]
+        if len(receipts) == len(tx_hashes):
+            return [receipts[tx_hash] for tx_hash in tx_hashes]
+        if time.monotonic() > timeout_at:
+            raise TimeoutError(f"Timed out waiting for {len(tx_hashes) - len(receipts)} transaction(s)")
+        time.sleep(poll_interval)
+
+
+def batch_eth_call(w3: Web3, calls: List[Tuple[str, str]]) -> List[Tuple[bool, bytes]]:
+    """
+    Execute several read calls as raw JSON-RPC batches of eth_call
+
+    Fallback for chains without Multicall3. Returns the same (success, returnData)
+    pairs as multicall3, sending at most BATCH_SIZE requests per HTTP POST.
+    """
+    results = []
+    for start in range(0, len(calls), BATCH_SIZE):
+        payload = _encode_eth_call_batch(calls[start:start + BATCH_SIZE])
+        results.extend(_decode_eth_call_batch(_post_batch(w3, payload)))
+    return results
+
+
+async def async_batch_eth_call(
+    w3: AsyncWeb3,
+    calls: List[Tuple[str, str]],
+    session: aiohttp.ClientSession,
+) -> List[Tuple[bool, bytes]]:
+    """Async variant of batch_eth_call, batches are sent concurrently"""
+    rpc_url = w3.provider.endpoint_uri
     
-    # Add nonce if not provided
+    async def post(batch):
+        async with session.post(rpc_url, json=_encode_eth_call_batch(batch)) as response:
+            response.raise_for_status()
+            return _decode_eth_call_batch(await response.json())
+    
+    batches = await asyncio.gather(*[
+        post(calls[start:start + BATCH_SIZE])
+        for start in range(0, len(calls), BATCH_SIZE)
+    ])
+    return [result for batch in batches for result in batch]
+
+
+def _to_rpc_tx(tx: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a transaction dict to JSON-RPC form (integers as hex quantities)"""
+    return {
+        key: hex(value) if isinstance(value, int) else value
+        for key, value in tx.items()
+        if key not in ("nonce", "gas", "chainId")
+    }
+
+
+def prepare_tx_fields(w3: Web3, account: Account, tx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill missing nonce, gas, chainId and gas price with a single JSON-RPC batch
+
+    Only fields absent from the transaction are requested.
+    """
+    rpc_requests = []
     if "nonce" not in tx:
-        tx["nonce"] = w3.eth.get_transaction_count(account.address)
+        rpc_requests.append(("nonce", "eth_getTransactionCount", [account.address, "latest"]))
+    if "gas" not in tx:
+        rpc_requests.append(("gas", "eth_estimateGas", [_to_rpc_tx(tx)]))
+    if "chainId" not in tx:
+        rpc_requests.append(("chainId", "eth_chainId", []))
+    if "gasPrice" not in tx and "maxFeePerGas" not in tx:
+        rpc_requests.append(("gasPrice", "eth_gasPrice", []))
+    
+    if not rpc_requests:
+        return tx
+    
+    responses = rpc_batch(w3, [(method, params) for _, method, params in rpc_requests])
+    for (field, method, _), response in zip(rpc_requests, responses):
+        if "error" in response:
+            raise Exception(f"{method} failed: {response['error'].get('message')}")
+        tx[field] = int(response["result"], 16)
+    
+    return tx
+
+
+def send_transaction(w3: Web3, account: Account, tx: Dict[str, Any]) -> Dict[str, Any]:
+    """Send transaction and wait for receipt"""
+    # Fill nonce, gas estimate and chain fields in one round-trip if not provided
+    prepare_tx_fields(w3, account, tx)
     
     # Sign transaction
     signed_tx = account.sign_transaction(tx)
@@ -110,12 +521,27 @@ def send_transaction(w3: Web3, account: Account, tx: Dict[str, Any]) -> Dict[str
 
 def format_amount(amount: int) -> str:
     """Format token amount for display"""
-    return f"{amount / 10**DECIMALS:,.{DECIMALS}f}"
+    sign = "-" if amount < 0 else ""
+    whole, fraction = divmod(abs(amount), _SCALE)
+    return f"{sign}{whole:,}.{fraction:0{DECIMALS}d}"
+
+
+def format_native(amount_wei: int) -> str:
+    """Format native token amount in wei with 6 decimals (truncated)"""
+    micro, _ = divmod(amount_wei, 10**12)
+    whole, fraction = divmod(micro, 10**6)
+    return f"{whole}.{fraction:06d}"
 
 
 def parse_amount(amount_str: str) -> int:
-    """Parse token amount from string"""
-    return int(float(amount_str) * 10**DECIMALS)
+    """Parse token amount from string (extra decimals are truncated)"""
+    whole, _, fraction = amount_str.strip().partition(".")
+    sign = -1 if whole.startswith("-") else 1
+    whole = whole.lstrip("+-")
+    if not (whole or fraction) or not (whole + fraction).isdigit():
+        raise ValueError(f"Invalid amount: {amount_str}")
+    fraction = fraction[:DECIMALS].ljust(DECIMALS, "0")
+    return sign * (int(whole or 0) * _SCALE + int(fraction))
 
 
 def print_receipt_info(receipt: Dict[str, Any]):
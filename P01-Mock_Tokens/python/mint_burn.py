@@ -4,20 +4,26 @@ Mint and burn token operations
 """
 
 import argparse
-from web3 import Web3
-from config import (
-    get_web3, get_account, get_contract, send_transaction,
-    format_amount, parse_amount, print_receipt_info, MINTER_ROLE
-)
 
 
 def check_minter_status(token_address: str, minter_address: str, rpc_url: str = None):
     """Check if address has minter role and allowance"""
+    from config import (
+        checksum, format_amount, get_web3, read,
+        HAS_ROLE_SELECTOR, MINTER_ALLOWANCE_SELECTOR, MINTER_ROLE
+    )
+    
     w3 = get_web3(rpc_url)
-    token = get_contract(w3, "MockUSDC", token_address)
+    token_address = checksum(token_address)
+    minter_address = checksum(minter_address)
     
-    is_minter = token.functions.hasRole(MINTER_ROLE, minter_address).call()
-    allowance = token.functions.minterAllowance(minter_address).call()
+    is_minter = read(
+        w3, token_address, HAS_ROLE_SELECTOR,
+        ['bytes32', 'address'], [MINTER_ROLE, minter_address], 'bool'
+    )
+    allowance = read(
+        w3, token_address, MINTER_ALLOWANCE_SELECTOR, ['address'], [minter_address], 'uint256'
+    )
     
     print(f"\nMinter Status for {minter_address}:")
     print(f"  Has MINTER_ROLE: {is_minter}")
@@ -33,10 +39,16 @@ def mint_tokens(
     rpc_url: str = None
 ):
     """Mint tokens to an address"""
+    from config import (
+        checksum, format_amount, get_account, get_contract, get_web3, parse_amount,
+        print_receipt_info, read, send_transaction, BALANCE_OF_SELECTOR
+    )
+    
     w3 = get_web3(rpc_url)
     account = get_account(private_key)
     token = get_contract(w3, "MockUSDC", token_address)
     
+    to_address = checksum(to_address)
     amount_wei = parse_amount(amount)
     
     print(f"\nMinting {format_amount(amount_wei)} tokens to {to_address}")
@@ -44,11 +56,10 @@ def mint_tokens(
     
     # Build transaction
     tx = token.functions.mint(
-        Web3.to_checksum_address(to_address),
+        to_address,
         amount_wei
     ).build_transaction({
         "from": account.address,
-        "nonce": w3.eth.get_transaction_count(account.address),
     })
     
     # Send transaction
@@ -56,7 +67,7 @@ def mint_tokens(
     print_receipt_info(receipt)
     
     # Check new balance
-    new_balance = token.functions.balanceOf(to_address).call()
+    new_balance = read(w3, token.address, BALANCE_OF_SELECTOR, ['address'], [to_address], 'uint256')
     print(f"\nNew balance: {format_amount(new_balance)}")
 
 
@@ -67,6 +78,11 @@ def burn_tokens(
     rpc_url: str = None
 ):
     """Burn tokens from caller's balance"""
+    from config import (
+        format_amount, get_account, get_contract, get_web3, parse_amount,
+        print_receipt_info, read, send_transaction, BALANCE_OF_SELECTOR
+    )
+    
     w3 = get_web3(rpc_url)
     account = get_account(private_key)
     token = get_contract(w3, "MockUSDC", token_address)
@@ -79,7 +95,6 @@ def burn_tokens(
     # Build transaction
     tx = token.functions.burn(amount_wei).build_transaction({
         "from": account.address,
-        "nonce": w3.eth.get_transaction_count(account.address),
     })
     
     # Send transaction
@@ -87,16 +102,21 @@ def burn_tokens(
     print_receipt_info(receipt)
     
     # Check new balance
-    new_balance = token.functions.balanceOf(account.address).call()
+    new_balance = read(
+        w3, token.address, BALANCE_OF_SELECTOR, ['address'], [account.address], 'uint256'
+    )
     print(f"\nNew balance: {format_amount(new_balance)}")
 
 
 def check_balance(token_address: str, address: str, rpc_url: str = None):
     """Check token balance"""
+    from config import checksum, format_amount, get_web3, read, BALANCE_OF_SELECTOR
+    
     w3 = get_web3(rpc_url)
-    token = get_contract(w3, "MockUSDC", token_address)
     
-    balance = token.functions.balanceOf(Web3.to_checksum_address(address)).call()
+    balance = read(
+        w3, checksum(token_address), BALANCE_OF_SELECTOR, ['address'], [checksum(address)], 'uint256'
+    )
     print(f"\nBalance of {address}: {format_amount(balance)}")
 
 
@@ -4,12 +4,8 @@ Check role status for an address across all tokens and blockchains
 """
 
 import argparse
+import asyncio
 import os
-from web3 import Web3
-from config import (
-    get_web3, get_contract, format_amount,
-    DEFAULT_ADMIN_ROLE, MASTER_MINTER_ROLE, MINTER_ROLE, BRIDGE_ROLE
-)
 
 
 # Blockchain configurations
@@ -30,50 +26,124 @@ BLOCKCHAINS = {
     }
 }
 
+# Tokens checked on every blockchain
+TOKENS = {
+    'usdc': 'MockUSDC',
+    'eurc': 'MockEURC',
+}
+
 
-def check_roles_for_token(w3, token_address, contract_name, address, blockchain_name):
+async def check_roles_for_token(w3, chain_id, token_address, address, session):
     """Check all roles for an address on a specific token"""
+    from config import (
+        async_batch_eth_call, async_multicall3, checksum, encode_call, get_token_meta,
+        save_token_meta, BRIDGE_ROLE, DEFAULT_ADMIN_ROLE, HAS_ROLE_SELECTOR,
+        MASTER_MINTER_ROLE, MINTER_ALLOWANCE_SELECTOR, MINTER_ROLE, NAME_SELECTOR,
+        SYMBOL_SELECTOR
+    )
+    
+    # Name and symbol are immutable, so skip those reads when already cached
+    meta = get_token_meta(chain_id, token_address)
+    cached_meta = 'name' in meta and 'symbol' in meta
+    
+    # Token info, role checks and minter allowance in a single round-trip
+    calls = [] if cached_meta else [
+        ('symbol', SYMBOL_SELECTOR, [], [], 'string'),
+        ('name', NAME_SELECTOR, [], [], 'string'),
+    ]
+    calls += [
+        ('hasRole', HAS_ROLE_SELECTOR, ['bytes32', 'address'], [DEFAULT_ADMIN_ROLE, address], 'bool'),
+        ('hasRole', HAS_ROLE_SELECTOR, ['bytes32', 'address'], [MASTER_MINTER_ROLE, address], 'bool'),
+        ('hasRole', HAS_ROLE_SELECTOR, ['bytes32', 'address'], [MINTER_ROLE, address], 'bool'),
+        ('hasRole', HAS_ROLE_SELECTOR, ['bytes32', 'address'], [BRIDGE_ROLE, address], 'bool'),
+        ('minterAllowance', MINTER_ALLOWANCE_SELECTOR, ['address'], [address], 'uint256'),
+    ]
+    token_address = checksum(token_address)
+    encoded_calls = [
+        (token_address, encode_call(selector, types, args))
+        for _, selector, types, args, _ in calls
+    ]
+    
+    # Plain JSON-RPC batch for chains without Multicall3
+    if os.getenv('USE_JSONRPC_BATCH'):
+        results = await async_batch_eth_call(w3, encoded_calls, session)
+    else:
+        results = await async_multicall3(w3, encoded_calls)
+    
+    values = []
+    for (fn_name, _, _, _, output_type), (success, data) in zip(calls, results):
+        if not success:
+            raise Exception(f"{fn_name}() call failed")
+        values.append(w3.codec.decode([output_type], data)[0])
+    
+    if cached_meta:
+        symbol, name = meta['symbol'], meta['name']
+    else:
+        symbol, name = values[:2]
+        values = values[2:]
+        save_token_meta(chain_id, token_address, name=name, symbol=symbol)
+    
+    has_admin, has_master_minter, has_minter, has_bridge, allowance = values
+    
+    # Minter allowance only applies to minters
+    minter_allowance = allowance if has_minter else 0
+    
+    return {
+        'name': name,
+        'symbol': symbol,
+        'address': token_address,
+        'has_admin': has_admin,
+        'has_master_minter': has_master_minter,
+        'has_minter': has_minter,
+        'has_bridge': has_bridge,
+        'minter_allowance': minter_allowance,
+    }
+
+
+async def check_chain_roles(blockchain_config, address, session):
+    """Check roles on all tokens of one blockchain, tokens queried concurrently"""
+    from config import get_async_web3
     
-    if not token_address:
-        return None
+    rpc_url = os.getenv(blockchain_config['rpc_env'])
+    if not rpc_url:
+        return {'error': f"RPC URL not set ({blockchain_config['rpc_env']})"}
     
     try:
-        token = get_contract(w3, contract_name, token_address)
-        
-        # Get token info
-        symbol = token.functions.symbol().call()
-        name = token.functions.name().call()
-        
-        # Check roles
-        has_admin = token.functions.hasRole(DEFAULT_ADMIN_ROLE, address).call()
-        has_master_minter = token.functions.hasRole(MASTER_MINTER_ROLE, address).call()
-        has_minter = token.functions.hasRole(MINTER_ROLE, address).call()
-        has_bridge = token.functions.hasRole(BRIDGE_ROLE, address).call()
-        
-        # Get minter allowance if applicable
-        minter_allowance = 0
-        if has_minter:
-            minter_allowance = token.functions.minterAllowance(address).call()
-        
-        return {
-            'name': name,
-            'symbol': symbol,
-            'address': token_address,
-            'has_admin': has_admin,
-            'has_master_minter': has_master_minter,
-            'has_minter': has_minter,
-            'has_bridge': has_bridge,
-            'minter_allowance': minter_allowance,
-        }
+        w3 = await get_async_web3(rpc_url, session)
+        chain_id = await w3.eth.chain_id
     except Exception as e:
-        print(f"  ⚠️  Error checking {contract_name} on {blockchain_name}: {e}")
-        return None
+        return {'error': f"Cannot connect to {blockchain_config['name']}: {e}"}
+    
+    token_addresses = {
+        token_key: os.getenv(blockchain_config[f'{token_key}_env'])
+        for token_key in TOKENS
+    }
+    configured = [(key, token_address) for key, token_address in token_addresses.items() if token_address]
+    token_results = await asyncio.gather(*[
+        check_roles_for_token(w3, chain_id, token_address, address, session)
+        for token_key, token_address in configured
+    ], return_exceptions=True)
+    
+    tokens = {token_key: (token_address, None) for token_key, token_address in token_addresses.items()}
+    for (token_key, token_address), token_result in zip(configured, token_results):
+        tokens[token_key] = (token_address, token_result)
+    
+    return {'chain_id': chain_id, 'tokens': tokens}
 
 
-def check_all_roles(address: str):
+async def check_all_roles(address: str):
     """Check roles for an address on all tokens and blockchains"""
+    import aiohttp
+    from config import checksum, format_amount
+    
+    address = checksum(address)
     
-    address = Web3.to_checksum_address(address)
+    # Query every blockchain concurrently over a shared HTTP session
+    async with aiohttp.ClientSession() as session:
+        chain_results = await asyncio.gather(*[
+            check_chain_roles(blockchain_config, address, session)
+            for blockchain_config in BLOCKCHAINS.values()
+        ])
     
     print(f"\n{'='*80}")
     print(f"Role Status for Address: {address}")
@@ -81,66 +151,38 @@ def check_all_roles(address: str):
     
     results = {}
     
-    # Check each blockchain
-    for blockchain_key, blockchain_config in BLOCKCHAINS.items():
+    # Report each blockchain
+    for (blockchain_key, blockchain_config), chain_result in zip(BLOCKCHAINS.items(), chain_results):
         print(f"📍 {blockchain_config['name']}")
         print(f"{'-'*80}")
         
-        # Get RPC URL
-        rpc_url = os.getenv(blockchain_config['rpc_env'])
-        if not rpc_url:
-            print(f"  ⚠️  RPC URL not set ({blockchain_config['rpc_env']})\n")
+        if 'error' in chain_result:
+            print(f"  ⚠️  {chain_result['error']}\n")
             continue
         
-        try:
-            w3 = get_web3(rpc_url)
-            chain_id = w3.eth.chain_id
-            print(f"  Chain ID: {chain_id}\n")
-        except Exception as e:
-            print(f"  ⚠️  Cannot connect to {blockchain_config['name']}: {e}\n")
-            continue
+        print(f"  Chain ID: {chain_result['chain_id']}\n")
         
         results[blockchain_key] = {}
         
-        # Check MockUSDC
-        usdc_address = os.getenv(blockchain_config['usdc_env'])
-        if usdc_address:
-            print(f"  🪙  MockUSDC ({usdc_address})")
-            usdc_result = check_roles_for_token(
-                w3, usdc_address, 'MockUSDC', address, blockchain_config['name']
-            )
-            if usdc_result:
-                results[blockchain_key]['usdc'] = usdc_result
-                print(f"      Admin Role:         {'✅ YES' if usdc_result['has_admin'] else '❌ NO'}")
-                print(f"      Master Minter Role: {'✅ YES' if usdc_result['has_master_minter'] else '❌ NO'}")
-                print(f"      Minter Role:        {'✅ YES' if usdc_result['has_minter'] else '❌ NO'}")
-                if usdc_result['has_minter']:
-                    print(f"      Minter Allowance:   {format_amount(usdc_result['minter_allowance'])}")
-                print(f"      Bridge Role:        {'✅ YES' if usdc_result['has_bridge'] else '❌ NO'}")
-        else:
-            print(f"  ⚠️  MockUSDC address not set ({blockchain_config['usdc_env']})")
-        
-        print()
-        
-        # Check MockEURC
-        eurc_address = os.getenv(blockchain_config['eurc_env'])
-        if eurc_address:
-            print(f"  🪙  MockEURC ({eurc_address})")
-            eurc_result = check_roles_for_token(
-                w3, eurc_address, 'MockEURC', address, blockchain_config['name']
-            )
-            if eurc_result:
-                results[blockchain_key]['eurc'] = eurc_result
-                print(f"      Admin Role:         {'✅ YES' if eurc_result['has_admin'] else '❌ NO'}")
-                print(f"      Master Minter Role: {'✅ YES' if eurc_result['has_master_minter'] else '❌ NO'}")
-                print(f"      Minter Role:        {'✅ YES' if eurc_result['has_minter'] else '❌ NO'}")
-                if eurc_result['has_minter']:
-                    print(f"      Minter Allowance:   {format_amount(eurc_result['minter_allowance'])}")
-                print(f"      Bridge Role:        {'✅ YES' if eurc_result['has_bridge'] else '❌ NO'}")
-        else:
-            print(f"  ⚠️  MockEURC address not set ({blockchain_config['eurc_env']})")
-        
-        print()
+        for token_key, (token_address, token_result) in chain_result['tokens'].items():
+            contract_name = TOKENS[token_key]
+            if not token_address:
+                print(f"  ⚠️  {contract_name} address not set ({blockchain_config[f'{token_key}_env']})")
+                print()
+                continue
+            
+            print(f"  🪙  {contract_name} ({token_address})")
+            if isinstance(token_result, Exception):
+                print(f"  ⚠️  Error checking {contract_name} on {blockchain_config['name']}: {token_result}")
+            else:
+                results[blockchain_key][token_key] = token_result
+                print(f"      Admin Role:         {'✅ YES' if token_result['has_admin'] else '❌ NO'}")
+                print(f"      Master Minter Role: {'✅ YES' if token_result['has_master_minter'] else '❌ NO'}")
+                print(f"      Minter Role:        {'✅ YES' if token_result['has_minter'] else '❌ NO'}")
+                if token_result['has_minter']:
+                    print(f"      Minter Allowance:   {format_amount(token_result['minter_allowance'])}")
+                print(f"      Bridge Role:        {'✅ YES' if token_result['has_bridge'] else '❌ NO'}")
+            print()
     
     # Summary
     print(f"{'='*80}")
@@ -201,6 +243,9 @@ Environment Variables Required:
   MOCK_EURC_ADDRESS_ARBITRUM     - MockEURC address on Arbitrum
   MOCK_USDC_ADDRESS_POLYGON      - MockUSDC address on Polygon
   MOCK_EURC_ADDRESS_POLYGON      - MockEURC address on Polygon
+
+Optional:
+  USE_JSONRPC_BATCH              - Use JSON-RPC batching instead of Multicall3
         """
     )
     
@@ -209,7 +254,7 @@ Environment Variables Required:
     args = parser.parse_args()
     
     try:
-        check_all_roles(args.address)
+        asyncio.run(check_all_roles(args.address))
     except Exception as e:
         print(f"\n❌ Error: {e}\n")
         return 1
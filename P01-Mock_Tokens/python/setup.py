@@ -5,11 +5,6 @@ Setup a minter for a token on a specific blockchain
 
 import argparse
 import os
-from web3 import Web3
-from config import (
-    get_web3, get_account, get_contract, send_transaction,
-    format_amount, MASTER_MINTER_ROLE, MINTER_ROLE
-)
 
 
 # Blockchain configurations
@@ -28,6 +23,15 @@ BLOCKCHAINS = {
     }
 }
 
+# Separator line for console output
+BANNER = "=" * 70
+
+# Fixed gas limit for pipelined role/allowance transactions
+PIPELINED_GAS_LIMIT = 150_000
+
+# Seconds to wait for pipelined transactions to be mined
+RECEIPT_TIMEOUT = 120
+
 # Asset configurations
 ASSETS = {
     'usdc': {
@@ -45,7 +49,8 @@ def setup_minter(
     minter_address: str,
     asset: str,
     blockchain: str,
-    allowance: int = 1_000_000_000_000_000  # 1 billion tokens default
+    allowance: int = 1_000_000_000_000_000,  # 1 billion tokens default
+    verbose: bool = False
 ):
     """
     Setup an address as a minter for a token
@@ -54,7 +59,15 @@ def setup_minter(
     1. Grant MASTER_MINTER_ROLE to deployer (if not already granted)
     2. Grant MINTER_ROLE to minter address
     3. Configure minter allowance
+    
+    Token name/symbol are only read for the verbose banner.
     """
+    from config import (
+        batch_wait_for_receipts, checksum, format_amount, get_account, get_contract, get_web3, read_many,
+        rpc_batch, send_raw_transactions, GET_CHAIN_ID_SELECTOR, HAS_ROLE_SELECTOR, MASTER_MINTER_ROLE,
+        MINTER_ALLOWANCE_SELECTOR, MINTER_ROLE, MULTICALL3_ADDRESS, NAME_SELECTOR,
+        SYMBOL_SELECTOR
+    )
     
     # Validate inputs
     if blockchain not in BLOCKCHAINS:
@@ -85,87 +98,112 @@ def setup_minter(
     w3 = get_web3(rpc_url)
     deployer_account = get_account(deployer_private_key)
     token = get_contract(w3, asset_config['contract_name'], token_address)
-    minter_address = Web3.to_checksum_address(minter_address)
-    
-    # Get token info
-    token_name = token.functions.name().call()
-    token_symbol = token.functions.symbol().call()
-    chain_id = w3.eth.chain_id
-    
-    print(f"\n{'='*70}")
-    print(f"Setting up Minter for {token_symbol}")
-    print(f"{'='*70}")
-    print(f"Blockchain: {blockchain_config['name']} (Chain ID: {chain_id})")
-    print(f"Token: {token_name} ({token_symbol})")
-    print(f"Token Address: {token_address}")
-    print(f"Minter Address: {minter_address}")
-    print(f"Deployer: {deployer_account.address}")
-    print(f"{'='*70}\n")
-    
-    # Check current roles
-    print("Checking current roles...")
-    has_master_minter = token.functions.hasRole(MASTER_MINTER_ROLE, deployer_account.address).call()
-    has_minter_role = token.functions.hasRole(MINTER_ROLE, minter_address).call()
-    current_allowance = token.functions.minterAllowance(minter_address).call()
+    minter_address = checksum(minter_address)
     
+    # Current roles and chain ID (plus banner info when verbose) in a single Multicall3 round-trip
+    token_address = checksum(token_address)
+    calls = [
+        (token_address, HAS_ROLE_SELECTOR, ['bytes32', 'address'],
+         [MASTER_MINTER_ROLE, deployer_account.address], 'bool'),
+        (token_address, HAS_ROLE_SELECTOR, ['bytes32', 'address'], [MINTER_ROLE, minter_address], 'bool'),
+        (token_address, MINTER_ALLOWANCE_SELECTOR, ['address'], [minter_address], 'uint256'),
+        (MULTICALL3_ADDRESS, GET_CHAIN_ID_SELECTOR, [], [], 'uint256'),
+    ]
+    if verbose:
+        calls.append((token_address, NAME_SELECTOR, [], [], 'string'))
+        calls.append((token_address, SYMBOL_SELECTOR, [], [], 'string'))
+    
+    results = read_many(w3, calls)
+    has_master_minter, has_minter_role, current_allowance, chain_id = results[:4]
+    extra = results[4:]
+    token_label = asset_config['name']
+    
+    if verbose:
+        token_name, token_symbol = extra
+        token_label = token_symbol
+        print(f"\n{BANNER}")
+        print(f"Setting up Minter for {token_symbol}")
+        print(BANNER)
+        print(f"Blockchain: {blockchain_config['name']} (Chain ID: {chain_id})")
+        print(f"Token: {token_name} ({token_symbol})")
+        print(f"Token Address: {token_address}")
+        print(f"Minter Address: {minter_address}")
+        print(f"Deployer: {deployer_account.address}")
+        print(f"{BANNER}\n")
+    else:
+        print(f"\nSetting up {minter_address} as {token_label} minter on {blockchain_config['name']}\n")
+    
+    print("Checking current roles...")
     print(f"Deployer has MASTER_MINTER_ROLE: {has_master_minter}")
     print(f"Minter has MINTER_ROLE: {has_minter_role}")
     print(f"Current minter allowance: {format_amount(current_allowance)}\n")
     
+    # Queue only the steps whose pre-check did not pass
+    steps = []
+    
     # Step 1: Grant MASTER_MINTER_ROLE to deployer if needed
     if not has_master_minter:
         print("[1/3] Granting MASTER_MINTER_ROLE to deployer...")
-        tx = token.functions.grantRole(
-            MASTER_MINTER_ROLE,
-            deployer_account.address
-        ).build_transaction({
-            'from': deployer_account.address,
-            'nonce': w3.eth.get_transaction_count(deployer_account.address),
-        })
-        receipt = send_transaction(w3, deployer_account, tx)
-        print(f"✓ Transaction mined in block {receipt['blockNumber']}")
+        steps.append(("[1/3]", token.functions.grantRole(MASTER_MINTER_ROLE, deployer_account.address)))
     else:
         print("[1/3] ✓ Deployer already has MASTER_MINTER_ROLE")
     
     # Step 2: Grant MINTER_ROLE to minter address if needed
     if not has_minter_role:
         print("\n[2/3] Granting MINTER_ROLE to minter address...")
-        tx = token.functions.grantRole(
-            MINTER_ROLE,
-            minter_address
-        ).build_transaction({
-            'from': deployer_account.address,
-            'nonce': w3.eth.get_transaction_count(deployer_account.address),
-        })
-        receipt = send_transaction(w3, deployer_account, tx)
-        print(f"✓ Transaction mined in block {receipt['blockNumber']}")
+        steps.append(("[2/3]", token.functions.grantRole(MINTER_ROLE, minter_address)))
     else:
         print("\n[2/3] ✓ Minter address already has MINTER_ROLE")
     
     # Step 3: Configure minter allowance
     print(f"\n[3/3] Configuring minter allowance to {format_amount(allowance)}...")
-    tx = token.functions.configureMinter(
-        minter_address,
-        allowance
-    ).build_transaction({
-        'from': deployer_account.address,
-        'nonce': w3.eth.get_transaction_count(deployer_account.address),
-    })
-    receipt = send_transaction(w3, deployer_account, tx)
-    print(f"✓ Transaction mined in block {receipt['blockNumber']}")
+    steps.append(("[3/3]", token.functions.configureMinter(minter_address, allowance)))
+    
+    # Sign everything locally with consecutive nonces. Later steps depend on
+    # earlier ones not yet mined, so gas is a fixed limit rather than estimated.
+    nonce_response, gas_price_response = rpc_batch(w3, [
+        ("eth_getTransactionCount", [deployer_account.address, "pending"]),
+        ("eth_gasPrice", []),
+    ])
+    nonce = int(nonce_response["result"], 16)
+    gas_price = int(gas_price_response["result"], 16)
+    
+    raw_txs = []
+    for offset, (_, function_call) in enumerate(steps):
+        tx = function_call.build_transaction({
+            'from': deployer_account.address,
+            'nonce': nonce + offset,
+            'gas': PIPELINED_GAS_LIMIT,
+            'gasPrice': gas_price,
+            'chainId': chain_id,
+        })
+        raw_txs.append(deployer_account.sign_transaction(tx).rawTransaction)
+    
+    # Submit all transactions back-to-back, then poll their receipts together
+    tx_hashes = send_raw_transactions(w3, raw_txs)
+    print(f"\nSubmitted {len(tx_hashes)} transaction(s), waiting for receipts...")
+    
+    receipts = batch_wait_for_receipts(w3, tx_hashes, timeout=RECEIPT_TIMEOUT)
+    
+    for (label, _), tx_hash, receipt in zip(steps, tx_hashes, receipts):
+        if int(receipt["status"], 16) == 0:
+            raise Exception(f"{label} transaction failed: {tx_hash}")
+        print(f"✓ {label} {tx_hash} mined in block {int(receipt['blockNumber'], 16)}")
     
     # Verify final state
-    print("\n" + "="*70)
+    print("\n" + BANNER)
     print("Setup Complete! Final Status:")
-    print("="*70)
-    final_has_minter = token.functions.hasRole(MINTER_ROLE, minter_address).call()
-    final_allowance = token.functions.minterAllowance(minter_address).call()
+    print(BANNER)
+    final_has_minter, final_allowance = read_many(w3, [
+        (token_address, HAS_ROLE_SELECTOR, ['bytes32', 'address'], [MINTER_ROLE, minter_address], 'bool'),
+        (token_address, MINTER_ALLOWANCE_SELECTOR, ['address'], [minter_address], 'uint256'),
+    ])
     
     print(f"✓ Minter has MINTER_ROLE: {final_has_minter}")
     print(f"✓ Minter allowance: {format_amount(final_allowance)}")
     print(f"\nThe address {minter_address}")
-    print(f"can now mint up to {format_amount(final_allowance)} {token_symbol} tokens")
-    print("="*70 + "\n")
+    print(f"can now mint up to {format_amount(final_allowance)} {token_label} tokens")
+    print(BANNER + "\n")
 
 
 def main():
@@ -201,11 +239,13 @@ Environment Variables Required:
                        help="Blockchain (arbitrum or polygon)")
     parser.add_argument("--allowance", type=int, default=1_000_000_000_000_000,
                        help="Minter allowance in raw units (default: 1 billion tokens)")
+    parser.add_argument("--verbose", action="store_true",
+                       help="Print a banner with on-chain token name and symbol")
     
     args = parser.parse_args()
     
     try:
-        setup_minter(args.address, args.asset, args.blockchain, args.allowance)
+        setup_minter(args.address, args.asset, args.blockchain, args.allowance, args.verbose)
     except Exception as e:
         print(f"\n❌ Error: {e}\n")
         return 1
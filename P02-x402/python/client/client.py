@@ -5,25 +5,56 @@ Makes requests to buy assets using EIP-2612 gasless approvals
 import os
 import sys
 import json
-import time
-import requests
-from web3 import Web3
-from eth_account import Account
-from eth_account.messages import encode_typed_data
+import asyncio
+import orjson
+from typing import Optional, Tuple
+
+# aiohttp/web3/eth_account are imported where first used so `--help` and config
+# errors don't pay their import cost
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from common.config import Config
-from common.contracts import get_contract, ERC20_PERMIT_ABI
+
+# Function selectors for the pre-flight reads: bytes4(keccak256(signature))
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")  # balanceOf(address)
+NONCES_SELECTOR = bytes.fromhex("7ecebe00")  # nonces(address)
+NAME_SELECTOR = bytes.fromhex("06fdde03")  # name()
+
+# Slippage buffer on the EURC payment, in basis points (10500 = +5%)
+BUFFER_BP = 10500
+
+
+def _address_word(address: str) -> bytes:
+    """ABI-encode an address as a left-padded 32-byte word"""
+    return bytes.fromhex(address[2:]).rjust(32, b"\x00")
+
+
+def _uint_word(value: int) -> bytes:
+    """ABI-encode a uint256 as a 32-byte big-endian word"""
+    return value.to_bytes(32, "big")
 
 
 class X402Client:
-    """Client for making x402 payment requests"""
+    """
+    Client for making x402 payment requests
+    
+    Use as an async context manager so the HTTP session and AsyncWeb3 provider
+    are opened and closed on the running event loop:
+    
+        async with X402Client(server_url) as client:
+            await client.buy_asset(1.0)
+    """
     
     def __init__(self, server_url: str, private_key: str = None, client_address: str = None):
+        from eth_account import Account
+        
         self.server_url = server_url
-        self.w3 = Web3(Web3.HTTPProvider(Config.RPC_URL))
+        
+        # Opened in __aenter__
+        self.session = None
+        self.w3 = None
         
         # Use provided key or get from config
         if private_key:
@@ -40,75 +71,114 @@ class X402Client:
         print(f"Server: {server_url}")
         print(f"Role: Buyer (pays EURC, receives YPS)\n")
         
-        # Load MockEURC contract
-        self.mock_eurc = get_contract(self.w3, Config.MOCK_EURC_ADDRESS, ERC20_PERMIT_ABI)
+        # EIP-712 domain fields are immutable; the token name is read by the first
+        # purchase pre-flight and reused afterwards
+        self._token_name: Optional[str] = None
+        self._chain_id = Config.CHAIN_ID
+        self._domain_separators = {}
+    
+    async def __aenter__(self) -> "X402Client":
+        import aiohttp
+        from web3 import AsyncWeb3
         
-    def get_eur_usd_rate(self) -> float:
-        """Get EUR/USD exchange rate (simulated or from API)"""
+        # One keep-alive connection pool shared by server requests and RPC calls
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=32))
+        self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(Config.RPC_URL))
+        await self.w3.provider.cache_async_session(self.session)
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+    
+    def mock_eurc(self):
+        """MockEURC contract bound to the client's AsyncWeb3 instance (cached)"""
+        from common.contracts import get_contract, ERC20_PERMIT_ABI
+        
+        return get_contract(self.w3, Config.MOCK_EURC_ADDRESS, ERC20_PERMIT_ABI)
+    
+    def multicall3(self):
+        """Multicall3 contract bound to the client's AsyncWeb3 instance (cached)"""
+        from common.contracts import get_contract, MULTICALL3_ABI, MULTICALL3_ADDRESS
+        
+        return get_contract(self.w3, MULTICALL3_ADDRESS, MULTICALL3_ABI)
+    
+    async def preflight(self) -> dict:
+        """
+        Read EURC balance, permit nonce and (first time only) token name in one
+        Multicall3 aggregate call
+        """
+        # Fixed-layout calldata (selector + padded address), built by hand
+        eurc_address = self.mock_eurc().address
+        owner = _address_word(self.account.address)
+        calls = [
+            (eurc_address, BALANCE_OF_SELECTOR + owner),
+            (eurc_address, NONCES_SELECTOR + owner),
+        ]
+        if self._token_name is None:
+            calls.append((eurc_address, NAME_SELECTOR))
+        _, return_data = await self.multicall3().functions.aggregate(calls).call()
+        
+        balance = int.from_bytes(return_data[0], "big")
+        nonce = int.from_bytes(return_data[1], "big")
+        if self._token_name is None:
+            self._token_name = self.w3.codec.decode(['string'], return_data[2])[0]
+        
+        return {"balance": balance, "nonce": nonce, "token_name": self._token_name}
+    
+    async def _get(self, url: str, params: dict, headers: dict = None) -> Tuple[int, bytes]:
+        """GET from the server, returning (status, body)"""
+        async with self.session.get(url, params=params, headers=headers) as response:
+            return response.status, await response.read()
+    
+    def _domain_separator(self, token_address: str, token_name: str) -> bytes:
+        """EIP-712 domain separator for a permit token (computed once per token)"""
+        from common.permit import domain_separator
+        
+        separator = self._domain_separators.get(token_address)
+        if separator is None:
+            separator = domain_separator(token_name, self._chain_id, token_address)
+            self._domain_separators[token_address] = separator
+        return separator
+    
+    def get_eur_usd_rate_micro(self) -> int:
+        """Get EUR/USD exchange rate scaled by 1e6 (simulated or from API)"""
         # In production, this would call a real API
         # For demo, use configured rate
-        return Config.DEFAULT_EUR_USD_RATE
+        return Config.EUR_USD_RATE_MICRO
     
     def sign_eip2612_permit(
         self,
         token_address: str,
         spender: str,
         amount: int,
-        deadline: int
+        deadline: int,
+        nonce: int,
+        token_name: str
     ) -> dict:
-        """Sign EIP-2612 permit for gasless approval"""
-        
-        # Get nonce
-        nonce = self.mock_eurc.functions.nonces(self.account.address).call()
-        
-        # Get token name for EIP-712 domain
-        token_name = self.mock_eurc.functions.name().call()
-        
-        # Create EIP-712 typed data for permit
-        permit_data = {
-            "types": {
-                "EIP712Domain": [
-                    {"name": "name", "type": "string"},
-                    {"name": "version", "type": "string"},
-                    {"name": "chainId", "type": "uint256"},
-                    {"name": "verifyingContract", "type": "address"}
-                ],
-                "Permit": [
-                    {"name": "owner", "type": "address"},
-                    {"name": "spender", "type": "address"},
-                    {"name": "value", "type": "uint256"},
-                    {"name": "nonce", "type": "uint256"},
-                    {"name": "deadline", "type": "uint256"}
-                ]
-            },
-            "domain": {
-                "name": token_name,
-                "version": "1",
-                "chainId": Config.CHAIN_ID,
-                "verifyingContract": token_address
-            },
-            "primaryType": "Permit",
-            "message": {
-                "owner": self.account.address,
-                "spender": spender,
-                "value": amount,
-                "nonce": nonce,
-                "deadline": deadline
-            }
-        }
+        """Sign EIP-2612 permit for gasless approval (nonce and name come from preflight)"""
+        from common.permit import permit_digest
         
-        # Sign typed data
-        encoded_data = encode_typed_data(full_message=permit_data)
-        signed_message = self.account.sign_message(encoded_data)
+        digest = permit_digest(
+            self._domain_separator(token_address, token_name),
+            self.account.address,
+            spender,
+            amount,
+            nonce,
+            deadline
+        )
         
-        # Return signature components
-        # Handle both int and bytes types for r and s (eth-account version compatibility)
-        r_value = signed_message.r if isinstance(signed_message.r, int) else int.from_bytes(signed_message.r, 'big')
-        s_value = signed_message.s if isinstance(signed_message.s, int) else int.from_bytes(signed_message.s, 'big')
+        # Sign the digest directly (no typed-data re-encoding per purchase)
+        signed_message = self.account.signHash(digest)
         
-        # Convert to hex and pad to 64 characters (32 bytes), remove '0x' prefix
-        r_hex = format(r_value, '064x')  # Pad to 64 hex chars
-        s_hex = format(s_value, '064x')  # Pad to 64 hex chars
+        # signHash always returns r/s as ints; hex-encode as 32-byte big-endian (no '0x')
+        r_hex = signed_message.r.to_bytes(32, 'big').hex()
+        s_hex = signed_message.s.to_bytes(32, 'big').hex()
         
         return {
             "v": signed_message.v,
@@ -119,7 +189,7 @@ class X402Client:
             "nonce": nonce
         }
     
-    def buy_asset(self, amount: float) -> dict:
+    async def buy_asset(self, amount: float) -> dict:
         """
         Buy asset using x402 flow
         
@@ -129,6 +199,11 @@ class X402Client:
         Returns:
             Response from server
         """
+        # Hot-path callables bound once per purchase
+        _get = self._get
+        _dumps = orjson.dumps
+        _loads = orjson.loads
+        
         print(f"\n=== Starting x402 Purchase ===")
         print(f"Requesting {amount} YPS tokens")
         
@@ -140,18 +215,26 @@ class X402Client:
             "amount": str(amount)
         }
         
-        response = requests.get(url, params=params)
+        # The on-chain pre-flight doesn't depend on the quote, so run both concurrently
+        (status, body), onchain = await asyncio.gather(
+            _get(url, params=params),
+            self.preflight(),
+        )
         
-        if response.status_code != 402:
-            print(f"Unexpected response: {response.status_code}")
-            return response.json()
+        if status != 402:
+            print(f"Unexpected response: {status}")
+            return _loads(body)
         
         print("Received HTTP 402 Payment Required")
         
         # Step 2: Parse payment requirements
-        payment_req = response.json()
+        payment_req = _loads(body)
         print("\nStep 2: Payment Requirements:")
-        print(json.dumps(payment_req, indent=2))
+        if Config.DEBUG:
+            print(json.dumps(payment_req, indent=2))
+        else:
+            print(f"Order ID: {payment_req['order_id']}")
+            print(f"Amount: {payment_req['amount']} (deadline {payment_req['deadline']})")
         
         required_usdc = int(payment_req['amount'])
         deadline = payment_req['deadline']
@@ -160,17 +243,17 @@ class X402Client:
         
         # Step 3: Get EUR/USD rate and calculate max EURC payment
         print("\nStep 3: Calculating payment amount...")
-        eur_usd_rate = self.get_eur_usd_rate()
-        print(f"EUR/USD rate: {eur_usd_rate}")
+        rate_micro = self.get_eur_usd_rate_micro()
+        print(f"EUR/USD rate: {rate_micro / 10**6}")
         
         # Required USDC (6 decimals) / EUR_USD_rate = Required EURC (6 decimals)
-        # Add 5% buffer for price movement
-        required_eurc = int(required_usdc / eur_usd_rate * 1.05)
+        # Add 5% buffer for price movement; integer math so the amount is exact
+        required_eurc = required_usdc * 1_000_000 * BUFFER_BP // (rate_micro * 10_000)
         print(f"Required USDC: {required_usdc / 10**6}")
         print(f"Max EURC payment (with buffer): {required_eurc / 10**6}")
         
-        # Check balance
-        balance = self.mock_eurc.functions.balanceOf(self.account.address).call()
+        # Check balance (read by the pre-flight alongside the permit nonce)
+        balance = onchain["balance"]
         print(f"Current EURC balance: {balance / 10**6}")
         
         if balance < required_eurc:
@@ -183,7 +266,9 @@ class X402Client:
             Config.MOCK_EURC_ADDRESS,
             vault_address,
             required_eurc,
-            deadline
+            deadline,
+            nonce=onchain["nonce"],
+            token_name=onchain["token_name"]
         )
         print("Permit signed (gasless approval)")
         
@@ -195,14 +280,14 @@ class X402Client:
         }
         
         headers = {
-            "X-PAYMENT": json.dumps(payment_payload)
+            "X-PAYMENT": _dumps(payment_payload).decode()
         }
         
-        response = requests.get(url, params=params, headers=headers)
+        status, body = await _get(url, params=params, headers=headers)
         
-        if response.status_code == 200:
+        if status == 200:
             print("\n✅ Purchase successful!")
-            result = response.json()
+            result = _loads(body)
             print("\nTransaction Details:")
             print(f"Order ID: {result['order_id']}")
             print(f"Asset received: {int(result['asset_amount']) / 10**18} YPS")
@@ -214,9 +299,15 @@ class X402Client:
             
             return result
         else:
-            print(f"\n❌ Purchase failed: {response.status_code}")
-            print(response.text)
-            return response.json()
+            print(f"\n❌ Purchase failed: {status}")
+            print(body.decode())
+            return _loads(body)
+
+
+async def run(server_url: str, amount: float, private_key: str = None) -> dict:
+    """Create a client, make one purchase and close the client"""
+    async with X402Client(server_url, private_key, Config.CLIENT_ADDRESS) as client:
+        return await client.buy_asset(amount)
 
 
 def main():
@@ -241,15 +332,12 @@ def main():
         print("\nMake sure CLIENT_PRIVATE_KEY and CLIENT_ADDRESS are set in .env")
         sys.exit(1)
     
-    # Create client
-    client = X402Client(
-        args.server, 
-        args.private_key if args.private_key else Config.CLIENT_PRIVATE_KEY,
-        Config.CLIENT_ADDRESS
-    )
-    
-    # Make purchase
-    result = client.buy_asset(args.amount)
+    # Create client and make purchase
+    result = asyncio.run(run(
+        args.server,
+        args.amount,
+        args.private_key if args.private_key else Config.CLIENT_PRIVATE_KEY
+    ))
     
     # Print final result
     print("\n" + "="*50)
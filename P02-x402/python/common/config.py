@@ -1,94 +1,157 @@
 """Configuration management for x402 OTC API"""
+import functools
 import os
+import sys
+from dataclasses import dataclass
+from typing import Optional
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Extra dataclass options: slots=True needs Python 3.10+, older interpreters skip it
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
+class Settings:
+    """Immutable snapshot of the x402 OTC API configuration"""
 
-class Config:
-    """Configuration class for the x402 OTC API system"""
-    
     # Network
-    RPC_URL = os.getenv("RPC_URL", "https://rpc-amoy.polygon.technology")
-    CHAIN_ID = int(os.getenv("CHAIN_ID", "80002"))  # Polygon Amoy
-    
+    rpc_url: str
+    rpc_ws_url: str  # Optional WebSocket endpoint for newHeads-driven receipt waits
+    rpc_cache_ttl: float  # Seconds eth_call results are cached by the server
+    chain_id: int
+
     # Contract Addresses
-    MOCK_EURC_ADDRESS = os.getenv("MOCK_EURC_ADDRESS_POLYGON")
-    MOCK_USDC_ADDRESS = os.getenv("MOCK_USDC_ADDRESS_POLYGON")
-    YPS_ADDRESS = os.getenv("YPS_ADDRESS")
-    SWAP_SIMULATOR_ADDRESS = os.getenv("SWAP_SIMULATOR_ADDRESS")
-    SETTLEMENT_VAULT_ADDRESS = os.getenv("SETTLEMENT_VAULT_ADDRESS")
-    
+    mock_eurc_address: Optional[str]
+    mock_usdc_address: Optional[str]
+    yps_address: Optional[str]
+    swap_simulator_address: Optional[str]
+    settlement_vault_address: Optional[str]
+
     # ============ Role-Based Configuration ============
-    
+
     # FACILITATOR (Server/Orchestrator)
     # - Runs the HTTP server
     # - Owns SettlementVault contract
     # - Orchestrates transactions
-    FACILITATOR_PRIVATE_KEY = os.getenv("FACILITATOR_PRIVATE_KEY")
-    FACILITATOR_ADDRESS = os.getenv("FACILITATOR_ADDRESS")
-    
+    facilitator_private_key: Optional[str]
+    facilitator_address: Optional[str]
+
     # SELLER (Asset Provider)
     # - Provides YPS tokens
     # - Receives MockUSDC settlement
-    SELLER_PRIVATE_KEY = os.getenv("SELLER_PRIVATE_KEY")
-    SELLER_ADDRESS = os.getenv("SELLER_ADDRESS")
-    
+    seller_private_key: Optional[str]
+    seller_address: Optional[str]
+
     # CLIENT (Buyer)
     # - Buys assets
     # - Pays with MockEURC
     # - Receives YPS tokens
-    CLIENT_PRIVATE_KEY = os.getenv("CLIENT_PRIVATE_KEY")
-    CLIENT_ADDRESS = os.getenv("CLIENT_ADDRESS")
-    
+    client_private_key: Optional[str]
+    client_address: Optional[str]
+
     # Server Settings
-    SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
-    SERVER_PORT = int(os.getenv("SERVER_PORT", "5000"))
-    
+    server_host: str
+    server_port: int
+
     # Asset Pricing (in MockUSDC, 6 decimals)
-    ASSET_PRICE_USDC = int(os.getenv("ASSET_PRICE_USDC", str(100 * 10**6)))  # 100 USDC per YPS token
-    
+    asset_price_usdc: int
+
     # EUR/USD Exchange Rate API (optional, for client)
-    EUR_USD_RATE_API = os.getenv("EUR_USD_RATE_API", "")
-    DEFAULT_EUR_USD_RATE = float(os.getenv("DEFAULT_EUR_USD_RATE", "1.05"))  # 1 EUR = 1.05 USD
-    
+    eur_usd_rate_api: str
+    default_eur_usd_rate: float
+    eur_usd_rate_micro: int  # Fixed-point rate (6 decimals)
+
+    # Verbose output (pretty-printed payloads) and server log level
+    debug: bool
+    log_level: str
+
     # Payment deadline (in seconds)
-    PAYMENT_DEADLINE_SECONDS = int(os.getenv("PAYMENT_DEADLINE_SECONDS", "3600"))  # 1 hour
-    
+    payment_deadline_seconds: int
+
+
+@functools.lru_cache(maxsize=1)
+def get_config() -> Settings:
+    """Load .env and read the environment once per process"""
+    load_dotenv(override=False)
+
+    default_eur_usd_rate = float(os.getenv("DEFAULT_EUR_USD_RATE", "1.05"))  # 1 EUR = 1.05 USD
+
+    return Settings(
+        rpc_url=os.getenv("RPC_URL", "https://rpc-amoy.polygon.technology"),
+        rpc_ws_url=os.getenv("RPC_WS_URL", ""),
+        rpc_cache_ttl=float(os.getenv("RPC_CACHE_TTL", "2")),
+        chain_id=int(os.getenv("CHAIN_ID", "80002")),  # Polygon Amoy
+        mock_eurc_address=os.getenv("MOCK_EURC_ADDRESS_POLYGON"),
+        mock_usdc_address=os.getenv("MOCK_USDC_ADDRESS_POLYGON"),
+        yps_address=os.getenv("YPS_ADDRESS"),
+        swap_simulator_address=os.getenv("SWAP_SIMULATOR_ADDRESS"),
+        settlement_vault_address=os.getenv("SETTLEMENT_VAULT_ADDRESS"),
+        facilitator_private_key=os.getenv("FACILITATOR_PRIVATE_KEY"),
+        facilitator_address=os.getenv("FACILITATOR_ADDRESS"),
+        seller_private_key=os.getenv("SELLER_PRIVATE_KEY"),
+        seller_address=os.getenv("SELLER_ADDRESS"),
+        client_private_key=os.getenv("CLIENT_PRIVATE_KEY"),
+        client_address=os.getenv("CLIENT_ADDRESS"),
+        server_host=os.getenv("SERVER_HOST", "127.0.0.1"),
+        server_port=int(os.getenv("SERVER_PORT", "5000")),
+        asset_price_usdc=int(os.getenv("ASSET_PRICE_USDC", str(100 * 10**6))),  # 100 USDC per YPS token
+        eur_usd_rate_api=os.getenv("EUR_USD_RATE_API", ""),
+        default_eur_usd_rate=default_eur_usd_rate,
+        eur_usd_rate_micro=round(default_eur_usd_rate * 1_000_000),
+        debug=os.getenv("X402_DEBUG", "") not in ("", "0"),
+        log_level=os.getenv("LOG_LEVEL", "WARNING"),
+        payment_deadline_seconds=int(os.getenv("PAYMENT_DEADLINE_SECONDS", "3600")),  # 1 hour
+    )
+
+
+class _ConfigProxy(type):
+    """Resolve Config.UPPER_CASE attributes against the cached Settings"""
+
+    def __getattr__(cls, name):
+        try:
+            return getattr(get_config(), name.lower())
+        except AttributeError:
+            raise AttributeError(f"type object 'Config' has no attribute '{name}'") from None
+
+
+class Config(metaclass=_ConfigProxy):
+    """Configuration class for the x402 OTC API system (proxy over get_config())"""
+
+    # Fields each role needs, resolved once at class-definition time
+    _COMMON_REQUIRED = frozenset({
+        "MOCK_EURC_ADDRESS",
+        "MOCK_USDC_ADDRESS",
+        "YPS_ADDRESS",
+        "SWAP_SIMULATOR_ADDRESS",
+        "SETTLEMENT_VAULT_ADDRESS",
+    })
+    _REQUIRED_BY_ROLE = {
+        "facilitator": _COMMON_REQUIRED | {"FACILITATOR_PRIVATE_KEY", "FACILITATOR_ADDRESS"},
+        "seller": _COMMON_REQUIRED | {"SELLER_ADDRESS"},
+        "client": _COMMON_REQUIRED | {"CLIENT_PRIVATE_KEY", "CLIENT_ADDRESS"},
+    }
+    _REQUIRED_BY_ROLE["all"] = frozenset().union(*_REQUIRED_BY_ROLE.values())
+
+    # Roles that already passed validation in this process
+    _validated = set()
+
     @classmethod
     def validate(cls, role: str = "all"):
         """
         Validate that all required configuration is present
-        
+
         Args:
             role: Which role to validate for ("facilitator", "client", "seller", or "all")
         """
-        # Common required fields
-        required = [
-            "MOCK_EURC_ADDRESS",
-            "MOCK_USDC_ADDRESS",
-            "YPS_ADDRESS",
-            "SWAP_SIMULATOR_ADDRESS",
-            "SETTLEMENT_VAULT_ADDRESS"
-        ]
-        
-        # Role-specific requirements
-        if role in ["facilitator", "all"]:
-            required.extend(["FACILITATOR_PRIVATE_KEY", "FACILITATOR_ADDRESS"])
-        
-        if role in ["seller", "all"]:
-            required.extend(["SELLER_ADDRESS"])
-        
-        if role in ["client", "all"]:
-            required.extend(["CLIENT_PRIVATE_KEY", "CLIENT_ADDRESS"])
-        
-        missing = []
-        for field in required:
-            if not getattr(cls, field):
-                missing.append(field)
-        
+        if role in cls._validated:
+            return True
+
+        # Unknown roles only need the common fields
+        required = cls._REQUIRED_BY_ROLE.get(role, cls._COMMON_REQUIRED)
+        missing = sorted(field for field in required if not getattr(cls, field))
+
         if missing:
             raise ValueError(f"Missing required configuration: {', '.join(missing)}")
-        
-        return True
 
+        cls._validated.add(role)
+        return True
@@ -1,287 +1,86 @@
 """Contract ABIs and helper functions"""
-import json
+import os
+from typing import Dict, List, Tuple, Type
+import orjson
 from web3 import Web3
 from web3.contract import Contract
 
-# Minimal ABIs for our contracts
+# Minimal ABIs for our contracts, stored as JSON so import is a single orjson parse
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "abis.json"), "rb") as _f:
+    _ABIS = orjson.loads(_f.read())
 
-ERC20_PERMIT_ABI = [
-    {
-        "inputs": [
-            {"internalType": "address", "name": "owner", "type": "address"},
-            {"internalType": "address", "name": "spender", "type": "address"}
-        ],
-        "name": "allowance",
-        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
-        "stateMutability": "view",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "address", "name": "account", "type": "address"}
-        ],
-        "name": "balanceOf",
-        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
-        "stateMutability": "view",
-        "type": "function"
-    },
-    {
-        "inputs": [],
-        "name": "decimals",
-        "outputs": [{"internalType": "uint8", "name": "", "type": "uint8"}],
-        "stateMutability": "view",
-        "type": "function"
-    },
-    {
-        "inputs": [],
-        "name": "name",
-        "outputs": [{"internalType": "string", "name": "", "type": "string"}],
-        "stateMutability": "view",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "address", "name": "owner", "type": "address"}
-        ],
-        "name": "nonces",
-        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
-        "stateMutability": "view",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "address", "name": "owner", "type": "address"},
-            {"internalType": "address", "name": "spender", "type": "address"},
-            {"internalType": "uint256", "name": "value", "type": "uint256"},
-            {"internalType": "uint256", "name": "deadline", "type": "uint256"},
-            {"internalType": "uint8", "name": "v", "type": "uint8"},
-            {"internalType": "bytes32", "name": "r", "type": "bytes32"},
-            {"internalType": "bytes32", "name": "s", "type": "bytes32"}
-        ],
-        "name": "permit",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "address", "name": "to", "type": "address"},
-            {"internalType": "uint256", "name": "amount", "type": "uint256"}
-        ],
-        "name": "transfer",
-        "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    }
-]
+ERC20_PERMIT_ABI = _ABIS["erc20_permit"]
+SETTLEMENT_VAULT_ABI = _ABIS["settlement_vault"]
+SWAP_SIMULATOR_ABI = _ABIS["swap_simulator"]
+MULTICALL3_ABI = _ABIS["multicall3"]
 
-SETTLEMENT_VAULT_ABI = [
-    {
-        "inputs": [
-            {"internalType": "bytes32", "name": "orderId", "type": "bytes32"},
-            {"internalType": "address", "name": "client", "type": "address"},
-            {"internalType": "address", "name": "seller", "type": "address"},
-            {"internalType": "address", "name": "assetToken", "type": "address"},
-            {"internalType": "uint256", "name": "assetAmount", "type": "uint256"},
-            {"internalType": "address", "name": "settlementToken", "type": "address"},
-            {"internalType": "uint256", "name": "settlementAmount", "type": "uint256"},
-            {"internalType": "uint256", "name": "deadline", "type": "uint256"}
-        ],
-        "name": "createPaymentRequest",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "bytes32", "name": "orderId", "type": "bytes32"},
-            {"internalType": "address", "name": "paymentToken", "type": "address"},
-            {"internalType": "uint256", "name": "amount", "type": "uint256"},
-            {"internalType": "uint256", "name": "deadline", "type": "uint256"},
-            {"internalType": "uint8", "name": "v", "type": "uint8"},
-            {"internalType": "bytes32", "name": "r", "type": "bytes32"},
-            {"internalType": "bytes32", "name": "s", "type": "bytes32"}
-        ],
-        "name": "pullPaymentWithPermit",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "bytes32", "name": "orderId", "type": "bytes32"},
-            {"internalType": "uint256", "name": "amountOut", "type": "uint256"}
-        ],
-        "name": "completeSwapAndSettle",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "bytes32", "name": "orderId", "type": "bytes32"}
-        ],
-        "name": "releaseAsset",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "bytes32", "name": "orderId", "type": "bytes32"}
-        ],
-        "name": "getOrder",
-        "outputs": [{
-            "components": [
-                {"internalType": "address", "name": "client", "type": "address"},
-                {"internalType": "address", "name": "seller", "type": "address"},
-                {"internalType": "address", "name": "assetToken", "type": "address"},
-                {"internalType": "uint256", "name": "assetAmount", "type": "uint256"},
-                {"internalType": "address", "name": "settlementToken", "type": "address"},
-                {"internalType": "uint256", "name": "settlementAmount", "type": "uint256"},
-                {"internalType": "address", "name": "paymentToken", "type": "address"},
-                {"internalType": "uint256", "name": "maxPayment", "type": "uint256"},
-                {"internalType": "uint256", "name": "deadline", "type": "uint256"},
-                {"internalType": "uint8", "name": "status", "type": "uint8"},
-                {"internalType": "uint256", "name": "actualPayment", "type": "uint256"},
-                {"internalType": "uint256", "name": "refundAmount", "type": "uint256"}
-            ],
-            "internalType": "struct SettlementVault.Order",
-            "name": "",
-            "type": "tuple"
-        }],
-        "stateMutability": "view",
-        "type": "function"
-    },
-    {
-        "anonymous": False,
-        "inputs": [
-            {"indexed": True, "internalType": "bytes32", "name": "orderId", "type": "bytes32"},
-            {"indexed": True, "internalType": "address", "name": "client", "type": "address"},
-            {"indexed": False, "internalType": "address", "name": "paymentToken", "type": "address"},
-            {"indexed": False, "internalType": "uint256", "name": "requiredAmount", "type": "uint256"},
-            {"indexed": False, "internalType": "uint256", "name": "deadline", "type": "uint256"}
-        ],
-        "name": "PaymentRequested",
-        "type": "event"
-    },
-    {
-        "anonymous": False,
-        "inputs": [
-            {"indexed": True, "internalType": "bytes32", "name": "orderId", "type": "bytes32"},
-            {"indexed": True, "internalType": "address", "name": "client", "type": "address"},
-            {"indexed": False, "internalType": "address", "name": "token", "type": "address"},
-            {"indexed": False, "internalType": "uint256", "name": "amount", "type": "uint256"}
-        ],
-        "name": "PermitConsumed",
-        "type": "event"
-    },
-    {
-        "anonymous": False,
-        "inputs": [
-            {"indexed": True, "internalType": "bytes32", "name": "orderId", "type": "bytes32"},
-            {"indexed": True, "internalType": "address", "name": "client", "type": "address"},
-            {"indexed": False, "internalType": "address", "name": "token", "type": "address"},
-            {"indexed": False, "internalType": "uint256", "name": "amount", "type": "uint256"}
-        ],
-        "name": "FundsPulled",
-        "type": "event"
-    },
-    {
-        "anonymous": False,
-        "inputs": [
-            {"indexed": True, "internalType": "bytes32", "name": "orderId", "type": "bytes32"},
-            {"indexed": False, "internalType": "uint256", "name": "amountIn", "type": "uint256"},
-            {"indexed": False, "internalType": "uint256", "name": "amountOut", "type": "uint256"},
-            {"indexed": False, "internalType": "uint256", "name": "surplus", "type": "uint256"}
-        ],
-        "name": "SwapCompleted",
-        "type": "event"
-    },
-    {
-        "anonymous": False,
-        "inputs": [
-            {"indexed": True, "internalType": "bytes32", "name": "orderId", "type": "bytes32"},
-            {"indexed": False, "internalType": "address", "name": "token", "type": "address"},
-            {"indexed": False, "internalType": "uint256", "name": "amount", "type": "uint256"}
-        ],
-        "name": "VaultFunded",
-        "type": "event"
-    },
-    {
-        "anonymous": False,
-        "inputs": [
-            {"indexed": True, "internalType": "bytes32", "name": "orderId", "type": "bytes32"},
-            {"indexed": True, "internalType": "address", "name": "client", "type": "address"},
-            {"indexed": False, "internalType": "address", "name": "asset", "type": "address"},
-            {"indexed": False, "internalType": "uint256", "name": "amount", "type": "uint256"}
-        ],
-        "name": "AssetReleased",
-        "type": "event"
-    },
-    {
-        "anonymous": False,
-        "inputs": [
-            {"indexed": True, "internalType": "bytes32", "name": "orderId", "type": "bytes32"},
-            {"indexed": True, "internalType": "address", "name": "client", "type": "address"},
-            {"indexed": False, "internalType": "address", "name": "token", "type": "address"},
-            {"indexed": False, "internalType": "uint256", "name": "amount", "type": "uint256"}
-        ],
-        "name": "RefundSent",
-        "type": "event"
-    }
-]
 
-SWAP_SIMULATOR_ABI = [
-    {
-        "inputs": [
-            {"internalType": "bytes32", "name": "swapId", "type": "bytes32"},
-            {"internalType": "address", "name": "tokenIn", "type": "address"},
-            {"internalType": "address", "name": "tokenOut", "type": "address"},
-            {"internalType": "uint256", "name": "amountIn", "type": "uint256"}
-        ],
-        "name": "instantSwap",
-        "outputs": [{"internalType": "uint256", "name": "amountOut", "type": "uint256"}],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "address", "name": "tokenIn", "type": "address"},
-            {"internalType": "address", "name": "tokenOut", "type": "address"},
-            {"internalType": "uint256", "name": "amountIn", "type": "uint256"}
-        ],
-        "name": "calculateOutput",
-        "outputs": [{"internalType": "uint256", "name": "amountOut", "type": "uint256"}],
-        "stateMutability": "view",
-        "type": "function"
-    },
-    {
-        "inputs": [
-            {"internalType": "bytes32", "name": "swapId", "type": "bytes32"}
-        ],
-        "name": "getSwap",
-        "outputs": [{
-            "components": [
-                {"internalType": "address", "name": "initiator", "type": "address"},
-                {"internalType": "address", "name": "tokenIn", "type": "address"},
-                {"internalType": "address", "name": "tokenOut", "type": "address"},
-                {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
-                {"internalType": "uint256", "name": "amountOut", "type": "uint256"},
-                {"internalType": "bool", "name": "fulfilled", "type": "bool"},
-                {"internalType": "uint256", "name": "timestamp", "type": "uint256"}
-            ],
-            "internalType": "struct SwapSimulator.Swap",
-            "name": "",
-            "type": "tuple"
-        }],
-        "stateMutability": "view",
-        "type": "function"
+def canonical_type(param: dict) -> str:
+    """Canonical ABI type of a parameter, expanding tuples to (t1,t2,...)"""
+    abi_type = param["type"]
+    if abi_type.startswith("tuple"):
+        inner = ",".join(canonical_type(component) for component in param["components"])
+        return f"({inner}){abi_type[len('tuple'):]}"
+    return abi_type
+
+
+def canonical_signature(entry: dict) -> str:
+    """Canonical signature of a function or event ABI entry, e.g. transfer(address,uint256)"""
+    return f"{entry['name']}({','.join(canonical_type(param) for param in entry['inputs'])})"
+
+
+def index_functions(abi: list) -> Dict[str, Tuple[bytes, List[str]]]:
+    """Map function name -> (4-byte selector, input types); overloads would collide"""
+    functions = {}
+    for entry in abi:
+        if entry.get("type") == "function":
+            signature = canonical_signature(entry)
+            input_types = [canonical_type(param) for param in entry["inputs"]]
+            functions[entry["name"]] = (bytes(Web3.keccak(text=signature)[:4]), input_types)
+    return functions
+
+
+def index_events(abi: list) -> Dict[str, bytes]:
+    """Map event name -> topic0 (keccak of the canonical signature)"""
+    return {
+        entry["name"]: bytes(Web3.keccak(text=canonical_signature(entry)))
+        for entry in abi
+        if entry.get("type") == "event"
     }
-]
 
 
-def get_contract(w3: Web3, address: str, abi: list) -> Contract:
-    """Get a contract instance"""
-    return w3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+# Selectors hashed once at import rather than inside web3 on every call
+ERC20_PERMIT_FUNCTIONS = index_functions(ERC20_PERMIT_ABI)
+SETTLEMENT_VAULT_FUNCTIONS = index_functions(SETTLEMENT_VAULT_ABI)
+SWAP_SIMULATOR_FUNCTIONS = index_functions(SWAP_SIMULATOR_ABI)
+SETTLEMENT_VAULT_EVENTS = index_events(SETTLEMENT_VAULT_ABI)
 
+# Multicall3 is deployed at the same address on Polygon Amoy and most other chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+
+# Contract factories keyed by (id(w3), id(abi)); building one walks the whole ABI
+_FACTORY_CACHE = {}
+
+# Contract instances keyed by (id(w3), address, id(abi)); the ABIs above are module-level singletons
+_CONTRACT_CACHE = {}
+
+
+def get_contract_factory(w3: Web3, abi: list) -> Type[Contract]:
+    """Get a contract class for an ABI (built once per Web3 instance and ABI)"""
+    key = (id(w3), id(abi))
+    factory = _FACTORY_CACHE.get(key)
+    if factory is None:
+        factory = w3.eth.contract(abi=abi)
+        _FACTORY_CACHE[key] = factory
+    return factory
+
+
+def get_contract(w3: Web3, address: str, abi: list) -> Contract:
+    """Get a contract instance (cached per Web3 instance, address and ABI)"""
+    key = (id(w3), address, id(abi))
+    contract = _CONTRACT_CACHE.get(key)
+    if contract is None:
+        contract = get_contract_factory(w3, abi)(address=Web3.to_checksum_address(address))
+        _CONTRACT_CACHE[key] = contract
+    return contract
@@ -0,0 +1,48 @@
+"""newHeads subscription that lets worker threads sleep until the next block"""
+import asyncio
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+
+class NewHeadsWatcher:
+    """
+    Runs a WebSocket `newHeads` subscription on a background thread and wakes
+    waiting threads on every new block, so receipt checks happen once per block
+    instead of on a fixed polling interval.
+    """
+
+    def __init__(self, ws_url: str):
+        self.ws_url = ws_url
+        self.block_number = 0
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="new-heads", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.run(self._subscribe())
+
+    async def _subscribe(self):
+        from web3 import AsyncWeb3, WebsocketProviderV2
+
+        while True:
+            try:
+                async with AsyncWeb3.persistent_websocket(WebsocketProviderV2(self.ws_url)) as w3:
+                    await w3.eth.subscribe("newHeads")
+                    async for message in w3.ws.process_subscriptions():
+                        number = message["result"]["number"]
+                        if isinstance(number, str):
+                            number = int(number, 16)
+                        with self._condition:
+                            self.block_number = number
+                            self._condition.notify_all()
+            except Exception as e:
+                log.warning("newHeads subscription dropped (%s), reconnecting...", e)
+                await asyncio.sleep(1)
+
+    def wait_for_block(self, after: int, timeout: float) -> int:
+        """Block until a head newer than `after` arrives (or timeout); returns the latest head"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.block_number > after, timeout)
+            return self.block_number
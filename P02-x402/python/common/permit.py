@@ -0,0 +1,51 @@
+"""EIP-2612 permit hashing shared by the client (signing) and server (verification)"""
+from eth_utils import keccak
+
+# keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)")
+EIP712_DOMAIN_TYPEHASH = bytes.fromhex("8b73c3c69bb8fe3d512ecc4cf759cc79239f7b179b0ffacaa9a75d522b39400f")
+# keccak256("Permit(address owner,address spender,uint256 value,uint256 nonce,uint256 deadline)")
+PERMIT_TYPEHASH = bytes.fromhex("6e71edae12b1b97f4d1f60370fef10105fa2faae0126114a169c64845d6126c9")
+
+
+def _address_word(address: str) -> bytes:
+    """ABI-encode an address as a left-padded 32-byte word"""
+    return bytes.fromhex(address[2:]).rjust(32, b"\x00")
+
+
+def _uint_word(value: int) -> bytes:
+    """ABI-encode a uint256 as a 32-byte big-endian word"""
+    return value.to_bytes(32, "big")
+
+
+def domain_separator(token_name: str, chain_id: int, token_address: str, version: str = "1") -> bytes:
+    """EIP-712 domain separator of a permit token (constant per token; callers cache it)"""
+    return keccak(
+        EIP712_DOMAIN_TYPEHASH
+        + keccak(text=token_name)
+        + keccak(text=version)
+        + _uint_word(chain_id)
+        + _address_word(token_address)
+    )
+
+
+def permit_digest(
+    separator: bytes,
+    owner: str,
+    spender: str,
+    value: int,
+    nonce: int,
+    deadline: int
+) -> bytes:
+    """
+    EIP-712 digest of a permit: keccak256("\\x19\\x01" || domainSeparator || hashStruct(permit)).
+    Every permit field is a static 32-byte word, so the struct is concatenated directly.
+    """
+    struct_hash = keccak(
+        PERMIT_TYPEHASH
+        + _address_word(owner)
+        + _address_word(spender)
+        + _uint_word(value)
+        + _uint_word(nonce)
+        + _uint_word(deadline)
+    )
+    return keccak(b"\x19\x01" + separator + struct_hash)
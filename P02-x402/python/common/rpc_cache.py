@@ -0,0 +1,58 @@
+"""Web3 middleware that memoizes read-only RPC calls"""
+import threading
+import time
+from collections import OrderedDict
+
+# Responses that never change for a given endpoint
+PERMANENT_METHODS = frozenset({"eth_chainId", "net_version"})
+
+# Contract code rarely changes, but can on a redeploy or a reset dev chain
+# (and an empty result before deployment must not stick), so it gets a long TTL
+CODE_METHODS = frozenset({"eth_getCode"})
+
+# View calls, cached for a short TTL so state reads stay roughly one block fresh.
+# Calls made against the "pending" block are never cached, so callers that need
+# the current value (e.g. permit nonces) pass block_identifier='pending'.
+TTL_METHODS = frozenset({"eth_call"})
+
+
+def construct_rpc_cache_middleware(ttl: float = 2.0, code_ttl: float = 300.0, maxsize: int = 1024):
+    """
+    Build a middleware caching PERMANENT_METHODS forever, CODE_METHODS for
+    `code_ttl` seconds and TTL_METHODS for `ttl` seconds. Everything else
+    (sends, nonces, receipts) goes straight through.
+    """
+    cache = OrderedDict()
+    lock = threading.Lock()
+
+    def rpc_cache_middleware(make_request, w3):
+        def middleware(method, params):
+            if method not in PERMANENT_METHODS and method not in CODE_METHODS and method not in TTL_METHODS:
+                return make_request(method, params)
+            if method in TTL_METHODS and params and params[-1] == "pending":
+                return make_request(method, params)
+
+            key = (method, repr(params))
+            now = time.monotonic()
+            with lock:
+                entry = cache.get(key)
+                if entry is not None and (entry[0] is None or entry[0] > now):
+                    cache.move_to_end(key)
+                    return entry[1]
+
+            response = make_request(method, params)
+            if "error" not in response:
+                if method in PERMANENT_METHODS:
+                    expires = None
+                else:
+                    expires = now + (code_ttl if method in CODE_METHODS else ttl)
+                with lock:
+                    cache[key] = (expires, response)
+                    cache.move_to_end(key)
+                    if len(cache) > maxsize:
+                        cache.popitem(last=False)
+            return response
+
+        return middleware
+
+    return rpc_cache_middleware
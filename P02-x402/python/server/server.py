@@ -4,40 +4,124 @@ Implements HTTP 402 payment flow with EIP-2612 gasless approvals
 """
 import os
 import sys
+import base64
+import functools
 import json
-import uuid
+import logging
+import threading
 import time
-from flask import Flask, request, jsonify, Response
+import msgpack
+import orjson
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Optional
+from flask import Flask, request, Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from eth_abi import encode as abi_encode
+from hexbytes import HexBytes
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
 from eth_account import Account
-from eth_account.messages import encode_typed_data
+from eth_keys import keys
+from eth_keys.exceptions import BadSignature, ValidationError
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from common.config import Config
+from common.config import Config, DATACLASS_SLOTS
 from common.contracts import (
     get_contract,
     ERC20_PERMIT_ABI,
     SETTLEMENT_VAULT_ABI,
-    SWAP_SIMULATOR_ABI
+    SWAP_SIMULATOR_ABI,
+    SETTLEMENT_VAULT_FUNCTIONS,
+    SWAP_SIMULATOR_FUNCTIONS
 )
+from common.new_heads import NewHeadsWatcher
+from common.permit import domain_separator, permit_digest
+from common.rpc_cache import construct_rpc_cache_middleware
+
+# Per-order logging is DEBUG, so it costs nothing unless LOG_LEVEL=DEBUG.
+# Config loads .env first, so LOG_LEVEL may be set there too.
+logging.basicConfig(
+    handlers=[logging.StreamHandler()],
+    level=Config.LOG_LEVEL,
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+log = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(Config.RPC_URL))
+class PooledHTTPProvider(Web3.HTTPProvider):
+    """
+    HTTPProvider whose requests all go through one HTTPAdapter. web3 keeps a
+    requests.Session per thread and would hand worker threads a plain session,
+    so each thread gets its own session here with the shared adapter mounted.
+    """
+    
+    def __init__(self, endpoint_uri: str, adapter: HTTPAdapter, **kwargs):
+        super().__init__(endpoint_uri, **kwargs)
+        self._adapter = adapter
+        self._sessions = threading.local()
+    
+    def _session(self) -> requests.Session:
+        session = getattr(self._sessions, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', self._adapter)
+            session.mount('http://', self._adapter)
+            self._sessions.session = session
+        return session
+    
+    def make_request(self, method, params):
+        response = self._session().post(
+            self.endpoint_uri,
+            data=self.encode_rpc_request(method, params),
+            **self.get_request_kwargs()
+        )
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+
+# Initialize Web3 over a keep-alive pool sized for the worker threads.
+# Retries cover connection failures only (urllib3 doesn't retry POST reads).
+rpc_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.1)
+)
+w3 = Web3(PooledHTTPProvider(Config.RPC_URL, rpc_adapter, request_kwargs={'timeout': 30}))
+w3.middleware_onion.add(construct_rpc_cache_middleware(Config.RPC_CACHE_TTL), name='rpc_cache')
+
+# Fail fast on missing configuration (also under gunicorn, where __main__ doesn't run)
+try:
+    Config.validate(role="facilitator")
+except ValueError as e:
+    log.error("Configuration error: %s", e)
+    sys.exit(1)
 
-# Facilitator account (runs the server)
+# Facilitator account (runs the server). The parsed key is kept on the account,
+# and with coincurve installed eth-keys signs through libsecp256k1.
 facilitator_account = Account.from_key(Config.FACILITATOR_PRIVATE_KEY)
 
-print(f"=== x402 OTC API Server - Role Configuration ===")
-print(f"Facilitator (Server): {Config.FACILITATOR_ADDRESS}")
-print(f"Seller (Asset Provider): {Config.SELLER_ADDRESS}")
-print(f"Chain ID: {Config.CHAIN_ID}")
-print(f"RPC URL: {Config.RPC_URL}")
-print()
+log.info("Facilitator (Server): %s", Config.FACILITATOR_ADDRESS)
+log.info("Seller (Asset Provider): %s", Config.SELLER_ADDRESS)
+log.info("Chain ID: %s, RPC URL: %s", Config.CHAIN_ID, Config.RPC_URL)
+
+# Fixed addresses, checksummed once instead of per request
+SELLER_CS = Web3.to_checksum_address(Config.SELLER_ADDRESS)
+YPS_CS = Web3.to_checksum_address(Config.YPS_ADDRESS)
+MOCK_USDC_CS = Web3.to_checksum_address(Config.MOCK_USDC_ADDRESS)
+MOCK_EURC_CS = Web3.to_checksum_address(Config.MOCK_EURC_ADDRESS)
+VAULT_CS = Web3.to_checksum_address(Config.SETTLEMENT_VAULT_ADDRESS)
+SIMULATOR_CS = Web3.to_checksum_address(Config.SWAP_SIMULATOR_ADDRESS)
+
+# Client addresses come from requests; repeat buyers hit the cache
+checksum_address = functools.lru_cache(maxsize=4096)(Web3.to_checksum_address)
 
 # Load contracts
 vault_contract = get_contract(w3, Config.SETTLEMENT_VAULT_ADDRESS, SETTLEMENT_VAULT_ABI)
@@ -46,69 +130,318 @@ mock_eurc = get_contract(w3, Config.MOCK_EURC_ADDRESS, ERC20_PERMIT_ABI)
 mock_usdc = get_contract(w3, Config.MOCK_USDC_ADDRESS, ERC20_PERMIT_ABI)
 yps_token = get_contract(w3, Config.YPS_ADDRESS, ERC20_PERMIT_ABI)
 
-# In-memory order tracking
+@dataclass(**DATACLASS_SLOTS)
+class Order:
+    """An order tracked by the server; hashes are kept as raw bytes until serialized"""
+    order_id: str
+    order_id_bytes: bytes
+    client: str
+    asset_amount: int
+    required_usdc: int
+    deadline: int
+    status: str
+    tx_hash: bytes
+    payment_tx: Optional[bytes] = None
+    swap_tx: Optional[bytes] = None
+    settle_tx: Optional[bytes] = None
+    release_tx: Optional[bytes] = None
+    
+    def to_json(self) -> dict:
+        """Order as a JSON-ready dict with hashes hex-encoded"""
+        return {
+            key: Web3.to_hex(value) if isinstance(value, bytes) else value
+            for key, value in asdict(self).items()
+            if value is not None
+        }
+
+
+@dataclass(**DATACLASS_SLOTS)
+class OrderTransactions:
+    """Hex hashes of the four transactions that complete an order"""
+    payment: str
+    swap: str
+    settle: str
+    release: str
+
+
+@dataclass(**DATACLASS_SLOTS)
+class SuccessResponse:
+    """Body of a completed purchase; orjson serializes it (and the nested dataclass) natively"""
+    order_id: str
+    asset_amount: str
+    asset_token: str
+    payment_amount: str
+    settlement_amount: str
+    transactions: OrderTransactions
+    vault_balances: dict
+    status: str = "success"
+
+
+# In-memory order tracking, keyed by the 32-byte on-chain order ID
 orders = {}
 
 
-def generate_order_id() -> str:
-    """Generate unique order ID"""
-    return str(uuid.uuid4())
+def ojsonify(obj, status: int = 200) -> Response:
+    """
+    JSON response serialized with orjson (drop-in for jsonify on this API's payloads).
+    orjson rejects integers wider than 64 bits (e.g. 18-decimal asset amounts), so
+    those payloads fall back to the stdlib encoder.
+    """
+    try:
+        body = orjson.dumps(obj)
+    except orjson.JSONEncodeError:
+        body = json.dumps(asdict(obj) if is_dataclass(obj) else obj)
+    return Response(body, status=status, mimetype='application/json')
+
+
+class NonceManager:
+    """
+    Hands out facilitator nonces from a local counter so concurrent orders
+    (worker threads) never reuse a nonce. The counter is seeded from the
+    pending transaction count and re-seeded after any failure between
+    reserving nonces and sending them (see reserved()).
+    """
+    
+    def __init__(self, address: str):
+        self.address = address
+        self._next = None
+        self._lock = threading.Lock()
+    
+    def reserve(self, count: int = 1) -> int:
+        """Reserve `count` consecutive nonces, returning the first"""
+        with self._lock:
+            if self._next is None:
+                self._next = w3.eth.get_transaction_count(self.address, 'pending')
+            nonce = self._next
+            self._next += count
+            return nonce
+    
+    def reset(self):
+        """Forget the local counter; the next reservation re-reads the chain"""
+        with self._lock:
+            self._next = None
+    
+    @contextmanager
+    def reserved(self, count: int = 1):
+        """
+        Reserve `count` nonces for the sends in the block. If the block raises,
+        some reserved nonce may never reach the chain, so the counter is reset.
+        """
+        nonce = self.reserve(count)
+        try:
+            yield nonce
+        except Exception:
+            self.reset()
+            raise
+
+
+nonce_manager = NonceManager(facilitator_account.address)
+
+
+# Seconds a fetched gas price is reused (about one Amoy block)
+GAS_PRICE_TTL = 2.0
+_gas_price_cache = (0, 0.0)  # (gas price, monotonic fetch time)
+_gas_price_lock = threading.Lock()
+
+
+def cached_gas_price() -> int:
+    """Current gas price, fetched at most once per GAS_PRICE_TTL across all orders"""
+    global _gas_price_cache
+    gas_price, fetched_at = _gas_price_cache
+    now = time.monotonic()
+    if now - fetched_at < GAS_PRICE_TTL:
+        return gas_price
+    with _gas_price_lock:
+        gas_price, fetched_at = _gas_price_cache
+        if now - fetched_at >= GAS_PRICE_TTL:
+            gas_price = w3.eth.gas_price
+            _gas_price_cache = (gas_price, time.monotonic())
+        return gas_price
+
+
+# Functions the facilitator calls, encoded from selectors precomputed in common.contracts
+WRITE_FUNCTIONS = {**SETTLEMENT_VAULT_FUNCTIONS, **SWAP_SIMULATOR_FUNCTIONS}
+
+
+def encode_call(name: str, *args) -> bytes:
+    """Calldata for a vault/simulator function: selector + ABI-encoded arguments"""
+    selector, arg_types = WRITE_FUNCTIONS[name]
+    return selector + abi_encode(arg_types, args)
+
+
+# Fixed fields of each facilitator transaction; only data/nonce/gasPrice vary per order
+TX_TEMPLATES = {
+    name: {'to': to, 'gas': gas, 'chainId': Config.CHAIN_ID}
+    for name, to, gas in (
+        ('createPaymentRequest', VAULT_CS, 500000),
+        ('pullPaymentWithPermit', VAULT_CS, 500000),
+        ('instantSwap', SIMULATOR_CS, 300000),
+        ('completeSwapAndSettle', VAULT_CS, 300000),
+        ('releaseAsset', VAULT_CS, 300000),
+    )
+}
+
+
+def send_transaction(name: str, data: bytes, nonce: int, gas_price: int):
+    """Sign and submit a call from the facilitator without waiting for it"""
+    tx = TX_TEMPLATES[name].copy()
+    tx['data'] = data
+    tx['nonce'] = nonce
+    tx['gasPrice'] = gas_price
+    signed_tx = facilitator_account.sign_transaction(tx)
+    return w3.eth.send_raw_transaction(signed_tx.rawTransaction)
 
 
-def create_x402_response(order_id: str, client_address: str, asset_amount: int) -> Response:
+# With a WebSocket endpoint, receipts are checked once per new block instead of polled
+new_heads = NewHeadsWatcher(Config.RPC_WS_URL) if Config.RPC_WS_URL else None
+
+# Seconds to wait for a transaction to be mined
+RECEIPT_TIMEOUT = 120
+
+
+def _wait_on_new_heads(tx_hashes) -> list:
+    """Check pending receipts on every newHeads notification until all are mined"""
+    receipts = {}
+    timeout_at = time.monotonic() + RECEIPT_TIMEOUT
+    block_number = new_heads.block_number
+    while True:
+        for tx_hash in tx_hashes:
+            if tx_hash not in receipts:
+                try:
+                    receipts[tx_hash] = w3.eth.get_transaction_receipt(tx_hash)
+                except TransactionNotFound:
+                    pass
+        if len(receipts) == len(tx_hashes):
+            return [receipts[tx_hash] for tx_hash in tx_hashes]
+        remaining = timeout_at - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Timed out waiting for {len(tx_hashes) - len(receipts)} transaction(s)")
+        block_number = new_heads.wait_for_block(block_number, remaining)
+
+
+def wait_for_receipts(*tx_hashes) -> list:
+    """Wait for transactions submitted together, failing on the first revert"""
+    if new_heads is not None:
+        receipts = _wait_on_new_heads(tx_hashes)
+    else:
+        receipts = [
+            w3.eth.wait_for_transaction_receipt(tx_hash, timeout=RECEIPT_TIMEOUT)
+            for tx_hash in tx_hashes
+        ]
+    for tx_hash, receipt in zip(tx_hashes, receipts):
+        if receipt['status'] == 0:
+            raise Exception(f"Transaction reverted: {tx_hash.hex()}")
+    return receipts
+
+
+# Background threads for informational reads that overlap a receipt wait
+read_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='rpc-read')
+
+
+def generate_order_id_bytes() -> bytes:
+    """Generate a random 32-byte on-chain order ID (its hex is the external order ID)"""
+    return os.urandom(32)
+
+
+def find_order(order_id: str) -> Optional[Order]:
+    """Look up an order by its external (hex) ID"""
+    try:
+        return orders.get(bytes.fromhex(order_id))
+    except ValueError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def token_domain_separator(token_address: str) -> bytes:
+    """EIP-712 domain separator of a permit token (name read once per token)"""
+    token = get_contract(w3, token_address, ERC20_PERMIT_ABI)
+    return domain_separator(token.functions.name().call(), Config.CHAIN_ID, token_address)
+
+
+def recover_permit_signer(owner: str, value: int, deadline: int, v: int, r: bytes, s: bytes) -> Optional[str]:
+    """
+    Recover the signer of a MockEURC permit to the vault locally (libsecp256k1
+    via eth-keys/coincurve), so a bad signature is rejected before it costs gas.
+    Returns None when the signature is malformed. The nonce is read against the
+    pending block, which the RPC cache never serves, so a permit consumed
+    moments ago is not checked against a stale nonce.
+    """
+    digest = permit_digest(
+        token_domain_separator(MOCK_EURC_CS),
+        owner,
+        VAULT_CS,
+        value,
+        mock_eurc.functions.nonces(owner).call(block_identifier='pending'),
+        deadline
+    )
+    try:
+        signature = keys.Signature(vrs=(v - 27 if v >= 27 else v, int.from_bytes(r, 'big'), int.from_bytes(s, 'big')))
+        return signature.recover_public_key_from_msg_hash(digest).to_checksum_address()
+    except (BadSignature, ValidationError):
+        return None
+
+
+# Content-Type marking a base64url msgpack X-PAYMENT header (r/s as raw bytes)
+MSGPACK_CONTENT_TYPE = 'application/msgpack'
+
+
+def decode_payment_header(header: str) -> dict:
+    """
+    Decode X-PAYMENT as base64url msgpack when the request says so, else as JSON.
+    Clients may strip the base64 '=' padding, so it is restored before decoding.
+    """
+    if request.mimetype == MSGPACK_CONTENT_TYPE:
+        return msgpack.unpackb(base64.urlsafe_b64decode(header + '=' * (-len(header) % 4)), raw=False)
+    return orjson.loads(header)
+
+
+def create_x402_response(order_id_bytes: bytes, client_address: str, asset_amount: int) -> Response:
     """Create HTTP 402 Payment Required response"""
     
+    order_id = order_id_bytes.hex()
+    
     # Calculate required MockUSDC amount
     required_usdc = asset_amount * Config.ASSET_PRICE_USDC // (10**18)  # YPS is 18 decimals
     
     # Calculate deadline
     deadline = int(time.time()) + Config.PAYMENT_DEADLINE_SECONDS
     
-    # Create order in contract
-    order_id_bytes = Web3.keccak(text=order_id)
-    
     try:
-        # Build transaction to create payment request
-        tx = vault_contract.functions.createPaymentRequest(
+        # Create payment request (facilitator pays gas)
+        data = encode_call(
+            'createPaymentRequest',
             order_id_bytes,
-            Web3.to_checksum_address(client_address),
-            Web3.to_checksum_address(Config.SELLER_ADDRESS),  # seller
-            Config.YPS_ADDRESS,  # asset token
+            checksum_address(client_address),
+            SELLER_CS,  # seller
+            YPS_CS,  # asset token
             asset_amount,
-            Config.MOCK_USDC_ADDRESS,  # settlement token
+            MOCK_USDC_CS,  # settlement token
             required_usdc,
             deadline
-        ).build_transaction({
-            'from': facilitator_account.address,
-            'nonce': w3.eth.get_transaction_count(facilitator_account.address),
-            'gas': 500000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Sign and send transaction (facilitator pays gas)
-        signed_tx = facilitator_account.sign_transaction(tx)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        )
+        gas_price = cached_gas_price()
+        with nonce_manager.reserved() as nonce:
+            tx_hash = send_transaction('createPaymentRequest', data, nonce, gas_price)
+        wait_for_receipts(tx_hash)
         
-        print(f"Payment request created by facilitator: {tx_hash.hex()}")
-        print(f"  Client: {client_address}")
-        print(f"  Seller: {Config.SELLER_ADDRESS}")
+        log.debug("Payment request created by facilitator: %s (client %s, seller %s)",
+                  Web3.to_hex(tx_hash), client_address, Config.SELLER_ADDRESS)
         
-    except Exception as e:
-        print(f"Error creating payment request: {e}")
-        return jsonify({"error": "Failed to create payment request"}), 500
+    except Exception:
+        log.exception("Error creating payment request")
+        return ojsonify({"error": "Failed to create payment request"}, 500)
     
     # Store order locally
-    orders[order_id] = {
-        "order_id": order_id,
-        "order_id_bytes": order_id_bytes.hex(),
-        "client": client_address,
-        "asset_amount": asset_amount,
-        "required_usdc": required_usdc,
-        "deadline": deadline,
-        "status": "requested",
-        "tx_hash": tx_hash.hex()
-    }
+    orders[order_id_bytes] = Order(
+        order_id=order_id,
+        order_id_bytes=order_id_bytes,
+        client=client_address,
+        asset_amount=asset_amount,
+        required_usdc=required_usdc,
+        deadline=deadline,
+        status="requested",
+        tx_hash=bytes(tx_hash)
+    )
     
     # Create x402 Payment Requirements object
     payment_requirements = {
@@ -128,8 +461,7 @@ def create_x402_response(order_id: str, client_address: str, asset_amount: int)
         "instructions": "Sign EIP-2612 permit for MockEURC and include in X-PAYMENT header"
     }
     
-    response = jsonify(payment_requirements)
-    response.status_code = 402
+    response = ojsonify(payment_requirements, 402)
     response.headers['X-Payment-Required'] = 'true'
     
     return response
@@ -148,38 +480,37 @@ def buy_asset():
     asset_amount_str = request.args.get('amount', '1')
     
     if not client_address:
-        return jsonify({"error": "Missing 'client' parameter"}), 400
+        return ojsonify({"error": "Missing 'client' parameter"}, 400)
     
     try:
         asset_amount = int(float(asset_amount_str) * 10**18)  # Convert to wei
     except ValueError:
-        return jsonify({"error": "Invalid 'amount' parameter"}), 400
+        return ojsonify({"error": "Invalid 'amount' parameter"}, 400)
     
     # Check if payment header is present
     payment_header = request.headers.get('X-PAYMENT')
     
     if not payment_header:
         # First request: Return 402 with payment requirements
-        order_id = generate_order_id()
-        return create_x402_response(order_id, client_address, asset_amount)
+        return create_x402_response(generate_order_id_bytes(), client_address, asset_amount)
     
     # Second request: Process payment
     try:
-        payment_data = json.loads(payment_header)
-    except json.JSONDecodeError:
-        return jsonify({"error": "Invalid X-PAYMENT header format"}), 400
+        payment_data = decode_payment_header(payment_header)
+    except (ValueError, msgpack.UnpackException):
+        return ojsonify({"error": "Invalid X-PAYMENT header format"}, 400)
     
     # Extract payment data
     order_id = payment_data.get('order_id')
     permit_signature = payment_data.get('permit_signature')
     
     if not order_id or not permit_signature:
-        return jsonify({"error": "Missing order_id or permit_signature"}), 400
+        return ojsonify({"error": "Missing order_id or permit_signature"}, 400)
     
     # Get order
-    order = orders.get(order_id)
+    order = find_order(order_id)
     if not order:
-        return jsonify({"error": "Order not found"}), 404
+        return ojsonify({"error": "Order not found"}, 404)
     
     # Extract signature components
     v = permit_signature['v']
@@ -188,156 +519,136 @@ def buy_asset():
     amount = int(permit_signature['amount'])
     deadline = permit_signature['deadline']
     
-    # Strip '0x' prefix if present and ensure proper format
-    r_clean = r[2:] if r.startswith('0x') else r
-    s_clean = s[2:] if s.startswith('0x') else s
+    # Decode r/s once; HexBytes accepts hex with or without '0x' (JSON) or raw bytes (msgpack)
+    try:
+        r_bytes = HexBytes(r)
+        s_bytes = HexBytes(s)
+    except ValueError:
+        return ojsonify({"error": "Invalid permit signature encoding"}, 400)
     
-    print(f"\nProcessing payment for order {order_id}")
-    print(f"Client: {client_address}")
-    print(f"Amount: {amount}")
-    print(f"Signature r: {r_clean[:16]}... (len: {len(r_clean)})")
-    print(f"Signature s: {s_clean[:16]}... (len: {len(s_clean)})")
+    log.debug("Processing payment for order %s (client %s, amount %s)", order_id, client_address, amount)
+    log.debug("Signature r: %s (len: %d), s: %s (len: %d)", r_bytes.hex(), len(r_bytes), s_bytes.hex(), len(s_bytes))
     
     try:
-        # Step 1: Pull payment using permit
-        order_id_bytes_hex = order['order_id_bytes']
-        # Strip 0x prefix if present
-        order_id_bytes_hex_clean = order_id_bytes_hex[2:] if order_id_bytes_hex.startswith('0x') else order_id_bytes_hex
-        print(f"Order ID bytes hex: {order_id_bytes_hex_clean[:16]}... (len: {len(order_id_bytes_hex_clean)})")
-        order_id_bytes = bytes.fromhex(order_id_bytes_hex_clean)
-        
-        tx = vault_contract.functions.pullPaymentWithPermit(
-            order_id_bytes,
-            Config.MOCK_EURC_ADDRESS,
-            amount,
-            deadline,
-            v,
-            bytes.fromhex(r_clean),
-            bytes.fromhex(s_clean)
-        ).build_transaction({
-            'from': facilitator_account.address,
-            'nonce': w3.eth.get_transaction_count(facilitator_account.address),
-            'gas': 500000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        signed_tx = facilitator_account.sign_transaction(tx)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        order_id_bytes = order.order_id_bytes
         
-        print(f"Funds pulled by facilitator: {tx_hash.hex()}")
+        # A permit that doesn't recover to the order's client would only revert on-chain
+        owner = checksum_address(order.client)
+        if recover_permit_signer(owner, amount, deadline, v, r_bytes, s_bytes) != owner:
+            return ojsonify({"error": "Invalid permit signature"}, 400)
         
-        # Step 2: Simulate swap
+        # One (cached) gas price for all four transactions; nonces come from the shared local counter
+        gas_price = cached_gas_price()
         swap_id = Web3.keccak(text=f"{order_id}-swap")
         
-        tx = simulator_contract.functions.instantSwap(
-            swap_id,
-            Config.MOCK_EURC_ADDRESS,
-            Config.MOCK_USDC_ADDRESS,
-            amount
-        ).build_transaction({
-            'from': facilitator_account.address,
-            'nonce': w3.eth.get_transaction_count(facilitator_account.address),
-            'gas': 300000,
-            'gasPrice': w3.eth.gas_price
-        })
+        # Steps 1+2: pull payment and swap are submitted back-to-back (the swap
+        # executes after the pull by nonce order) and mined together
+        with nonce_manager.reserved(2) as nonce:
+            tx_hash = send_transaction(
+                'pullPaymentWithPermit',
+                encode_call(
+                    'pullPaymentWithPermit',
+                    order_id_bytes,
+                    MOCK_EURC_CS,
+                    amount,
+                    deadline,
+                    v,
+                    r_bytes,
+                    s_bytes
+                ),
+                nonce, gas_price
+            )
+            tx_hash_swap = send_transaction(
+                'instantSwap',
+                encode_call(
+                    'instantSwap',
+                    swap_id,
+                    MOCK_EURC_CS,
+                    MOCK_USDC_CS,
+                    amount
+                ),
+                nonce + 1, gas_price
+            )
         
-        signed_tx = facilitator_account.sign_transaction(tx)
-        tx_hash_swap = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        receipt_swap = w3.eth.wait_for_transaction_receipt(tx_hash_swap)
+        wait_for_receipts(tx_hash, tx_hash_swap)
+        log.debug("Funds pulled by facilitator: %s", Web3.to_hex(tx_hash))
         
         # Get swap output amount
         swap_result = simulator_contract.functions.getSwap(swap_id).call()
         amount_out = swap_result[4]  # amountOut field
         
-        print(f"Swap completed: {tx_hash_swap.hex()}, output: {amount_out}")
+        log.debug("Swap completed: %s, output: %s", Web3.to_hex(tx_hash_swap), amount_out)
         
-        # Step 3: Complete swap and settle
-        tx = vault_contract.functions.completeSwapAndSettle(
-            order_id_bytes,
-            amount_out
-        ).build_transaction({
-            'from': facilitator_account.address,
-            'nonce': w3.eth.get_transaction_count(facilitator_account.address),
-            'gas': 300000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        signed_tx = facilitator_account.sign_transaction(tx)
-        tx_hash_settle = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        receipt_settle = w3.eth.wait_for_transaction_receipt(tx_hash_settle)
-        
-        print(f"Settlement completed by facilitator: {tx_hash_settle.hex()}")
-        print(f"  MockUSDC credited to seller: {Config.SELLER_ADDRESS}")
+        # Steps 3+4: settlement needs the swap output; release follows it by nonce order
+        with nonce_manager.reserved(2) as nonce:
+            tx_hash_settle = send_transaction(
+                'completeSwapAndSettle',
+                encode_call('completeSwapAndSettle', order_id_bytes, amount_out),
+                nonce, gas_price
+            )
+            tx_hash_release = send_transaction(
+                'releaseAsset',
+                encode_call('releaseAsset', order_id_bytes),
+                nonce + 1, gas_price
+            )
         
-        # Step 4: Release asset
-        tx = vault_contract.functions.releaseAsset(
-            order_id_bytes
-        ).build_transaction({
-            'from': facilitator_account.address,
-            'nonce': w3.eth.get_transaction_count(facilitator_account.address),
-            'gas': 300000,
-            'gasPrice': w3.eth.gas_price
-        })
+        # The vault balance in the response is informational, so it is read
+        # while the settle/release receipts are awaited rather than after
+        yps_balance_future = read_executor.submit(
+            yps_token.functions.balanceOf(VAULT_CS).call
+        )
         
-        signed_tx = facilitator_account.sign_transaction(tx)
-        tx_hash_release = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        receipt_release = w3.eth.wait_for_transaction_receipt(tx_hash_release)
+        wait_for_receipts(tx_hash_settle, tx_hash_release)
         
-        print(f"Asset released by facilitator: {tx_hash_release.hex()}")
-        print(f"  YPS tokens sent to client: {client_address}")
+        log.debug("Settlement completed by facilitator: %s (MockUSDC credited to seller %s)",
+                  Web3.to_hex(tx_hash_settle), Config.SELLER_ADDRESS)
+        log.debug("Asset released by facilitator: %s (YPS tokens sent to client %s)",
+                  Web3.to_hex(tx_hash_release), client_address)
         
         # Update order status
-        order['status'] = 'completed'
-        order['payment_tx'] = tx_hash.hex()
-        order['swap_tx'] = tx_hash_swap.hex()
-        order['settle_tx'] = tx_hash_settle.hex()
-        order['release_tx'] = tx_hash_release.hex()
+        order.status = 'completed'
+        order.payment_tx = bytes(tx_hash)
+        order.swap_tx = bytes(tx_hash_swap)
+        order.settle_tx = bytes(tx_hash_settle)
+        order.release_tx = bytes(tx_hash_release)
         
-        # Get final vault balances
-        yps_balance = yps_token.functions.balanceOf(Config.SETTLEMENT_VAULT_ADDRESS).call()
+        yps_balance = yps_balance_future.result()
         
         # Return success response
-        return jsonify({
-            "status": "success",
-            "order_id": order_id,
-            "asset_amount": str(asset_amount),
-            "asset_token": Config.YPS_ADDRESS,
-            "payment_amount": str(amount),
-            "settlement_amount": str(amount_out),
-            "transactions": {
-                "payment": tx_hash.hex(),
-                "swap": tx_hash_swap.hex(),
-                "settle": tx_hash_settle.hex(),
-                "release": tx_hash_release.hex()
-            },
-            "vault_balances": {
-                "yps": str(yps_balance)
-            }
-        }), 200
+        return ojsonify(SuccessResponse(
+            order_id=order_id,
+            asset_amount=str(asset_amount),
+            asset_token=Config.YPS_ADDRESS,
+            payment_amount=str(amount),
+            settlement_amount=str(amount_out),
+            transactions=OrderTransactions(
+                payment=tx_hash.hex(),
+                swap=tx_hash_swap.hex(),
+                settle=tx_hash_settle.hex(),
+                release=tx_hash_release.hex()
+            ),
+            vault_balances={"yps": str(yps_balance)}
+        ))
         
     except Exception as e:
-        print(f"Error processing payment: {e}")
-        print(f"Error type: {type(e).__name__}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": str(e)}), 500
+        log.exception("Error processing payment for order %s", order_id)
+        return ojsonify({"error": str(e)}, 500)
 
 
 @app.route('/status/<order_id>', methods=['GET'])
 def get_status(order_id):
     """Get order status"""
-    order = orders.get(order_id)
+    order = find_order(order_id)
     if not order:
-        return jsonify({"error": "Order not found"}), 404
+        return ojsonify({"error": "Order not found"}, 404)
     
-    return jsonify(order), 200
+    return ojsonify(order.to_json())
 
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({
+    return ojsonify({
         "status": "healthy",
         "roles": {
             "facilitator": Config.FACILITATOR_ADDRESS,
@@ -349,17 +660,10 @@ def health():
             "simulator": Config.SWAP_SIMULATOR_ADDRESS,
             "yps": Config.YPS_ADDRESS
         }
-    }), 200
+    })
 
 
 if __name__ == '__main__':
-    # Validate configuration
-    try:
-        Config.validate(role="facilitator")
-    except ValueError as e:
-        print(f"Configuration error: {e}")
-        sys.exit(1)
-    
     print("\n=== x402 OTC API Server ===")
     print(f"Network: Polygon Amoy (Chain ID: {Config.CHAIN_ID})")
     print(f"\nRole Configuration:")
@@ -372,6 +676,7 @@ if __name__ == '__main__':
     print(f"  Asset price: {Config.ASSET_PRICE_USDC / 10**6} USDC per YPS")
     print(f"\nServer listening on {Config.SERVER_HOST}:{Config.SERVER_PORT}\n")
     
-    # Run server
-    app.run(host=Config.SERVER_HOST, port=Config.SERVER_PORT, debug=True)
+    # Development server; for production run a single gunicorn process with
+    # threads (see README) so one NonceManager owns the facilitator nonce
+    app.run(host=Config.SERVER_HOST, port=Config.SERVER_PORT, debug=True, threaded=True)
 
@@ -3,33 +3,325 @@ Real-time Event Tracker for x402 OTC API
 Monitors on-chain events and displays live progress
 """
 import os
+import re
 import sys
 import time
-import json
+import asyncio
+import sqlite3
+import struct
+import queue
+import threading
+import orjson
+from array import array
 from datetime import datetime
+from eth_abi import decode as abi_decode
+from eth_utils import keccak
+from hexbytes import HexBytes
 from web3 import Web3
+from collections.abc import Mapping
 from typing import Dict, List
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from common.config import Config
-from common.contracts import get_contract, SETTLEMENT_VAULT_ABI, SWAP_SIMULATOR_ABI
+from common.contracts import (
+    canonical_signature,
+    canonical_type,
+    get_contract,
+    SETTLEMENT_VAULT_ABI,
+    SWAP_SIMULATOR_ABI,
+    SETTLEMENT_VAULT_EVENTS
+)
+
+
+# Historical scans: blocks per eth_getLogs window, windows per JSON-RPC batch,
+# and batches in flight at once
+HISTORICAL_WINDOW = 500
+HISTORICAL_BATCH_SIZE = 10
+HISTORICAL_CONCURRENCY = 8
+
+# Fragments of eth_getLogs errors meaning "split the block range and retry"
+# (geth/Infura -32005 result caps, Alchemy size caps, block-range caps). Other
+# errors (rate limits share -32005) are retried after SCAN_RETRY_DELAY instead.
+RANGE_ERROR_HINTS = (
+    "query returned more than",
+    "response size exceeded",
+    "block range",
+    "range is too",
+    "range too",
+)
+SCAN_RETRIES = 3
+SCAN_RETRY_DELAY = 1.0
+
+
+def is_range_error(error: dict) -> bool:
+    """Whether a JSON-RPC error says the eth_getLogs block range is too large"""
+    message = str(error.get("message", "")).lower()
+    return any(hint in message for hint in RANGE_ERROR_HINTS)
+
+
+# Block headers per JSON-RPC batch when prefiltering a range by logsBloom
+BLOOM_BATCH_SIZE = 100
+
+
+def bloom_bits(item: bytes) -> list:
+    """(byte index, mask) of the three logsBloom bits an address or topic sets"""
+    digest = keccak(item)
+    bits = []
+    for i in (0, 2, 4):
+        bit = ((digest[i] << 8) | digest[i + 1]) & 2047
+        bits.append((255 - bit // 8, 1 << (bit % 8)))
+    return bits
+
+
+def bloom_contains(bloom: bytes, bits: list) -> bool:
+    """Whether every bit of an item is set in a 256-byte logsBloom"""
+    return all(bloom[index] & mask for index, mask in bits)
+
+
+# Historical logs are cached per LOG_BUCKET-block bucket once the bucket is
+# FINALITY_CONFIRMATIONS deep (past any reorg)
+LOG_BUCKET = 100
+FINALITY_CONFIRMATIONS = 128
+LOG_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "x402", "logs.sqlite")
+
+# Local dev chains (anvil/hardhat) are reset between runs, so their logs are never cached
+DEV_CHAIN_IDS = frozenset({31337})
+
+
+class LogCache:
+    """Raw logs of finalized block buckets, persisted in SQLite across runs"""
+    
+    def __init__(self, path: str = LOG_CACHE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS log_buckets ("
+            " filter_key TEXT NOT NULL,"
+            " bucket_start INTEGER NOT NULL,"
+            " logs BLOB NOT NULL,"
+            " PRIMARY KEY (filter_key, bucket_start))"
+        )
+    
+    def load(self, filter_key: str, bucket_starts: list) -> Dict[int, list]:
+        """Cached buckets among `bucket_starts` (ascending), as {bucket_start: raw logs}"""
+        if not bucket_starts:
+            return {}
+        wanted = set(bucket_starts)
+        rows = self.db.execute(
+            "SELECT bucket_start, logs FROM log_buckets"
+            " WHERE filter_key = ? AND bucket_start BETWEEN ? AND ?",
+            (filter_key, bucket_starts[0], bucket_starts[-1])
+        )
+        return {start: orjson.loads(logs) for start, logs in rows if start in wanted}
+    
+    def store(self, filter_key: str, buckets: Dict[int, list]):
+        """Persist {bucket_start: raw logs}; empty buckets are stored too"""
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO log_buckets (filter_key, bucket_start, logs) VALUES (?, ?, ?)",
+                [(filter_key, start, orjson.dumps(logs)) for start, logs in buckets.items()]
+            )
+
+
+# Small-integer ids of the vault events, as stored in EventLog.kinds; an order's
+# progress is a bitmap with bit `kind` set once that event has been seen
+EVENT_KINDS = {name: kind for kind, name in enumerate(SETTLEMENT_VAULT_EVENTS)}
+COMPLETED_BIT = 1 << EVENT_KINDS["AssetReleased"]
+
+
+class EventLog:
+    """
+    Processed events as parallel columns (array/bytearray) rather than one dict
+    per event: about 80 bytes per event, with no per-event Python objects kept
+    """
+    
+    def __init__(self):
+        self.blocks = array('Q')
+        self.timestamps = array('d')
+        self.kinds = array('B')
+        self.tx_hashes = bytearray()  # 32 bytes per event
+        self.order_ids = bytearray()  # 32 bytes per event (zeros when the event has no orderId)
+    
+    def append(self, kind: int, block: int, timestamp: float, tx_hash: bytes, order_id: bytes = bytes(32)):
+        self.blocks.append(block)
+        self.timestamps.append(timestamp)
+        self.kinds.append(kind)
+        self.tx_hashes += tx_hash
+        self.order_ids += order_id
+    
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+
+# Archive record: block number, event kind, transaction hash, order ID (73 bytes)
+ARCHIVE_RECORD = struct.Struct('<QB32s32s')
+ARCHIVE_BATCH_SIZE = 64
+
+
+class EventArchive:
+    """
+    Append-only binary log of processed events (--log FILE). Records are packed
+    on the caller's thread and written by a background thread, up to
+    ARCHIVE_BATCH_SIZE records per os.writev, so printing events never waits on disk
+    """
+    
+    def __init__(self, path: str):
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.pending = queue.SimpleQueue()
+        self.writer = threading.Thread(target=self._write_loop, name="event-archive", daemon=True)
+        self.writer.start()
+    
+    def append(self, kind: int, block: int, tx_hash: bytes, order_id: bytes):
+        self.pending.put(ARCHIVE_RECORD.pack(block, kind, tx_hash, order_id))
+    
+    def _write_loop(self):
+        while True:
+            record = self.pending.get()
+            if record is None:
+                break
+            batch = [record]
+            closing = False
+            while len(batch) < ARCHIVE_BATCH_SIZE:
+                try:
+                    record = self.pending.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    closing = True
+                    break
+                batch.append(record)
+            self._write_all(batch)
+            if closing:
+                break
+    
+    def _write_all(self, batch: List[bytes]):
+        data = memoryview(b"".join(batch))
+        while data:
+            data = data[os.writev(self.fd, [data]):]
+    
+    def close(self):
+        """Flush queued records and close the file"""
+        self.pending.put(None)
+        self.writer.join()
+        os.close(self.fd)
+
+
+def _json_default(value):
+    """orjson fallback for decoded event args (raw bytes and web3 AttributeDicts)"""
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError
+
+
+# Bytes that change JSON nesting or string state, for framing IPC responses
+_JSON_STRUCTURE = re.compile(rb'[\[\]{}"\\]')
+
+
+def ipc_path(rpc_url: str):
+    """Unix socket path when RPC_URL points at a local node's IPC endpoint, else None"""
+    if rpc_url.startswith("ipc://"):
+        return rpc_url[len("ipc://"):]
+    if rpc_url.endswith(".ipc") and os.path.exists(rpc_url):
+        return rpc_url
+    return None
+
+
+def _raw_bytes(value) -> bytes:
+    """Bytes of a log field given as a 0x-hex string (raw JSON-RPC) or bytes/HexBytes (web3)"""
+    return bytes.fromhex(value[2:]) if isinstance(value, str) else bytes(value)
+
+
+def _raw_int(value) -> int:
+    """Integer log field given as a 0x-hex quantity or an int"""
+    return int(value, 16) if isinstance(value, str) else value
+
+
+def build_event_decoders(abi: list) -> Dict[bytes, tuple]:
+    """
+    Map topic0 -> (name, indexed types, data types, argument names, positions of
+    address arguments) so logs decode with eth_abi directly instead of web3's
+    per-log ABI walk in process_log. Indexed arguments are all static here, so
+    the topics after topic0 decode as one tuple.
+    """
+    decoders = {}
+    for entry in abi:
+        if entry.get("type") != "event":
+            continue
+        params = [param for param in entry["inputs"] if param["indexed"]]
+        indexed_count = len(params)
+        params += [param for param in entry["inputs"] if not param["indexed"]]
+        types = tuple(canonical_type(param) for param in params)
+        topic = bytes(Web3.keccak(text=canonical_signature(entry)))
+        decoders[topic] = (
+            entry["name"],
+            types[:indexed_count],
+            types[indexed_count:],
+            tuple(param["name"] for param in params),
+            tuple(i for i, abi_type in enumerate(types) if abi_type == "address"),
+        )
+    return decoders
 
 
 class EventTracker:
     """Tracks and displays on-chain events for the x402 flow"""
     
-    def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(Config.RPC_URL))
+    def __init__(self, use_log_cache: bool = True, bloom_prefilter: bool = False, archive_path: str = None):
+        # A co-located node is reached over its IPC socket (no TCP/HTTP per call)
+        self.ipc_path = ipc_path(Config.RPC_URL)
+        if self.ipc_path is not None:
+            self.w3 = Web3(Web3.IPCProvider(self.ipc_path))
+        else:
+            self.w3 = Web3(Web3.HTTPProvider(Config.RPC_URL))
         
         # Load contracts
         self.vault_contract = get_contract(self.w3, Config.SETTLEMENT_VAULT_ADDRESS, SETTLEMENT_VAULT_ABI)
         self.simulator_contract = get_contract(self.w3, Config.SWAP_SIMULATOR_ADDRESS, SWAP_SIMULATOR_ABI)
         
+        # All vault events are fetched by one eth_getLogs (topic0 OR-filter) and
+        # decoded by the event matching each log's topic0
+        self.vault_address = Web3.to_checksum_address(Config.SETTLEMENT_VAULT_ADDRESS)
+        self.event_topics = [Web3.to_hex(topic) for topic in SETTLEMENT_VAULT_EVENTS.values()]
+        self.event_decoders = build_event_decoders(SETTLEMENT_VAULT_ABI)
+        
+        # Optional historical prefilter: a block can only hold our logs if its
+        # logsBloom has the vault address and at least one of the event topics
+        self.bloom_prefilter = bloom_prefilter
+        self.address_bloom_bits = bloom_bits(bytes.fromhex(self.vault_address[2:]))
+        self.topic_bloom_bits = [bloom_bits(topic) for topic in SETTLEMENT_VAULT_EVENTS.values()]
+        
+        # Historical scans reuse finalized buckets fetched by earlier runs. The
+        # key names the chain the node actually serves (its chain ID and genesis
+        # hash), so a different or re-created chain never reads stale buckets.
+        self.log_cache = None
+        self.log_filter_key = None
+        if use_log_cache:
+            chain_id = self.w3.eth.chain_id
+            if chain_id not in DEV_CHAIN_IDS:
+                genesis_hash = Web3.to_hex(self.w3.eth.get_block(0)["hash"])
+                self.log_cache = LogCache()
+                self.log_filter_key = (
+                    f"{chain_id}:{genesis_hash}:{self.vault_address}:{','.join(sorted(self.event_topics))}"
+                )
+        
+        # Display line builders, looked up by event name
+        self.formatters = {
+            "PaymentRequested": self._format_payment_requested,
+            "PermitConsumed": self._format_permit_consumed,
+            "FundsPulled": self._format_funds_pulled,
+            "SwapCompleted": self._format_swap_completed,
+            "VaultFunded": self._format_vault_funded,
+            "AssetReleased": self._format_asset_released,
+            "RefundSent": self._format_refund_sent,
+        }
+        
         # Track events
-        self.events = []
+        self.events = EventLog()
         self.orders = {}
+        self.archive = EventArchive(archive_path) if archive_path else None
         
         print(f"Event Tracker initialized")
         print(f"Vault: {Config.SETTLEMENT_VAULT_ADDRESS}")
@@ -43,131 +335,125 @@ class EventTracker:
             timestamp = time.time()
         return datetime.fromtimestamp(timestamp).strftime('%H:%M:%S')
     
+    def _format_payment_requested(self, timestamp: str, data) -> str:
+        order_id = data['orderId'][:4].hex()
+        client = data['client']
+        amount = data['requiredAmount']
+        return f"[{timestamp}] 💳 Payment Requested - Order: {order_id}... Client: {client[:8]}... Amount: {amount / 10**6} USDC"
+    
+    def _format_permit_consumed(self, timestamp: str, data) -> str:
+        order_id = data['orderId'][:4].hex()
+        amount = data['amount']
+        return f"[{timestamp}] ✍️  Permit Signed & Consumed - Order: {order_id}... Amount: {amount / 10**6} EURC"
+    
+    def _format_funds_pulled(self, timestamp: str, data) -> str:
+        order_id = data['orderId'][:4].hex()
+        amount = data['amount']
+        return f"[{timestamp}] 💰 Funds Pulled - Order: {order_id}... Amount: {amount / 10**6} EURC"
+    
+    def _format_swap_completed(self, timestamp: str, data) -> str:
+        order_id = data['orderId'][:4].hex()
+        amount_in = data['amountIn']
+        amount_out = data['amountOut']
+        rate = amount_out / amount_in if amount_in > 0 else 0
+        return f"[{timestamp}] 🔄 Swap Completed - Order: {order_id}... In: {amount_in / 10**6} EURC, Out: {amount_out / 10**6} USDC (Rate: {rate:.4f})"
+    
+    def _format_vault_funded(self, timestamp: str, data) -> str:
+        order_id = data['orderId'][:4].hex()
+        amount = data['amount']
+        return f"[{timestamp}] 🏦 Vault Funded - Order: {order_id}... Amount: {amount / 10**6} USDC"
+    
+    def _format_asset_released(self, timestamp: str, data) -> str:
+        order_id = data['orderId'][:4].hex()
+        client = data['client']
+        amount = data['amount']
+        return f"[{timestamp}] ✅ Asset Released - Order: {order_id}... Client: {client[:8]}... Amount: {amount / 10**18} YPS"
+    
+    def _format_refund_sent(self, timestamp: str, data) -> str:
+        order_id = data['orderId'][:4].hex()
+        amount = data['amount']
+        return f"[{timestamp}] 💸 Refund Sent - Order: {order_id}... Amount: {amount / 10**6} EURC"
+    
     def format_event(self, event_name: str, data: dict) -> str:
         """Format event for display"""
         timestamp = self.format_timestamp()
         
-        if event_name == "PaymentRequested":
-            order_id = data['orderId'].hex()
-            client = data['client']
-            amount = data['requiredAmount']
-            deadline = data['deadline']
-            return f"[{timestamp}] 💳 Payment Requested - Order: {order_id[:8]}... Client: {client[:8]}... Amount: {amount / 10**6} USDC"
-        
-        elif event_name == "PermitConsumed":
-            order_id = data['orderId'].hex()
-            client = data['client']
-            amount = data['amount']
-            return f"[{timestamp}] ✍️  Permit Signed & Consumed - Order: {order_id[:8]}... Amount: {amount / 10**6} EURC"
-        
-        elif event_name == "FundsPulled":
-            order_id = data['orderId'].hex()
-            amount = data['amount']
-            return f"[{timestamp}] 💰 Funds Pulled - Order: {order_id[:8]}... Amount: {amount / 10**6} EURC"
-        
-        elif event_name == "SwapCompleted":
-            order_id = data['orderId'].hex()
-            amount_in = data['amountIn']
-            amount_out = data['amountOut']
-            surplus = data['surplus']
-            rate = amount_out / amount_in if amount_in > 0 else 0
-            return f"[{timestamp}] 🔄 Swap Completed - Order: {order_id[:8]}... In: {amount_in / 10**6} EURC, Out: {amount_out / 10**6} USDC (Rate: {rate:.4f})"
-        
-        elif event_name == "VaultFunded":
-            order_id = data['orderId'].hex()
-            amount = data['amount']
-            return f"[{timestamp}] 🏦 Vault Funded - Order: {order_id[:8]}... Amount: {amount / 10**6} USDC"
-        
-        elif event_name == "AssetReleased":
-            order_id = data['orderId'].hex()
-            client = data['client']
-            amount = data['amount']
-            return f"[{timestamp}] ✅ Asset Released - Order: {order_id[:8]}... Client: {client[:8]}... Amount: {amount / 10**18} YPS"
-        
-        elif event_name == "RefundSent":
-            order_id = data['orderId'].hex()
-            amount = data['amount']
-            return f"[{timestamp}] 💸 Refund Sent - Order: {order_id[:8]}... Amount: {amount / 10**6} EURC"
-        
-        else:
-            return f"[{timestamp}] 📋 {event_name}: {json.dumps(data, indent=2)}"
+        formatter = self.formatters.get(event_name)
+        if formatter is not None:
+            return formatter(timestamp, data)
+        pretty = orjson.dumps(data, option=orjson.OPT_INDENT_2, default=_json_default).decode()
+        return f"[{timestamp}] 📋 {event_name}: {pretty}"
     
     def process_event(self, event):
         """Process and display an event"""
         event_name = event['event']
-        event_data = dict(event['args'])
+        event_data = event['args']
         
         # Format and print
         formatted = self.format_event(event_name, event_data)
         print(formatted)
         
+        # Orders are keyed by the raw 32-byte ID; hex is only produced for display
+        order_id = event_data.get('orderId')
+        
         # Store event
-        self.events.append({
-            'name': event_name,
-            'data': event_data,
-            'timestamp': time.time(),
-            'block': event['blockNumber'],
-            'tx_hash': event['transactionHash'].hex()
-        })
-        
-        # Update order tracking
-        if 'orderId' in event_data:
-            order_id = event_data['orderId'].hex()
-            if order_id not in self.orders:
-                self.orders[order_id] = {
-                    'events': [],
-                    'status': 'pending'
-                }
-            
-            self.orders[order_id]['events'].append(event_name)
+        kind = EVENT_KINDS[event_name]
+        order_id_bytes = order_id if order_id is not None else bytes(32)
+        self.events.append(kind, event['blockNumber'], time.time(), event['transactionHash'], order_id_bytes)
+        if self.archive is not None:
+            self.archive.append(kind, event['blockNumber'], bytes(event['transactionHash']), bytes(order_id_bytes))
+        
+        # Update order tracking: one event-kind bitmap per order
+        if order_id is not None:
+            order_id = bytes(order_id)
+            self.orders[order_id] = self.orders.get(order_id, 0) | (1 << kind)
             
-            # Update status
+            # Announce completion
             if event_name == "AssetReleased":
-                self.orders[order_id]['status'] = 'completed'
                 print(f"\n{'='*60}")
-                print(f"✅ Order {order_id[:8]}... COMPLETED!")
+                print(f"✅ Order {order_id[:4].hex()}... COMPLETED!")
                 print(f"{'='*60}\n")
     
+    def decode_log(self, log):
+        """
+        Decode a vault log (raw JSON-RPC hex or web3-formatted) by its topic0,
+        None for events the tracker doesn't know
+        """
+        topics = log['topics']
+        decoder = self.event_decoders.get(_raw_bytes(topics[0]))
+        if decoder is None:
+            return None
+        name, indexed_types, data_types, names, address_positions = decoder
+        
+        values = list(abi_decode(indexed_types, b"".join(_raw_bytes(topic) for topic in topics[1:])))
+        values.extend(abi_decode(data_types, _raw_bytes(log['data'])))
+        for i in address_positions:
+            values[i] = Web3.to_checksum_address(values[i])
+        
+        return {
+            'event': name,
+            'args': dict(zip(names, values)),
+            'address': log['address'],
+            'blockNumber': _raw_int(log['blockNumber']),
+            'logIndex': _raw_int(log['logIndex']),
+            'transactionHash': HexBytes(log['transactionHash']),
+        }
+    
     def get_events_from_block(self, from_block: int, to_block: int):
         """Get events from a block range"""
         events = []
         
-        # Get vault events
         try:
-            vault_events = self.vault_contract.events.PaymentRequested.get_logs(
-                fromBlock=from_block, toBlock=to_block
-            )
-            events.extend(vault_events)
-            
-            vault_events = self.vault_contract.events.PermitConsumed.get_logs(
-                fromBlock=from_block, toBlock=to_block
-            )
-            events.extend(vault_events)
-            
-            vault_events = self.vault_contract.events.FundsPulled.get_logs(
-                fromBlock=from_block, toBlock=to_block
-            )
-            events.extend(vault_events)
-            
-            vault_events = self.vault_contract.events.SwapCompleted.get_logs(
-                fromBlock=from_block, toBlock=to_block
-            )
-            events.extend(vault_events)
-            
-            vault_events = self.vault_contract.events.VaultFunded.get_logs(
-                fromBlock=from_block, toBlock=to_block
-            )
-            events.extend(vault_events)
-            
-            vault_events = self.vault_contract.events.AssetReleased.get_logs(
-                fromBlock=from_block, toBlock=to_block
-            )
-            events.extend(vault_events)
-            
-            vault_events = self.vault_contract.events.RefundSent.get_logs(
-                fromBlock=from_block, toBlock=to_block
-            )
-            events.extend(vault_events)
+            logs = self.w3.eth.get_logs({
+                "address": self.vault_address,
+                "topics": [self.event_topics],
+                "fromBlock": from_block,
+                "toBlock": to_block
+            })
+            for log in logs:
+                event = self.decode_log(log)
+                if event is not None:
+                    events.append(event)
             
         except Exception as e:
             print(f"Error fetching events: {e}")
@@ -177,12 +463,289 @@ class EventTracker:
         
         return events
     
+    def _logs_params(self, from_block: int, to_block: int) -> list:
+        """JSON-RPC params of eth_getLogs for the vault events in a block window"""
+        return [{
+            "address": self.vault_address,
+            "topics": [self.event_topics],
+            "fromBlock": hex(from_block),
+            "toBlock": hex(to_block)
+        }]
+    
+    async def _rpc(self, session, payload):
+        """POST a JSON-RPC request (or batch) to RPC_URL and return the parsed body"""
+        if self.ipc_path is not None:
+            return await self._ipc_rpc(payload)
+        async with session.post(
+            Config.RPC_URL,
+            data=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"}
+        ) as response:
+            return orjson.loads(await response.read())
+    
+    async def _ipc_rpc(self, payload):
+        """Send a JSON-RPC request (or batch) over the node's IPC socket"""
+        reader, writer = await asyncio.open_unix_connection(self.ipc_path)
+        try:
+            writer.write(orjson.dumps(payload))
+            await writer.drain()
+            # The socket is a stream: track nesting over each new chunk only and
+            # parse once, when the top-level document closes
+            buffer = bytearray()
+            depth = 0
+            in_string = False
+            escaped = -1  # buffer offset of the byte after a backslash in a string
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    raise ConnectionError("IPC socket closed before a full response")
+                offset = len(buffer)
+                buffer += chunk
+                for match in _JSON_STRUCTURE.finditer(chunk):
+                    position = offset + match.start()
+                    if position == escaped:
+                        continue
+                    char = match.group()
+                    if in_string:
+                        if char == b"\\":
+                            escaped = position + 1
+                        elif char == b'"':
+                            in_string = False
+                    elif char == b'"':
+                        in_string = True
+                    elif char in b"[{":
+                        depth += 1
+                    elif char in b"]}":
+                        depth -= 1
+                        if depth == 0:
+                            return orjson.loads(buffer[:position + 1])
+        finally:
+            writer.close()
+    
+    async def _scan_window(self, session, semaphore, from_block: int, to_block: int, attempt: int = 0) -> list:
+        """
+        Raw logs of one window, halving it while the provider says the range is
+        too large and backing off before retrying any other error
+        """
+        async with semaphore:
+            body = await self._rpc(session, {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "eth_getLogs",
+                "params": self._logs_params(from_block, to_block)
+            })
+        if "error" not in body:
+            return body["result"]
+        
+        if to_block > from_block and is_range_error(body["error"]):
+            middle = (from_block + to_block) // 2
+            left, right = await asyncio.gather(
+                self._scan_window(session, semaphore, from_block, middle),
+                self._scan_window(session, semaphore, middle + 1, to_block)
+            )
+            return left + right
+        if attempt < SCAN_RETRIES:
+            await asyncio.sleep(SCAN_RETRY_DELAY * 2 ** attempt)
+            return await self._scan_window(session, semaphore, from_block, to_block, attempt + 1)
+        raise ValueError(body["error"])
+    
+    async def _scan_batch(self, session, semaphore, windows: list) -> list:
+        """
+        Raw logs of every window from one JSON-RPC batch POST. Windows the batch
+        didn't answer (or providers that reject batches) fall back to _scan_window.
+        """
+        async with semaphore:
+            body = await self._rpc(session, [
+                {"jsonrpc": "2.0", "id": i, "method": "eth_getLogs", "params": self._logs_params(lo, hi)}
+                for i, (lo, hi) in enumerate(windows)
+            ])
+        results = {}
+        if isinstance(body, list):
+            results = {item.get("id"): item.get("result") for item in body}
+        
+        async def window_logs(i, lo, hi):
+            logs = results.get(i)
+            return logs if logs is not None else await self._scan_window(session, semaphore, lo, hi)
+        
+        return await asyncio.gather(*(window_logs(i, lo, hi) for i, (lo, hi) in enumerate(windows)))
+    
+    def may_contain_events(self, logs_bloom: bytes) -> bool:
+        """False when a block's logsBloom rules out every vault event"""
+        return bloom_contains(logs_bloom, self.address_bloom_bits) and any(
+            bloom_contains(logs_bloom, bits) for bits in self.topic_bloom_bits
+        )
+    
+    async def _bloom_filter_ranges(self, session, semaphore, ranges: list) -> list:
+        """
+        Narrow block ranges to the runs of blocks whose header bloom may hold vault
+        events. Headers come in BLOOM_BATCH_SIZE batches; if the provider won't
+        batch, the ranges are returned unchanged.
+        """
+        blocks = [block for lo, hi in ranges for block in range(lo, hi + 1)]
+        
+        async def fetch_blooms(chunk):
+            async with semaphore:
+                body = await self._rpc(session, [
+                    {"jsonrpc": "2.0", "id": block, "method": "eth_getBlockByNumber", "params": [hex(block), False]}
+                    for block in chunk
+                ])
+            if not isinstance(body, list):
+                raise ValueError(body)
+            return {item["id"]: item["result"]["logsBloom"] for item in body}
+        
+        try:
+            blooms = {}
+            for chunk_blooms in await asyncio.gather(*(
+                fetch_blooms(blocks[i:i + BLOOM_BATCH_SIZE])
+                for i in range(0, len(blocks), BLOOM_BATCH_SIZE)
+            )):
+                blooms.update(chunk_blooms)
+        except Exception as e:
+            print(f"Bloom prefilter unavailable ({e}), scanning full ranges")
+            return ranges
+        
+        # Coalesce surviving blocks into contiguous ranges (a missing header counts as a hit)
+        survivors = []
+        for block in blocks:
+            bloom = blooms.get(block)
+            if bloom is not None and not self.may_contain_events(bytes.fromhex(bloom[2:])):
+                continue
+            if survivors and survivors[-1][1] == block - 1:
+                survivors[-1] = (survivors[-1][0], block)
+            else:
+                survivors.append((block, block))
+        return survivors
+    
+    async def get_events_from_range(self, from_block: int, to_block: int, finalized_block: int = -1):
+        """
+        Get events from a wide block range: HISTORICAL_WINDOW-block windows sent
+        as JSON-RPC batches, at most HISTORICAL_CONCURRENCY requests in flight.
+        Buckets at or below `finalized_block` come from (and go to) the log cache,
+        and with bloom_prefilter only blocks whose logsBloom matches are queried.
+        """
+        import aiohttp
+        
+        # Whole buckets inside the range that can no longer reorg
+        cacheable = []
+        cached = {}
+        if self.log_cache is not None:
+            first_bucket = -(-from_block // LOG_BUCKET) * LOG_BUCKET
+            last_block = min(to_block, finalized_block)
+            cacheable = list(range(first_bucket, last_block - LOG_BUCKET + 2, LOG_BUCKET))
+            cached = self.log_cache.load(self.log_filter_key, cacheable)
+        
+        # Block ranges the cache doesn't cover
+        gaps = []
+        lo = from_block
+        for start in sorted(cached):
+            if start > lo:
+                gaps.append((lo, start - 1))
+            lo = start + LOG_BUCKET
+        if lo <= to_block:
+            gaps.append((lo, to_block))
+        
+        semaphore = asyncio.Semaphore(HISTORICAL_CONCURRENCY)
+        raw_logs = [log for logs in cached.values() for log in logs]
+        
+        if gaps:
+            async with aiohttp.ClientSession() as session:
+                if self.bloom_prefilter:
+                    gaps = await self._bloom_filter_ranges(session, semaphore, gaps)
+                
+                windows = [
+                    (start, min(start + HISTORICAL_WINDOW - 1, hi))
+                    for lo, hi in gaps
+                    for start in range(lo, hi + 1, HISTORICAL_WINDOW)
+                ]
+                batches = [
+                    windows[i:i + HISTORICAL_BATCH_SIZE]
+                    for i in range(0, len(windows), HISTORICAL_BATCH_SIZE)
+                ]
+                try:
+                    results = await asyncio.gather(*(
+                        self._scan_batch(session, semaphore, batch) for batch in batches
+                    ))
+                    fetched = [log for batch_logs in results for logs in batch_logs for log in logs]
+                    raw_logs.extend(fetched)
+                    
+                    if cacheable:
+                        new_buckets = {start: [] for start in cacheable if start not in cached}
+                        for log in fetched:
+                            start = int(log['blockNumber'], 16) // LOG_BUCKET * LOG_BUCKET
+                            if start in new_buckets:
+                                new_buckets[start].append(log)
+                        self.log_cache.store(self.log_filter_key, new_buckets)
+                except Exception as e:
+                    print(f"Error fetching events: {e}")
+        
+        events = []
+        for log in raw_logs:
+            event = self.decode_log(log)
+            if event is not None:
+                events.append(event)
+        
+        # Cached and fetched buckets interleave, so sort once
+        events.sort(key=lambda x: (x['blockNumber'], x['logIndex']))
+        
+        return events
+    
+    async def _watch_subscription(self):
+        """
+        Receive vault logs as they are mined over a WebSocket `logs` subscription.
+        A `newHeads` subscription on the same socket tracks the chain head, so
+        after a reconnect the blocks mined while disconnected are caught up.
+        """
+        from web3 import AsyncWeb3, WebsocketProviderV2
+        
+        last_block = None
+        while True:
+            try:
+                async with AsyncWeb3.persistent_websocket(WebsocketProviderV2(Config.RPC_WS_URL)) as ws_w3:
+                    logs_subscription = await ws_w3.eth.subscribe("logs", {
+                        "address": self.vault_address,
+                        "topics": [self.event_topics]
+                    })
+                    await ws_w3.eth.subscribe("newHeads")
+                    
+                    # Logs at or below the caught-up block were already fetched
+                    caught_up = -1
+                    if last_block is not None:
+                        caught_up = self.w3.eth.block_number
+                        for event in self.get_events_from_block(last_block + 1, caught_up):
+                            self.process_event(event)
+                        last_block = caught_up
+                    
+                    async for message in ws_w3.ws.process_subscriptions():
+                        result = message["result"]
+                        if message["subscription"] != logs_subscription:
+                            number = result["number"]
+                            last_block = int(number, 16) if isinstance(number, str) else number
+                            continue
+                        
+                        if result.get('removed'):
+                            continue
+                        event = self.decode_log(result)
+                        if event is not None and event['blockNumber'] > caught_up:
+                            self.process_event(event)
+            except Exception as e:
+                print(f"Log subscription dropped ({e}), reconnecting...")
+                await asyncio.sleep(1)
+    
     def watch(self, poll_interval: int = 2):
-        """Watch for new events in real-time"""
+        """Watch for new events in real-time (pushed over RPC_WS_URL when set, else polled)"""
         print(f"\n{'='*60}")
         print(f"🔍 Starting real-time event tracking")
         print(f"{'='*60}\n")
         
+        if Config.RPC_WS_URL:
+            print(f"Subscribed to vault logs via {Config.RPC_WS_URL}\n")
+            try:
+                asyncio.run(self._watch_subscription())
+            except KeyboardInterrupt:
+                print("\n\nTracking stopped by user")
+                self.print_summary()
+            return
+        
         # Get current block
         current_block = self.w3.eth.block_number
         print(f"Starting from block: {current_block}\n")
@@ -219,19 +782,23 @@ class EventTracker:
         
         if self.orders:
             print("\nOrder Status:")
-            for order_id, order_data in self.orders.items():
-                status_emoji = "✅" if order_data['status'] == 'completed' else "⏳"
-                print(f"  {status_emoji} {order_id[:16]}... - {order_data['status']} ({len(order_data['events'])} events)")
+            for order_id, seen in self.orders.items():
+                completed = seen & COMPLETED_BIT
+                status_emoji = "✅" if completed else "⏳"
+                status = 'completed' if completed else 'pending'
+                print(f"  {status_emoji} {order_id[:8].hex()}... - {status} ({bin(seen).count('1')} event types)")
         
         print()
     
     def track_historical(self, from_block: int = None, to_block: int = None):
         """Track historical events"""
+        latest_block = self.w3.eth.block_number
+        
         if from_block is None:
-            from_block = self.w3.eth.block_number - 1000  # Last ~1000 blocks
+            from_block = latest_block - 1000  # Last ~1000 blocks
         
         if to_block is None:
-            to_block = self.w3.eth.block_number
+            to_block = latest_block
         
         print(f"\n{'='*60}")
         print(f"📜 Fetching historical events")
@@ -239,7 +806,9 @@ class EventTracker:
         print(f"From block: {from_block}")
         print(f"To block: {to_block}\n")
         
-        events = self.get_events_from_block(from_block, to_block)
+        events = asyncio.run(self.get_events_from_range(
+            from_block, to_block, finalized_block=latest_block - FINALITY_CONFIRMATIONS
+        ))
         
         if not events:
             print("No events found in this range")
@@ -265,7 +834,15 @@ def main():
     parser.add_argument('--to-block', type=int,
                        help='Ending block for historical mode')
     parser.add_argument('--poll-interval', type=int, default=2,
-                       help='Poll interval in seconds for watch mode (default: 2)')
+                       help='Poll interval in seconds for watch mode without RPC_WS_URL (default: 2)')
+    parser.add_argument('--no-log-cache', action='store_true',
+                       help='Do not read or write the finalized-log cache (~/.cache/x402/logs.sqlite)')
+    parser.add_argument('--bloom-prefilter', action='store_true',
+                       help='Historical mode: skip blocks whose logsBloom rules out vault events '
+                            '(worth it on nodes where eth_getLogs is slow but headers are cheap)')
+    parser.add_argument('--log', metavar='FILE',
+                       help='Append processed events to FILE as fixed-size binary records '
+                            '(block u64, kind u8, tx hash, order ID; little-endian)')
     
     args = parser.parse_args()
     
@@ -277,13 +854,21 @@ def main():
         sys.exit(1)
     
     # Create tracker
-    tracker = EventTracker()
+    tracker = EventTracker(
+        use_log_cache=not args.no_log_cache,
+        bloom_prefilter=args.bloom_prefilter,
+        archive_path=args.log
+    )
     
     # Run in selected mode
-    if args.mode == 'watch':
-        tracker.watch(args.poll_interval)
-    else:
-        tracker.track_historical(args.from_block, args.to_block)
+    try:
+        if args.mode == 'watch':
+            tracker.watch(args.poll_interval)
+        else:
+            tracker.track_historical(args.from_block, args.to_block)
+    finally:
+        if tracker.archive is not None:
+            tracker.archive.close()
 
 
 if __name__ == '__main__':
@@ -4,13 +4,44 @@ Includes helper scripts for minting tokens, checking balances, etc.
 """
 import os
 import sys
+import functools
 from web3 import Web3
+from eth_abi import encode as abi_encode
 from eth_account import Account
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from common.config import Config
-from common.contracts import get_contract, ERC20_PERMIT_ABI
+from common.contracts import (
+    get_contract,
+    ERC20_PERMIT_ABI,
+    ERC20_PERMIT_FUNCTIONS,
+    MULTICALL3_ABI,
+    MULTICALL3_ADDRESS
+)
+
+
+@functools.lru_cache(maxsize=1)
+def get_web3() -> Web3:
+    """Web3 instance shared by the utilities (one provider/session per process)"""
+    return Web3(Web3.HTTPProvider(Config.RPC_URL))
+
+
+def token_contract(address: str):
+    """ERC-20 contract on the shared Web3 (cached by common.contracts.get_contract)"""
+    return get_contract(get_web3(), address, ERC20_PERMIT_ABI)
+
+
+def get_token_balances(address: str, tokens: list) -> list:
+    """balanceOf(address) on every token in one eth_call through Multicall3"""
+    selector, arg_types = ERC20_PERMIT_FUNCTIONS["balanceOf"]
+    calldata = selector + abi_encode(arg_types, [Web3.to_checksum_address(address)])
+    
+    multicall = get_contract(get_web3(), MULTICALL3_ADDRESS, MULTICALL3_ABI)
+    _, return_data = multicall.functions.aggregate(
+        [(Web3.to_checksum_address(token), calldata) for token in tokens]
+    ).call()
+    return [int.from_bytes(result, "big") for result in return_data]
 
 
 def mint_tokens_to_client(client_address: str, eurc_amount: int, usdc_amount: int = 0):
@@ -18,11 +49,10 @@ def mint_tokens_to_client(client_address: str, eurc_amount: int, usdc_amount: in
     Mint MockEURC and MockUSDC tokens to a client address
     (Requires admin/minter permissions)
     """
-    w3 = Web3(Web3.HTTPProvider(Config.RPC_URL))
     account = Account.from_key(Config.FACILITATOR_PRIVATE_KEY)
     
-    mock_eurc = get_contract(w3, Config.MOCK_EURC_ADDRESS, ERC20_PERMIT_ABI)
-    mock_usdc = get_contract(w3, Config.MOCK_USDC_ADDRESS, ERC20_PERMIT_ABI)
+    mock_eurc = token_contract(Config.MOCK_EURC_ADDRESS)
+    mock_usdc = token_contract(Config.MOCK_USDC_ADDRESS)
     
     print(f"Minting tokens to: {client_address}")
     
@@ -44,15 +74,10 @@ def mint_tokens_to_client(client_address: str, eurc_amount: int, usdc_amount: in
 
 def check_balances(address: str):
     """Check token balances for an address"""
-    w3 = Web3(Web3.HTTPProvider(Config.RPC_URL))
-    
-    mock_eurc = get_contract(w3, Config.MOCK_EURC_ADDRESS, ERC20_PERMIT_ABI)
-    mock_usdc = get_contract(w3, Config.MOCK_USDC_ADDRESS, ERC20_PERMIT_ABI)
-    yps_token = get_contract(w3, Config.YPS_ADDRESS, ERC20_PERMIT_ABI)
-    
-    eurc_balance = mock_eurc.functions.balanceOf(address).call()
-    usdc_balance = mock_usdc.functions.balanceOf(address).call()
-    yps_balance = yps_token.functions.balanceOf(address).call()
+    eurc_balance, usdc_balance, yps_balance = get_token_balances(
+        address,
+        [Config.MOCK_EURC_ADDRESS, Config.MOCK_USDC_ADDRESS, Config.YPS_ADDRESS]
+    )
     
     print(f"\nBalances for {address}:")
     print(f"  MockEURC: {eurc_balance / 10**6}")
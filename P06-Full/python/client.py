@@ -2,9 +2,11 @@
 OTC API HTTP Client implementing x402 protocol
 Buyer-side client that purchases assets via HTTP
 """
-import json
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional, Dict, Any
 from eth_account import Account
 from datetime import datetime, timedelta
@@ -14,9 +16,20 @@ from x402_types import (
     X402PaymentRequirement,
     X402PaymentProof,
     PermitSignature,
-    create_x402_payment_header,
+    create_x402_payment_header_bytes,
 )
 
+# (connect, read) timeout for the quote, rate and status calls
+HTTP_TIMEOUT = (3, 30)
+
+# (connect, read) timeout for the paid request; the server waits for the
+# settlement receipts (up to 120s each) before it answers
+PAYMENT_TIMEOUT = (3, 400)
+
+# Seconds a fetched EUR/USD rate is reused, shared by all clients in the process
+EUR_USD_RATE_TTL = 30
+_eur_usd_rate_cache = (None, 0.0)  # (rate, monotonic fetch time)
+
 class OTCClient:
     """Client for purchasing assets via OTC API"""
     
@@ -30,6 +43,27 @@ class OTCClient:
         """
         self.account = Account.from_key(private_key)
         self.server_url = server_url.rstrip("/")
+        
+        # One keep-alive session for the whole x402 flow (one TLS handshake per host)
+        self._http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(502, 503, 504)),
+        )
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        
+        # The paid request settles on-chain and must never be replayed, so it
+        # gets its own session without retries
+        self._payment_http = requests.Session()
+        payment_adapter = HTTPAdapter(max_retries=0)
+        self._payment_http.mount("http://", payment_adapter)
+        self._payment_http.mount("https://", payment_adapter)
+        
+        # Runs the rate lookup and balance read while the payment requirements are requested
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="otc-client")
+        
         print(f"Client initialized as buyer: {self.account.address}")
     
     def buy_asset(self, asset_amount: int, max_eurc_budget: Optional[int] = None) -> Dict[str, Any]:
@@ -49,6 +83,13 @@ class OTCClient:
         print(f"Asset Amount: {asset_amount / 10**18} YPS")
         print(f"Buyer: {self.account.address}")
         
+        # The EUR/USD rate and the MockEURC balance don't depend on the quote,
+        # so both round-trips run in the background while Step 1 is in flight
+        rate_future = self._pool.submit(self._get_eur_usd_rate)
+        balance_future = self._pool.submit(
+            web3_utils.get_balance, self.account.address, config.MOCK_EURC_ADDRESS
+        )
+        
         # Step 1: Initial request to get payment requirements
         print(f"\n[STEP 1] Requesting payment requirements...")
         payment_req = self._request_payment_requirements(asset_amount)
@@ -62,7 +103,7 @@ class OTCClient:
         
         # Step 2: Calculate EUR/USD rate and determine max EURC budget
         print(f"\n[STEP 2] Calculating EUR/USD rate...")
-        eur_usd_rate = self._get_eur_usd_rate()
+        eur_usd_rate = rate_future.result()
         print(f"EUR/USD Rate: {eur_usd_rate}")
         
         # Calculate max EURC willing to pay (add buffer for slippage)
@@ -77,7 +118,7 @@ class OTCClient:
         
         # Step 3: Check balance
         print(f"\n[STEP 3] Checking MockEURC balance...")
-        eurc_balance = web3_utils.get_balance(self.account.address, config.MOCK_EURC_ADDRESS)
+        eurc_balance = balance_future.result()
         print(f"MockEURC Balance: {eurc_balance / 10**6}")
         
         if eurc_balance < max_eurc_budget:
@@ -96,29 +137,35 @@ class OTCClient:
             private_key=self.account.key.hex(),
         )
         
-        permit_sig = PermitSignature(
-            deadline=deadline,
-            v=v,
-            r=r.hex(),
-            s=s.hex(),
-        )
-        
-        print(f"Permit signature created (deadline: {datetime.fromtimestamp(deadline)})")
-        
-        # Step 5: Create payment proof
-        print(f"\n[STEP 5] Creating x402 payment proof...")
-        payment_proof = X402PaymentProof(
-            client_address=self.account.address,
-            payment_token=config.MOCK_EURC_ADDRESS,
-            payment_token_symbol="MockEURC",
-            max_payment_amount=max_eurc_budget,
-            permit_signature=permit_sig.model_dump(),
-            timestamp=int(time.time()),
-        )
-        
-        # Step 6: Submit payment and execute settlement
-        print(f"\n[STEP 6] Submitting payment to server...")
-        settlement_result = self._submit_payment(asset_amount, payment_proof)
+        try:
+            permit_sig = PermitSignature(
+                deadline=deadline,
+                v=v,
+                r=r.hex(),
+                s=s.hex(),
+            )
+            
+            print(f"Permit signature created (deadline: {datetime.fromtimestamp(deadline)})")
+            
+            # Step 5: Create payment proof
+            print(f"\n[STEP 5] Creating x402 payment proof...")
+            payment_proof = X402PaymentProof(
+                client_address=self.account.address,
+                payment_token=config.MOCK_EURC_ADDRESS,
+                payment_token_symbol="MockEURC",
+                max_payment_amount=max_eurc_budget,
+                permit_signature=permit_sig.model_dump(),
+                timestamp=int(time.time()),
+            )
+            
+            # Step 6: Submit payment and execute settlement
+            print(f"\n[STEP 6] Submitting payment to server...")
+            settlement_result = self._submit_payment(asset_amount, payment_proof)
+        except Exception:
+            # The local permit nonce may be ahead of the chain (permit never
+            # submitted) or behind it; resync from chain on the next signature
+            web3_utils.reset_permit_nonce(config.MOCK_EURC_ADDRESS, self.account.address)
+            raise
         
         print(f"\n{'='*60}")
         print(f"SETTLEMENT CREATED")
@@ -141,7 +188,7 @@ class OTCClient:
         url = f"{self.server_url}/buy-asset?amount={asset_amount}"
         
         try:
-            response = requests.get(url)
+            response = self._http.get(url, timeout=HTTP_TIMEOUT)
             
             if response.status_code == 402:
                 # Expected 402 Payment Required
@@ -149,7 +196,7 @@ class OTCClient:
                 payment_req_data = data.get("payment_requirement")
                 
                 if payment_req_data:
-                    return X402PaymentRequirement(**payment_req_data)
+                    return X402PaymentRequirement.model_validate(payment_req_data)
             else:
                 print(f"Unexpected status code: {response.status_code}")
                 print(f"Response: {response.text}")
@@ -169,7 +216,7 @@ class OTCClient:
         url = f"{self.server_url}/buy-asset?amount={asset_amount}"
         
         # Create X-PAYMENT header
-        payment_header = create_x402_payment_header(payment_proof)
+        payment_header = create_x402_payment_header_bytes(payment_proof)
         
         headers = {
             "X-PAYMENT": payment_header,
@@ -177,7 +224,7 @@ class OTCClient:
         }
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self._payment_http.get(url, headers=headers, timeout=PAYMENT_TIMEOUT)
             
             if response.status_code == 200:
                 return response.json()
@@ -192,19 +239,26 @@ class OTCClient:
     
     def _get_eur_usd_rate(self) -> float:
         """
-        Get EUR/USD exchange rate from API
+        Get EUR/USD exchange rate from API (cached for EUR_USD_RATE_TTL seconds)
         
         Returns:
             EUR/USD rate
         """
+        global _eur_usd_rate_cache
+        
+        rate, fetched_at = _eur_usd_rate_cache
+        if rate is not None and time.monotonic() - fetched_at < EUR_USD_RATE_TTL:
+            return rate
+        
         try:
-            response = requests.get(config.EUR_USD_PRICE_API_URL, timeout=10)
+            response = self._http.get(config.EUR_USD_PRICE_API_URL, timeout=HTTP_TIMEOUT)
             
             if response.status_code == 200:
                 data = response.json()
                 # The API returns rates with EUR as base
                 # We want USD rate (how many USD per EUR)
                 usd_rate = data.get("rates", {}).get("USD", 1.10)
+                _eur_usd_rate_cache = (usd_rate, time.monotonic())
                 return usd_rate
             else:
                 print(f"Warning: Failed to get EUR/USD rate, using default 1.10")
@@ -227,7 +281,7 @@ class OTCClient:
         url = f"{self.server_url}/settlement/{settlement_id}"
         
         try:
-            response = requests.get(url)
+            response = self._http.get(url, timeout=HTTP_TIMEOUT)
             
             if response.status_code == 200:
                 return response.json()
@@ -2,6 +2,7 @@
 Configuration module for OTC API system
 """
 import os
+import sys
 from typing import Dict, Any
 from dotenv import load_dotenv
 
@@ -9,42 +10,71 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Network Configuration
-POLYGON_AMOY_RPC_URL = os.getenv("POLYGON_AMOY_RPC_URL", "https://rpc-amoy.polygon.technology/")
 CHAIN_ID = 80002  # Polygon Amoy
 
-# Private Keys
-SELLER_PRIVATE_KEY = os.getenv("SELLER_PRIVATE_KEY", "")
-BUYER_PRIVATE_KEY = os.getenv("BUYER_PRIVATE_KEY", "")
-FACILITATOR_PRIVATE_KEY = os.getenv("PRIVATE_KEY", "")
-
-# Contract Addresses
-MOCK_USDC_ADDRESS = os.getenv("MOCK_USDC_ADDRESS_POLYGON", "")
-MOCK_EURC_ADDRESS = os.getenv("MOCK_EURC_ADDRESS_POLYGON", "")
-YIELD_POOL_SHARE_ADDRESS = os.getenv("YIELD_POOL_SHARE_ADDRESS", "")
-SETTLEMENT_VAULT_ADDRESS = os.getenv("SETTLEMENT_VAULT_ADDRESS", "")
-PERMIT_PULLER_ADDRESS = os.getenv("PERMIT_PULLER_ADDRESS", "")
-FACILITATOR_HOOK_ADDRESS = os.getenv("FACILITATOR_HOOK_ADDRESS", "")
-
-# API Configuration
-EUR_USD_PRICE_API_URL = os.getenv("EUR_USD_PRICE_API_URL", "https://api.exchangerate-api.com/v4/latest/EUR")
-HTTP_SERVER_PORT = int(os.getenv("HTTP_SERVER_PORT", "8402"))
-HTTP_SERVER_HOST = os.getenv("HTTP_SERVER_HOST", "0.0.0.0")
-
-# Finality Configuration
-FINALITY_CONFIRMATIONS = int(os.getenv("FINALITY_CONFIRMATIONS", "10"))
-FINALITY_CHECK_INTERVAL_SECONDS = int(os.getenv("FINALITY_CHECK_INTERVAL_SECONDS", "30"))
+# Extra dataclass options: slots=True needs Python 3.10+, older interpreters skip it
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 # Token Decimals
 MOCK_USDC_DECIMALS = 6
 MOCK_EURC_DECIMALS = 6
 YIELD_POOL_SHARE_DECIMALS = 18
 
+# Environment-backed settings: name -> (environment variable, default, type).
+# They are resolved on attribute access (PEP 562 __getattr__), so importing this
+# module reads nothing and a changed environment is picked up without a reload.
+_ENV_SETTINGS = {
+    # Network Configuration
+    "POLYGON_AMOY_RPC_URL": ("POLYGON_AMOY_RPC_URL", "https://rpc-amoy.polygon.technology/", str),
+    "POLYGON_AMOY_WS_URL": ("POLYGON_AMOY_WS_URL", "", str),  # Optional; enables newHeads push in the facilitator
+    
+    # Private Keys
+    "SELLER_PRIVATE_KEY": ("SELLER_PRIVATE_KEY", "", str),
+    "BUYER_PRIVATE_KEY": ("BUYER_PRIVATE_KEY", "", str),
+    "FACILITATOR_PRIVATE_KEY": ("PRIVATE_KEY", "", str),
+    
+    # Contract Addresses
+    "MOCK_USDC_ADDRESS": ("MOCK_USDC_ADDRESS_POLYGON", "", str),
+    "MOCK_EURC_ADDRESS": ("MOCK_EURC_ADDRESS_POLYGON", "", str),
+    "YIELD_POOL_SHARE_ADDRESS": ("YIELD_POOL_SHARE_ADDRESS", "", str),
+    "SETTLEMENT_VAULT_ADDRESS": ("SETTLEMENT_VAULT_ADDRESS", "", str),
+    "PERMIT_PULLER_ADDRESS": ("PERMIT_PULLER_ADDRESS", "", str),
+    "FACILITATOR_HOOK_ADDRESS": ("FACILITATOR_HOOK_ADDRESS", "", str),
+    
+    # API Configuration
+    "EUR_USD_PRICE_API_URL": ("EUR_USD_PRICE_API_URL", "https://api.exchangerate-api.com/v4/latest/EUR", str),
+    "HTTP_SERVER_PORT": ("HTTP_SERVER_PORT", "8402", int),
+    "HTTP_SERVER_HOST": ("HTTP_SERVER_HOST", "0.0.0.0", str),
+    
+    # Finality Configuration
+    "FINALITY_CONFIRMATIONS": ("FINALITY_CONFIRMATIONS", "10", int),
+    "FINALITY_CHECK_INTERVAL_SECONDS": ("FINALITY_CHECK_INTERVAL_SECONDS", "30", int),
+    
+    # Facilitator state (last processed block), replayed from on restart
+    "FACILITATOR_STATE_FILE": ("FACILITATOR_STATE_FILE", ".facilitator_state.json", str),
+}
+
+def _setting(name: str) -> Any:
+    """Read an environment-backed setting from the current environment"""
+    try:
+        env_var, default, cast = _ENV_SETTINGS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    return cast(os.getenv(env_var, default))
+
+def __getattr__(name: str) -> Any:
+    """Resolve config.<SETTING> lazily on attribute access"""
+    return _setting(name)
+
+def __dir__():
+    return sorted(list(globals()) + list(_ENV_SETTINGS))
+
 def validate_config() -> bool:
     """Validate that all required configuration is present"""
     required_vars = {
-        "POLYGON_AMOY_RPC_URL": POLYGON_AMOY_RPC_URL,
-        "MOCK_USDC_ADDRESS": MOCK_USDC_ADDRESS,
-        "MOCK_EURC_ADDRESS": MOCK_EURC_ADDRESS,
+        "POLYGON_AMOY_RPC_URL": _setting("POLYGON_AMOY_RPC_URL"),
+        "MOCK_USDC_ADDRESS": _setting("MOCK_USDC_ADDRESS"),
+        "MOCK_EURC_ADDRESS": _setting("MOCK_EURC_ADDRESS"),
     }
     
     missing = [name for name, value in required_vars.items() if not value]
@@ -59,25 +89,26 @@ def get_config_summary() -> Dict[str, Any]:
     """Get a summary of current configuration"""
     return {
         "network": {
-            "rpc_url": POLYGON_AMOY_RPC_URL,
+            "rpc_url": _setting("POLYGON_AMOY_RPC_URL"),
+            "ws_url": _setting("POLYGON_AMOY_WS_URL"),
             "chain_id": CHAIN_ID,
         },
         "contracts": {
-            "mock_usdc": MOCK_USDC_ADDRESS,
-            "mock_eurc": MOCK_EURC_ADDRESS,
-            "yield_pool_share": YIELD_POOL_SHARE_ADDRESS,
-            "settlement_vault": SETTLEMENT_VAULT_ADDRESS,
-            "permit_puller": PERMIT_PULLER_ADDRESS,
-            "facilitator_hook": FACILITATOR_HOOK_ADDRESS,
+            "mock_usdc": _setting("MOCK_USDC_ADDRESS"),
+            "mock_eurc": _setting("MOCK_EURC_ADDRESS"),
+            "yield_pool_share": _setting("YIELD_POOL_SHARE_ADDRESS"),
+            "settlement_vault": _setting("SETTLEMENT_VAULT_ADDRESS"),
+            "permit_puller": _setting("PERMIT_PULLER_ADDRESS"),
+            "facilitator_hook": _setting("FACILITATOR_HOOK_ADDRESS"),
         },
         "api": {
-            "eur_usd_api": EUR_USD_PRICE_API_URL,
-            "server_host": HTTP_SERVER_HOST,
-            "server_port": HTTP_SERVER_PORT,
+            "eur_usd_api": _setting("EUR_USD_PRICE_API_URL"),
+            "server_host": _setting("HTTP_SERVER_HOST"),
+            "server_port": _setting("HTTP_SERVER_PORT"),
         },
         "finality": {
-            "confirmations": FINALITY_CONFIRMATIONS,
-            "check_interval": FINALITY_CHECK_INTERVAL_SECONDS,
+            "confirmations": _setting("FINALITY_CONFIRMATIONS"),
+            "check_interval": _setting("FINALITY_CHECK_INTERVAL_SECONDS"),
         }
     }
 
@@ -2,11 +2,15 @@
 OTC API HTTP Server implementing x402 protocol
 Seller-side server that exposes assets for sale via HTTP
 """
-import json
 import time
-from typing import Dict, Optional
-from flask import Flask, request, jsonify
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import Dict
+import orjson
+from quart import Quart, request, jsonify
+from quart.json.provider import DefaultJSONProvider
 from eth_account import Account
+from eth_utils import event_abi_to_log_topic
 import config
 import web3_utils
 from x402_types import (
@@ -17,25 +21,71 @@ from x402_types import (
     SettlementResponse,
 )
 
-app = Flask(__name__)
+# ASGI app: handlers await blocking web3 calls in worker threads, so one
+# process keeps serving other requests while a settlement transaction mines
+app = Quart(__name__)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Serialize responses with orjson. orjson rejects integers wider than 64 bits
+    (e.g. 18-decimal asset amounts), so those payloads fall back to the stdlib
+    encoder. Request bodies keep the stdlib parser, since orjson would turn such
+    integers into floats.
+    """
+    
+    def dumps(self, obj, **kwargs) -> str:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
+app.json = OrjsonProvider(app)
+
+# Pricing: 1.10 USDC per YPS token. Amounts are computed in integer base units
+# (YPS 18 decimals, USDC/EURC 6) so quotes carry no float rounding.
+PRICE_PER_UNIT_USDC = 1.10
+PRICE_USDC_UNITS = 1_100_000  # PRICE_PER_UNIT_USDC in USDC base units
+YPS_UNIT = 10 ** config.YIELD_POOL_SHARE_DECIMALS
+# Max EURC the client must authorize: required USDC x 1.21 (EUR/USD rate plus a 10% buffer)
+EURC_BUFFER_NUM, EURC_BUFFER_DEN = 121, 100
+
+def quote(asset_amount: int) -> tuple:
+    """(required USDC, max EURC) in base units for an asset amount"""
+    required_usdc = asset_amount * PRICE_USDC_UNITS // YPS_UNIT
+    return required_usdc, required_usdc * EURC_BUFFER_NUM // EURC_BUFFER_DEN
+
+@dataclass(**config.DATACLASS_SLOTS)
+class ActiveSettlement:
+    """A settlement created by this server, as reported by /settlement/<id>"""
+    client: str
+    asset_amount: int
+    required_usdc: int
+    max_eurc: int
+    status: str
+    created_at: int
 
 # Global state
-active_settlements: Dict[str, Dict] = {}
+active_settlements: Dict[str, ActiveSettlement] = {}
 seller_account = None
+vault_contract = None
+settlement_created_topic = None  # topic0 of SettlementCreated, derived once from the ABI
 
-def init_server():
-    """Initialize server with seller account"""
-    global seller_account
+@app.before_serving
+async def init_server():
+    """Initialize server with seller account (runs once per worker, before it accepts requests)"""
+    global seller_account, vault_contract, settlement_created_topic
     
     if not config.SELLER_PRIVATE_KEY:
         raise ValueError("SELLER_PRIVATE_KEY not configured")
     
     seller_account = Account.from_key(config.SELLER_PRIVATE_KEY)
+    vault_contract = web3_utils.load_contract("SettlementVault", config.SETTLEMENT_VAULT_ADDRESS)
+    settlement_created_topic = bytes(event_abi_to_log_topic(vault_contract.events.SettlementCreated.abi))
     print(f"Server initialized as seller: {seller_account.address}")
     print(f"Server listening on {config.HTTP_SERVER_HOST}:{config.HTTP_SERVER_PORT}")
 
 @app.route("/health", methods=["GET"])
-def health():
+async def health():
     """Health check endpoint"""
     return jsonify({
         "status": "healthy",
@@ -44,7 +94,7 @@ def health():
     })
 
 @app.route("/buy-asset", methods=["GET", "POST"])
-def buy_asset():
+async def buy_asset():
     """
     Main OTC endpoint to purchase assets
     
@@ -72,13 +122,13 @@ def buy_asset():
             return handle_payment_required(asset_amount)
         else:
             # Payment header provided, validate and process
-            return handle_payment_submitted(asset_amount, payment_header)
+            return await handle_payment_submitted(asset_amount, payment_header)
     
     elif request.method == "POST":
         # POST request with JSON body
         try:
-            data = request.get_json()
-            settlement_request = SettlementRequest(**data)
+            # Parsed and validated in one pass by pydantic-core, straight from the body bytes
+            settlement_request = SettlementRequest.model_validate_json(await request.get_data())
         except Exception as e:
             return jsonify({"error": f"Invalid request: {str(e)}"}), 400
         
@@ -88,7 +138,7 @@ def buy_asset():
         if not payment_header:
             return handle_payment_required(settlement_request.asset_amount)
         else:
-            return handle_payment_submitted(settlement_request.asset_amount, payment_header)
+            return await handle_payment_submitted(settlement_request.asset_amount, payment_header)
 
 def handle_payment_required(asset_amount: int) -> tuple:
     """
@@ -96,13 +146,10 @@ def handle_payment_required(asset_amount: int) -> tuple:
     
     Returns: (response, status_code, headers)
     """
-    # Calculate price (example: 1.10 USDC per YPS token)
-    price_per_unit_usdc = 1.10
-    
     # Create payment requirement
     payment_req = create_x402_payment_requirement(
         asset_amount=asset_amount,
-        price_per_unit_usdc=price_per_unit_usdc,
+        price_per_unit_usdc=PRICE_PER_UNIT_USDC,
         seller_address=seller_account.address,
         asset_token_address=config.YIELD_POOL_SHARE_ADDRESS,
         settlement_vault_address=config.SETTLEMENT_VAULT_ADDRESS,
@@ -117,7 +164,7 @@ def handle_payment_required(asset_amount: int) -> tuple:
     
     return jsonify(response_body), status_code, headers
 
-def handle_payment_submitted(asset_amount: int, payment_header: str) -> tuple:
+async def handle_payment_submitted(asset_amount: int, payment_header: str) -> tuple:
     """
     Handle request with payment proof - execute settlement
     
@@ -132,14 +179,8 @@ def handle_payment_submitted(asset_amount: int, payment_header: str) -> tuple:
     print(f"\n[PAYMENT] Received payment proof from {payment_proof.client_address}")
     print(f"Max EURC payment: {payment_proof.max_payment_amount / 10**6}")
     
-    # Calculate required USDC
-    price_per_unit_usdc = 1.10
-    asset_human = asset_amount / (10 ** 18)
-    required_usdc_human = asset_human * price_per_unit_usdc
-    required_usdc = int(required_usdc_human * (10 ** 6))
-    
-    # Calculate max EURC (add 10% buffer for exchange rate)
-    max_eurc = int(required_usdc * 1.10 * 1.1)
+    # Calculate required USDC and max EURC (exchange rate plus 10% buffer)
+    required_usdc, max_eurc = quote(asset_amount)
     
     # Validate payment proof
     if payment_proof.max_payment_amount < max_eurc:
@@ -152,7 +193,7 @@ def handle_payment_submitted(asset_amount: int, payment_header: str) -> tuple:
     
     # Create settlement on-chain
     try:
-        settlement_id = create_settlement(
+        settlement_id = await create_settlement(
             client_address=payment_proof.client_address,
             asset_amount=asset_amount,
             required_usdc=required_usdc,
@@ -160,14 +201,14 @@ def handle_payment_submitted(asset_amount: int, payment_header: str) -> tuple:
         )
         
         # Store settlement info
-        active_settlements[settlement_id] = {
-            "client": payment_proof.client_address,
-            "asset_amount": asset_amount,
-            "required_usdc": required_usdc,
-            "max_eurc": max_eurc,
-            "status": "pending",
-            "created_at": int(time.time()),
-        }
+        active_settlements[settlement_id] = ActiveSettlement(
+            client=payment_proof.client_address,
+            asset_amount=asset_amount,
+            required_usdc=required_usdc,
+            max_eurc=max_eurc,
+            status="pending",
+            created_at=int(time.time()),
+        )
         
         response = SettlementResponse(
             settlement_id=settlement_id,
@@ -186,7 +227,7 @@ def handle_payment_submitted(asset_amount: int, payment_header: str) -> tuple:
         print(f"[ERROR] Failed to create settlement: {e}")
         return jsonify({"error": f"Settlement failed: {str(e)}"}), 500
 
-def create_settlement(
+async def create_settlement(
     client_address: str,
     asset_amount: int,
     required_usdc: int,
@@ -197,14 +238,12 @@ def create_settlement(
     
     Returns: settlement_id (bytes32 as hex string)
     """
-    # Load vault contract
-    vault_abi = web3_utils.load_abi("SettlementVault")
-    vault = web3_utils.get_contract(config.SETTLEMENT_VAULT_ADDRESS, vault_abi)
-    
-    # Create settlement transaction
+    # Create settlement transaction. Concurrent orders are serialized on the
+    # sender's nonce counter in web3_utils.send_transaction.
     # Note: This assumes the seller/facilitator has permission to create settlements
-    tx_hash = web3_utils.send_transaction(
-        contract=vault,
+    tx_hash = await asyncio.to_thread(
+        web3_utils.send_transaction,
+        contract=vault_contract,
         function_name="createSettlement",
         args=[
             client_address,
@@ -220,30 +259,32 @@ def create_settlement(
     print(f"[TX] Settlement creation tx: {tx_hash}")
     
     # Wait for transaction
-    receipt = web3_utils.wait_for_transaction(tx_hash)
+    receipt = await asyncio.to_thread(web3_utils.wait_for_transaction_ws, tx_hash)
     
-    # Extract settlement ID from logs
-    # Parse SettlementCreated event
-    settlement_created_event = vault.events.SettlementCreated()
-    logs = settlement_created_event.process_receipt(receipt)
+    # Extract settlement ID from the SettlementCreated log. settlementId is the
+    # first indexed argument, so it is topics[1] as-is and nothing needs ABI decoding.
+    for log in receipt['logs']:
+        topics = log['topics']
+        if log['address'] == vault_contract.address and topics and bytes(topics[0]) == settlement_created_topic:
+            return web3_utils.settlement_id_hex(topics[1])
     
-    if logs:
-        settlement_id = logs[0]['args']['settlementId'].hex()
-        return settlement_id
-    else:
-        raise Exception("Failed to get settlement ID from transaction")
+    raise Exception("Failed to get settlement ID from transaction")
 
 @app.route("/settlement/<settlement_id>", methods=["GET"])
-def get_settlement(settlement_id: str):
+async def get_settlement(settlement_id: str):
     """Get settlement status"""
+    try:
+        id_bytes = web3_utils.settlement_id_bytes(settlement_id)
+    except ValueError:
+        return jsonify({"error": "Settlement not found"}), 404
+    settlement_id = web3_utils.settlement_id_hex(id_bytes)
     
     if settlement_id not in active_settlements:
         # Try to fetch from contract
         try:
-            vault_abi = web3_utils.load_abi("SettlementVault")
-            vault = web3_utils.get_contract(config.SETTLEMENT_VAULT_ADDRESS, vault_abi)
-            
-            settlement_data = vault.functions.getSettlement(bytes.fromhex(settlement_id[2:])).call()
+            settlement_data = await asyncio.to_thread(
+                vault_contract.functions.getSettlement(id_bytes).call
+            )
             
             return jsonify({
                 "settlement_id": settlement_id,
@@ -253,15 +294,17 @@ def get_settlement(settlement_id: str):
         except Exception as e:
             return jsonify({"error": "Settlement not found"}), 404
     
-    return jsonify(active_settlements[settlement_id])
+    return jsonify(asdict(active_settlements[settlement_id]))
 
 def run_server():
-    """Run the Flask server"""
-    init_server()
+    """
+    Run the server for local development (Quart's built-in Hypercorn runner).
+    In production run Hypercorn directly: hypercorn -b 0.0.0.0:8402 server:app
+    """
     app.run(
         host=config.HTTP_SERVER_HOST,
         port=config.HTTP_SERVER_PORT,
-        debug=True,
+        debug=False,
     )
 
 if __name__ == "__main__":
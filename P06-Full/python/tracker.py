@@ -4,17 +4,109 @@ Tracks and displays settlement progress in real-time
 """
 import time
 import json
-from typing import Dict, List, Any
-from flask import Flask, render_template_string, jsonify
-from threading import Thread
+import hashlib
+import asyncio
+import orjson
+from collections import deque
+from itertools import islice, takewhile
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+from quart import Quart, Response, make_response, request
+from eth_utils import event_abi_to_log_topic
+from web3 import AsyncWeb3, Web3, WebsocketProviderV2
+from eth_abi import decode as abi_decode
 import config
 import web3_utils
+from web3_utils import async_w3
 
-app = Flask(__name__)
+# ASGI app; the event tracker runs as a task on the same event loop
+app = Quart(__name__)
 
-# Global event storage
-events: List[Dict[str, Any]] = []
+# Settlements per /api/data page, by default and at most
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+
+# Block span of each eth_getLogs when catching up: halved when the node rejects
+# a range as too large or returns more than LOGS_PER_REQUEST_HIGH logs, doubled (up to
+# MAX_LOG_STRIDE) when a range returns fewer than LOGS_PER_REQUEST_LOW
+INITIAL_LOG_STRIDE = 500
+MAX_LOG_STRIDE = 5000
+LOGS_PER_REQUEST_LOW = 100
+LOGS_PER_REQUEST_HIGH = 1000
+
+# Fragments of eth_getLogs errors meaning the range or result set is too large
+# (geth/Infura -32005 result caps, Alchemy size caps, block-range caps). Rate
+# limits share -32005, so the code alone doesn't count.
+RANGE_ERROR_HINTS = (
+    "query returned more than",
+    "response size exceeded",
+    "block range",
+    "range is too",
+    "range too",
+)
+
+def is_range_error(error: Exception) -> bool:
+    """Whether an eth_getLogs failure says the block range is too large"""
+    detail = error.args[0] if error.args else None
+    message = detail.get("message", "") if isinstance(detail, dict) else str(error)
+    return any(hint in str(message).lower() for hint in RANGE_ERROR_HINTS)
+
+# Global event storage (settlements in creation order). Only the newest
+# MAX_EVENTS events are kept; total_events counts all of them.
+# The tracker task and the request handlers share the app's event loop thread
+# and never await while reading or mutating this state, so it needs no lock.
+MAX_EVENTS = 1000
+events: Deque[Dict[str, Any]] = deque(maxlen=MAX_EVENTS)
+total_events = 0
 settlements: Dict[str, Dict[str, Any]] = {}
+state_version = 0  # bumped on every published change
+
+# Serialized /api/data pages by (offset, limit) with their ETags, valid while
+# the state version is unchanged (a new block is a published change too)
+_data_cache: Dict[Tuple[int, int], Tuple[bytes, str]] = {}
+_data_cache_version = -1
+
+# /api/stream: updates are serialized once when published, coalesced for
+# STREAM_COALESCE_SECONDS into one frame (a JSON array of updates), and the
+# same frame bytes are queued for every client. A client that falls
+# STREAM_QUEUE_SIZE frames behind is told to reload its snapshot instead.
+STREAM_QUEUE_SIZE = 100
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_COALESCE_SECONDS = 0.05
+STREAM_RESYNC_FRAME = b'data: [{"resync": true}]\n\n'
+stream_subscribers: Set[asyncio.Queue] = set()
+_pending_updates: List[bytes] = []
+
+def _dumps(obj: Any) -> bytes:
+    """
+    Serialize with orjson. orjson rejects integers wider than 64 bits (e.g.
+    18-decimal asset amounts), so those payloads fall back to the stdlib encoder.
+    """
+    try:
+        return orjson.dumps(obj)
+    except TypeError:
+        return json.dumps(obj).encode()
+
+def publish(update: Dict[str, Any]):
+    """Record a state change and queue it for the next /api/stream frame"""
+    global state_version
+    state_version += 1
+    if not stream_subscribers:
+        return
+    if not _pending_updates:
+        asyncio.get_running_loop().call_later(STREAM_COALESCE_SECONDS, _flush_updates)
+    _pending_updates.append(_dumps(update))
+
+def _flush_updates():
+    """Send the updates published in the last coalescing window to every stream client as one frame"""
+    frame = b"data: [" + b",".join(_pending_updates) + b"]\n\n"
+    _pending_updates.clear()
+    for queue in stream_subscribers:
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(STREAM_RESYNC_FRAME)
+        else:
+            queue.put_nowait(frame)
 
 # HTML Template with embedded CSS/JS
 HTML_TEMPLATE = """
@@ -110,6 +202,7 @@ HTML_TEMPLATE = """
             background: #f8f9fa;
             border-radius: 5px;
             animation: slideIn 0.3s ease-out;
+            contain: layout style paint;
         }
         
         @keyframes slideIn {
@@ -149,6 +242,25 @@ HTML_TEMPLATE = """
             border-radius: 8px;
             background: white;
             transition: all 0.3s ease;
+            contain: layout style paint;
+        }
+        
+        /* Settlements are virtualized: only rows in view are in the DOM,
+           absolutely positioned at index * SETTLEMENT_ROW_HEIGHT (230px + 15px gap) */
+        .virtual-list {
+            position: relative;
+            height: 640px;
+            overflow-y: auto;
+        }
+        
+        .virtual-list .settlement {
+            position: absolute;
+            left: 0;
+            right: 0;
+            height: 230px;
+            margin-bottom: 0;
+            /* Overscan rows outside the viewport skip rendering entirely */
+            content-visibility: auto;
         }
         
         .settlement:hover {
@@ -281,11 +393,12 @@ HTML_TEMPLATE = """
         <div class="content">
             <div class="panel">
                 <h2>📊 Active Settlements</h2>
-                <div id="settlements">
-                    <div class="empty-state">
-                        <div class="empty-state-icon">📦</div>
-                        <p>No settlements yet</p>
-                    </div>
+                <div class="empty-state" id="settlementsEmpty">
+                    <div class="empty-state-icon">📦</div>
+                    <p>No settlements yet</p>
+                </div>
+                <div id="settlements" class="virtual-list" hidden>
+                    <div class="virtual-spacer"></div>
                 </div>
             </div>
             
@@ -302,76 +415,233 @@ HTML_TEMPLATE = """
     </div>
     
     <script>
-        function updateData() {
-            fetch('/api/data')
+        // The page bootstraps from /api/data (newest settlements first, recent
+        // events), then applies the updates pushed over /api/stream. Updates
+        // only change state; the DOM is patched once per animation frame, and
+        // only for rows that changed. Only the settlement rows in view (plus
+        // OVERSCAN_ROWS) are rendered; older pages load as the list scrolls.
+        const SETTLEMENTS_PAGE_SIZE = 20;
+        const SETTLEMENT_ROW_HEIGHT = 245;
+        const OVERSCAN_ROWS = 3;
+        const EVENTS_SHOWN = 10;
+        const EVENTS_EMPTY = '<div class="empty-state"><div class="empty-state-icon">🔍</div><p>Waiting for events...</p></div>';
+        
+        let settlementsById = {};
+        let settlementOrder = [];  // settlement IDs, newest first
+        let recentEvents = [];
+        let stats = {totalSettlements: 0, totalEvents: 0, currentBlock: '-'};
+        
+        const settlementNodes = new Map();  // settlement ID -> rendered .settlement element (rows in view)
+        let loadingMore = false;
+        let newEvents = [];  // events received since the last frame
+        let eventsStale = true;  // rebuild the event list instead of prepending newEvents
+        let renderScheduled = false;
+        
+        function loadSnapshot() {
+            fetch(`/api/data?limit=${SETTLEMENTS_PAGE_SIZE}`)
                 .then(response => response.json())
                 .then(data => {
-                    // Update stats
-                    document.getElementById('totalSettlements').textContent = data.total_settlements;
-                    document.getElementById('totalEvents').textContent = data.total_events;
-                    document.getElementById('currentBlock').textContent = data.current_block;
-                    document.getElementById('eventCount').textContent = data.total_events;
-                    
-                    // Update settlements
-                    const settlementsDiv = document.getElementById('settlements');
-                    if (Object.keys(data.settlements).length === 0) {
-                        settlementsDiv.innerHTML = '<div class="empty-state"><div class="empty-state-icon">📦</div><p>No settlements yet</p></div>';
-                    } else {
-                        let html = '';
-                        for (const [id, settlement] of Object.entries(data.settlements)) {
-                            const progress = getProgress(settlement.status);
-                            html += `
-                                <div class="settlement">
-                                    <div class="settlement-header">
-                                        <div class="settlement-id">${id.substring(0, 16)}...</div>
-                                        <div class="status status-${settlement.status}">${settlement.status}</div>
-                                    </div>
-                                    <div class="settlement-info">
-                                        <div class="info-item">
-                                            <div class="info-label">Client</div>
-                                            <div class="info-value">${settlement.client ? settlement.client.substring(0, 10) + '...' : 'N/A'}</div>
-                                        </div>
-                                        <div class="info-item">
-                                            <div class="info-label">Seller</div>
-                                            <div class="info-value">${settlement.seller ? settlement.seller.substring(0, 10) + '...' : 'N/A'}</div>
-                                        </div>
-                                        <div class="info-item">
-                                            <div class="info-label">Asset Amount</div>
-                                            <div class="info-value">${(settlement.asset_amount / 1e18).toFixed(2)} YPS</div>
-                                        </div>
-                                        <div class="info-item">
-                                            <div class="info-label">Required USDC</div>
-                                            <div class="info-value">${(settlement.required_usdc / 1e6).toFixed(2)} USDC</div>
-                                        </div>
-                                    </div>
-                                    <div class="progress-bar">
-                                        <div class="progress-fill" style="width: ${progress}%"></div>
-                                    </div>
-                                </div>
-                            `;
+                    settlementsById = data.settlements;
+                    settlementOrder = Object.keys(data.settlements);
+                    recentEvents = data.events;
+                    stats = {
+                        totalSettlements: data.total_settlements,
+                        totalEvents: data.total_events,
+                        currentBlock: data.current_block,
+                    };
+                    newEvents = [];
+                    eventsStale = true;
+                    scheduleRender();
+                })
+                .catch(error => console.error('Error fetching data:', error));
+        }
+        
+        function applyUpdate(update) {
+            if (update.resync) {
+                loadSnapshot();
+                return;
+            }
+            if (update.current_block !== undefined) {
+                stats.currentBlock = update.current_block;
+                scheduleRender();
+                return;
+            }
+            recentEvents = recentEvents.concat([update.event]).slice(-50);
+            newEvents.push(update.event);
+            stats.totalSettlements = update.total_settlements;
+            stats.totalEvents = update.total_events;
+            
+            if (update.settlement) {
+                if (!(update.settlement_id in settlementsById)) {
+                    settlementOrder.unshift(update.settlement_id);
+                }
+                settlementsById[update.settlement_id] = update.settlement;
+            }
+            scheduleRender();
+        }
+        
+        function scheduleRender() {
+            if (!renderScheduled) {
+                renderScheduled = true;
+                requestAnimationFrame(render);
+            }
+        }
+        
+        function loadMoreSettlements() {
+            if (loadingMore || settlementOrder.length >= stats.totalSettlements) {
+                return;
+            }
+            loadingMore = true;
+            const since = recentEvents.length > 0 ? recentEvents[recentEvents.length - 1].timestamp : 0;
+            fetch(`/api/data?offset=${settlementOrder.length}&limit=${SETTLEMENTS_PAGE_SIZE}&since=${since}`)
+                .then(response => response.json())
+                .then(data => {
+                    loadingMore = false;
+                    let added = 0;
+                    for (const [id, settlement] of Object.entries(data.settlements)) {
+                        if (!(id in settlementsById)) {
+                            settlementsById[id] = settlement;
+                            settlementOrder.push(id);
+                            added++;
                         }
-                        settlementsDiv.innerHTML = html;
                     }
-                    
-                    // Update events
-                    const eventsDiv = document.getElementById('events');
-                    if (data.events.length === 0) {
-                        eventsDiv.innerHTML = '<div class="empty-state"><div class="empty-state-icon">🔍</div><p>Waiting for events...</p></div>';
-                    } else {
-                        let html = '';
-                        for (const event of data.events.slice(-10).reverse()) {
-                            html += `
-                                <div class="event">
-                                    <div class="event-type">${event.type}</div>
-                                    <div class="event-details">${event.details}</div>
-                                    <div class="event-time">${new Date(event.timestamp * 1000).toLocaleTimeString()}</div>
-                                </div>
-                            `;
-                        }
-                        eventsDiv.innerHTML = html;
+                    if (added > 0) {
+                        scheduleRender();
                     }
                 })
-                .catch(error => console.error('Error fetching data:', error));
+                .catch(error => {
+                    loadingMore = false;
+                    console.error('Error fetching settlements:', error);
+                });
+        }
+        
+        function render() {
+            renderScheduled = false;
+            renderSettlements();
+            renderEvents();
+            document.getElementById('totalSettlements').textContent = stats.totalSettlements;
+            document.getElementById('totalEvents').textContent = stats.totalEvents;
+            document.getElementById('eventCount').textContent = stats.totalEvents;
+            document.getElementById('currentBlock').textContent = stats.currentBlock;
+        }
+        
+        function renderSettlements() {
+            const list = document.getElementById('settlements');
+            
+            // Read the viewport before any DOM writes this frame
+            const scrollTop = list.scrollTop;
+            const viewHeight = list.clientHeight || 640;
+            const first = Math.max(0, Math.floor(scrollTop / SETTLEMENT_ROW_HEIGHT) - OVERSCAN_ROWS);
+            const last = Math.min(settlementOrder.length, Math.ceil((scrollTop + viewHeight) / SETTLEMENT_ROW_HEIGHT) + OVERSCAN_ROWS);
+            const visible = new Set(settlementOrder.slice(first, last));
+            
+            document.getElementById('settlementsEmpty').hidden = settlementOrder.length > 0;
+            list.hidden = settlementOrder.length === 0;
+            list.firstElementChild.style.height = `${settlementOrder.length * SETTLEMENT_ROW_HEIGHT}px`;
+            
+            // Drop rows that scrolled out of view, then create, patch and
+            // position the visible ones
+            for (const [id, node] of settlementNodes) {
+                if (!visible.has(id)) {
+                    node.remove();
+                    settlementNodes.delete(id);
+                }
+            }
+            for (let index = first; index < last; index++) {
+                const id = settlementOrder[index];
+                let node = settlementNodes.get(id);
+                if (!node) {
+                    node = createSettlementNode(id, settlementsById[id]);
+                    settlementNodes.set(id, node);
+                    list.appendChild(node);
+                }
+                updateSettlementNode(node, settlementsById[id]);
+                const top = `${index * SETTLEMENT_ROW_HEIGHT}px`;
+                if (node.style.top !== top) {
+                    node.style.top = top;
+                }
+            }
+            
+            if (last >= settlementOrder.length - OVERSCAN_ROWS) {
+                loadMoreSettlements();
+            }
+        }
+        
+        function createSettlementNode(id, settlement) {
+            const wrapper = document.createElement('div');
+            wrapper.innerHTML = `
+                <div class="settlement">
+                    <div class="settlement-header">
+                        <div class="settlement-id">${id.substring(0, 16)}...</div>
+                        <div class="status"></div>
+                    </div>
+                    <div class="settlement-info">
+                        <div class="info-item">
+                            <div class="info-label">Client</div>
+                            <div class="info-value">${settlement.client ? settlement.client.substring(0, 10) + '...' : 'N/A'}</div>
+                        </div>
+                        <div class="info-item">
+                            <div class="info-label">Seller</div>
+                            <div class="info-value">${settlement.seller ? settlement.seller.substring(0, 10) + '...' : 'N/A'}</div>
+                        </div>
+                        <div class="info-item">
+                            <div class="info-label">Asset Amount</div>
+                            <div class="info-value">${(settlement.asset_amount / 1e18).toFixed(2)} YPS</div>
+                        </div>
+                        <div class="info-item">
+                            <div class="info-label">Required USDC</div>
+                            <div class="info-value">${(settlement.required_usdc / 1e6).toFixed(2)} USDC</div>
+                        </div>
+                    </div>
+                    <div class="progress-bar">
+                        <div class="progress-fill"></div>
+                    </div>
+                </div>
+            `;
+            return wrapper.firstElementChild;
+        }
+        
+        function updateSettlementNode(node, settlement) {
+            // Only the status changes once a settlement exists
+            if (node.dataset.status === settlement.status) {
+                return;
+            }
+            node.dataset.status = settlement.status;
+            const status = node.querySelector('.status');
+            status.className = `status status-${settlement.status}`;
+            status.textContent = settlement.status;
+            node.querySelector('.progress-fill').style.width = `${getProgress(settlement.status)}%`;
+        }
+        
+        function renderEvents() {
+            const eventsDiv = document.getElementById('events');
+            if (eventsStale) {
+                eventsStale = false;
+                newEvents = [];
+                eventsDiv.replaceChildren(...recentEvents.slice(-EVENTS_SHOWN).reverse().map(createEventNode));
+            } else if (newEvents.length > 0) {
+                // Only the new rows are created (and play the slide-in animation)
+                eventsDiv.querySelector('.empty-state')?.remove();
+                eventsDiv.prepend(...newEvents.slice(-EVENTS_SHOWN).reverse().map(createEventNode));
+                newEvents = [];
+                while (eventsDiv.children.length > EVENTS_SHOWN) {
+                    eventsDiv.lastElementChild.remove();
+                }
+            }
+            if (eventsDiv.children.length === 0) {
+                eventsDiv.innerHTML = EVENTS_EMPTY;
+            }
+        }
+        
+        function createEventNode(event) {
+            const node = document.createElement('div');
+            node.className = 'event';
+            node.innerHTML = `
+                <div class="event-type">${event.type}</div>
+                <div class="event-details">${event.details}</div>
+                <div class="event-time">${new Date(event.timestamp * 1000).toLocaleTimeString()}</div>
+            `;
+            return node;
         }
         
         function getProgress(status) {
@@ -384,29 +654,119 @@ HTML_TEMPLATE = """
             return statusMap[status] || 0;
         }
         
-        // Update every 5 seconds
-        updateData();
-        setInterval(updateData, 5000);
+        // Reload the snapshot on every (re)connect so updates missed while
+        // disconnected are picked up
+        const stream = new EventSource('/api/stream');
+        stream.onopen = loadSnapshot;
+        stream.onmessage = message => JSON.parse(message.data).forEach(applyUpdate);
+        document.getElementById('settlements').addEventListener('scroll', scheduleRender, {passive: true});
     </script>
 </body>
 </html>
 """
 
+# The page has no template placeholders, so it is encoded and hashed once
+INDEX_HTML = HTML_TEMPLATE.encode()
+INDEX_ETAG = hashlib.blake2b(INDEX_HTML, digest_size=8).hexdigest()
+
 @app.route("/")
-def index():
+async def index():
     """Serve the main UI"""
-    return render_template_string(HTML_TEMPLATE)
+    if request.if_none_match.contains(INDEX_ETAG):
+        response = Response(b"", status=304)
+    else:
+        response = Response(INDEX_HTML, mimetype="text/html")
+    response.set_etag(INDEX_ETAG)
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return response
 
 @app.route("/api/data")
-def get_data():
-    """API endpoint for real-time data"""
-    return jsonify({
-        "total_settlements": len(settlements),
-        "total_events": len(events),
-        "current_block": web3_utils.get_block_number(),
-        "settlements": settlements,
-        "events": events[-50:],  # Last 50 events
+async def get_data():
+    """
+    API endpoint for real-time data. Settlements are paged newest first
+    (?offset=&limit=); ?since=<timestamp> returns only events newer than that.
+    Pages without ?since are serialized once per state change and carry an
+    ETag, so unchanged ones are answered with 304.
+    """
+    global _data_cache_version
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    limit = min(max(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int), 0), MAX_PAGE_SIZE)
+    since = request.args.get("since", type=float)
+    
+    if state_version != _data_cache_version:
+        _data_cache.clear()
+        _data_cache_version = state_version
+    
+    cached = _data_cache.get((offset, limit)) if since is None else None
+    if cached is None:
+        recent = islice(reversed(events), 50)  # Last 50 events, newest first
+        if since is not None:
+            recent = takewhile(lambda event: event["timestamp"] > since, recent)
+        
+        body = _dumps({
+            "total_settlements": len(settlements),
+            "total_events": total_events,
+            "current_block": tracker.last_block,  # kept current by the tracker, no RPC
+            "settlements": dict(islice(reversed(settlements.items()), offset, offset + limit)),
+            "events": list(recent)[::-1],
+        })
+        cached = (body, hashlib.blake2b(body, digest_size=8).hexdigest())
+        if since is None:
+            _data_cache[(offset, limit)] = cached
+    
+    body, etag = cached
+    if request.if_none_match.contains(etag):
+        response = Response(b"", status=304)
+    else:
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    return response
+
+@app.route("/api/stream")
+async def stream():
+    """Server-Sent Events: batches of tracked events and new blocks"""
+    async def generate():
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        stream_subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            stream_subscribers.discard(queue)
+    
+    response = await make_response(generate(), {
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
     })
+    response.timeout = None  # streams stay open
+    return response
+
+def build_log_decoder(event_abi: Dict[str, Any]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Decoder for one event's logs with the argument types and names resolved
+    once, instead of re-walking the ABI per log as get_event_data does. The
+    vault events index only static types, so the topics after topic0 decode
+    as one tuple.
+    """
+    indexed = [param for param in event_abi["inputs"] if param["indexed"]]
+    params = indexed + [param for param in event_abi["inputs"] if not param["indexed"]]
+    indexed_types = [param["type"] for param in indexed]
+    data_types = [param["type"] for param in params[len(indexed):]]
+    names = [param["name"] for param in params]
+    address_names = [param["name"] for param in params if param["type"] == "address"]
+    event_name = event_abi["name"]
+    
+    def decode_log(log: Dict[str, Any]) -> Dict[str, Any]:
+        values = abi_decode(indexed_types, b"".join(log["topics"][1:])) + abi_decode(data_types, bytes(log["data"]))
+        args = dict(zip(names, values))
+        for name in address_names:
+            args[name] = Web3.to_checksum_address(args[name])
+        return {"event": event_name, "args": args, "blockNumber": log["blockNumber"]}
+    
+    return decode_log
 
 class EventTracker:
     """Tracks events from the settlement system"""
@@ -414,13 +774,29 @@ class EventTracker:
     def __init__(self):
         self.vault = self._load_vault_contract()
         self.running = False
+        self.last_block = 0
+        self.log_stride = INITIAL_LOG_STRIDE
+        
+        # Tracked vault events keyed by topic0, so a single eth_getLogs with a
+        # topic OR-filter covers all of them; each maps to (decoder, handler)
+        self.event_handlers = {}
+        for event, handler in (
+            (self.vault.events.SettlementCreated, self._handle_settlement_created),
+            (self.vault.events.FundsPulled, self._handle_funds_pulled),
+            (self.vault.events.VaultFunded, self._handle_vault_funded),
+            (self.vault.events.SettlementExecuted, self._handle_settlement_executed),
+        ):
+            self.event_handlers[bytes(event_abi_to_log_topic(event.abi))] = (build_log_decoder(event.abi), handler)
+        self.log_filter = {
+            "address": self.vault.address,
+            "topics": [[Web3.to_hex(topic) for topic in self.event_handlers]],
+        }
     
     def _load_vault_contract(self):
         """Load SettlementVault contract"""
-        abi = web3_utils.load_abi("SettlementVault")
-        return web3_utils.get_contract(config.SETTLEMENT_VAULT_ADDRESS, abi)
+        return web3_utils.load_contract("SettlementVault", config.SETTLEMENT_VAULT_ADDRESS)
     
-    def start(self):
+    async def start(self):
         """Start tracking events"""
         self.running = True
         print("\n" + "="*60)
@@ -430,66 +806,143 @@ class EventTracker:
         print(f"Monitoring vault: {config.SETTLEMENT_VAULT_ADDRESS}")
         print("="*60 + "\n")
         
-        self._track_events()
+        await self._track_events()
     
     def stop(self):
         """Stop tracking"""
         self.running = False
     
-    def _track_events(self):
-        """Main tracking loop"""
-        last_block = web3_utils.get_block_number()
+    async def _track_events(self):
+        """
+        Main tracking loop: vault logs are pushed over a WebSocket subscription
+        when POLYGON_AMOY_WS_URL is set, polled every 5s otherwise (and while
+        the subscription is reconnecting)
+        """
+        self._set_last_block(await async_w3.eth.block_number)
+        reconnect_delay = 1
         
         while self.running:
             try:
-                current_block = web3_utils.get_block_number()
+                if config.POLYGON_AMOY_WS_URL:
+                    try:
+                        await self._follow_logs()
+                        reconnect_delay = 1
+                    except Exception as e:
+                        print(f"Log subscription dropped ({e}), polling for {reconnect_delay}s before reconnecting...")
+                        await self._poll()
+                        await asyncio.sleep(reconnect_delay)
+                        reconnect_delay = min(reconnect_delay * 2, 60)
+                    continue
                 
-                if current_block > last_block:
-                    self._process_blocks(last_block + 1, current_block)
-                    last_block = current_block
+                await self._poll()
+                await asyncio.sleep(5)
                 
-                time.sleep(5)
-                
-            except KeyboardInterrupt:
-                break
             except Exception as e:
                 print(f"Error in tracking loop: {e}")
-                time.sleep(5)
+                await asyncio.sleep(5)
     
-    def _process_blocks(self, from_block: int, to_block: int):
-        """Process blocks for events"""
-        try:
-            # SettlementCreated
-            for event in self.vault.events.SettlementCreated.create_filter(
-                fromBlock=from_block, toBlock=to_block
-            ).get_all_entries():
-                self._handle_settlement_created(event)
-            
-            # FundsPulled
-            for event in self.vault.events.FundsPulled.create_filter(
-                fromBlock=from_block, toBlock=to_block
-            ).get_all_entries():
-                self._handle_funds_pulled(event)
+    async def _poll(self):
+        """Process the blocks mined since the last processed one"""
+        current_block = await async_w3.eth.block_number
+        await self._process_blocks(self.last_block + 1, current_block)
+    
+    async def _follow_logs(self):
+        """
+        Receive vault logs and block headers pushed over the WebSocket. Blocks
+        mined while disconnected are backfilled with eth_getLogs after subscribing.
+        """
+        async with AsyncWeb3.persistent_websocket(WebsocketProviderV2(config.POLYGON_AMOY_WS_URL)) as ws_w3:
+            logs_subscription = await ws_w3.eth.subscribe("logs", self.log_filter)
+            await ws_w3.eth.subscribe("newHeads")
             
-            # VaultFunded
-            for event in self.vault.events.VaultFunded.create_filter(
-                fromBlock=from_block, toBlock=to_block
-            ).get_all_entries():
-                self._handle_vault_funded(event)
+            caught_up = await ws_w3.eth.block_number
+            if not await self._process_blocks(self.last_block + 1, caught_up):
+                raise RuntimeError(f"backfill of blocks {self.last_block + 1}-{caught_up} failed")
             
-            # SettlementExecuted
-            for event in self.vault.events.SettlementExecuted.create_filter(
-                fromBlock=from_block, toBlock=to_block
-            ).get_all_entries():
-                self._handle_settlement_executed(event)
+            async for message in ws_w3.ws.listen_to_websocket():
+                if not self.running:
+                    break
+                result = message["result"]
+                
+                if message["subscription"] == logs_subscription:
+                    log = web3_utils.format_log(result)
+                    if log['blockNumber'] > caught_up and not log.get('removed'):
+                        try:
+                            self._dispatch_log(log)
+                        except Exception as e:
+                            print(f"Error handling log: {e}")
+                    continue
                 
-        except Exception as e:
-            print(f"Error processing blocks: {e}")
+                number = result["number"]
+                if isinstance(number, str):
+                    number = int(number, 16)
+                # Logs of a block are pushed before the next head, so every
+                # block below this one has been handled
+                if number - 1 > self.last_block:
+                    self._set_last_block(number - 1)
+    
+    async def _process_blocks(self, from_block: int, to_block: int) -> bool:
+        """
+        Fetch and dispatch all tracked vault logs in a block range, one
+        eth_getLogs per log_stride blocks, advancing last_block after each.
+        Returns False if the rest of the range has to be retried.
+        """
+        while from_block <= to_block:
+            end_block = min(from_block + self.log_stride - 1, to_block)
+            try:
+                logs = await async_w3.eth.get_logs({**self.log_filter, "fromBlock": from_block, "toBlock": end_block})
+            except Exception as e:
+                if self.log_stride > 1 and is_range_error(e):
+                    self.log_stride //= 2
+                    continue
+                # Anything else (rate limits, outages): the caller retries after its backoff
+                print(f"Error processing blocks: {e}")
+                return False
+            
+            for log in logs:
+                try:
+                    self._dispatch_log(log)
+                except Exception as e:
+                    print(f"Error handling log: {e}")
+            self._set_last_block(end_block)
+            from_block = end_block + 1
+            
+            if len(logs) > LOGS_PER_REQUEST_HIGH:
+                self.log_stride = max(self.log_stride // 2, 1)
+            elif len(logs) < LOGS_PER_REQUEST_LOW:
+                self.log_stride = min(self.log_stride * 2, MAX_LOG_STRIDE)
+        return True
+    
+    def _set_last_block(self, block: int):
+        """Advance the processed-block marker and show it in connected UIs"""
+        self.last_block = block
+        publish({"current_block": block})
+    
+    def _record_event(self, settlement_id: str, event: Dict[str, Any]):
+        """Store a UI event and push it, with its settlement's current state, to stream clients"""
+        global total_events
+        events.append(event)
+        total_events += 1
+        publish({
+            "event": event,
+            "settlement_id": settlement_id,
+            "settlement": settlements.get(settlement_id),
+            "total_settlements": len(settlements),
+            "total_events": total_events,
+        })
+    
+    def _dispatch_log(self, log):
+        """Decode a vault log and route it to the handler for its topic0"""
+        entry = self.event_handlers.get(bytes(log['topics'][0]))
+        if entry is None:
+            return
+        decode_log, handler = entry
+        handler(decode_log(log))
     
     def _handle_settlement_created(self, event):
         """Handle SettlementCreated event"""
         args = event['args']
-        settlement_id = args['settlementId'].hex()
+        settlement_id = web3_utils.settlement_id_hex(args['settlementId'])
         
         settlements[settlement_id] = {
             "client": args['client'],
@@ -502,7 +955,7 @@ class EventTracker:
             "block": event['blockNumber'],
         }
         
-        events.append({
+        self._record_event(settlement_id, {
             "type": "SettlementCreated",
             "details": f"Client {args['client'][:10]}... wants {args['assetAmount'] / 10**18:.2f} YPS",
             "timestamp": time.time(),
@@ -514,12 +967,12 @@ class EventTracker:
     def _handle_funds_pulled(self, event):
         """Handle FundsPulled event"""
         args = event['args']
-        settlement_id = args['settlementId'].hex()
+        settlement_id = web3_utils.settlement_id_hex(args['settlementId'])
         
         if settlement_id in settlements:
             settlements[settlement_id]['status'] = 'funds_pulled'
         
-        events.append({
+        self._record_event(settlement_id, {
             "type": "FundsPulled",
             "details": f"{args['eurcAmount'] / 10**6:.2f} EURC and assets pulled",
             "timestamp": time.time(),
@@ -531,13 +984,13 @@ class EventTracker:
     def _handle_vault_funded(self, event):
         """Handle VaultFunded event"""
         args = event['args']
-        settlement_id = args['settlementId'].hex()
+        settlement_id = web3_utils.settlement_id_hex(args['settlementId'])
         
         if settlement_id in settlements:
             settlements[settlement_id]['status'] = 'funded'
             settlements[settlement_id]['funded_block'] = args['blockNumber']
         
-        events.append({
+        self._record_event(settlement_id, {
             "type": "VaultFunded",
             "details": f"Vault funded with {args['usdcAmount'] / 10**6:.2f} USDC at block {args['blockNumber']}",
             "timestamp": time.time(),
@@ -549,12 +1002,12 @@ class EventTracker:
     def _handle_settlement_executed(self, event):
         """Handle SettlementExecuted event"""
         args = event['args']
-        settlement_id = args['settlementId'].hex()
+        settlement_id = web3_utils.settlement_id_hex(args['settlementId'])
         
         if settlement_id in settlements:
             settlements[settlement_id]['status'] = 'settled'
         
-        events.append({
+        self._record_event(settlement_id, {
             "type": "SettlementExecuted",
             "details": f"Settlement completed! {args['assetAmount'] / 10**18:.2f} YPS → {args['client'][:10]}...",
             "timestamp": time.time(),
@@ -563,20 +1016,33 @@ class EventTracker:
         
         print(f"[EVENT] SettlementExecuted: {settlement_id}")
 
-def run_tracker():
-    """Run the event tracker in a separate thread"""
+tracker: Optional[EventTracker] = None
+_tracker_task: Optional[asyncio.Task] = None
+
+@app.before_serving
+async def start_tracker():
+    """Start the event tracker on the app's event loop"""
+    global tracker, _tracker_task
     tracker = EventTracker()
-    tracker.start()
+    _tracker_task = asyncio.get_running_loop().create_task(tracker.start())
+
+@app.after_serving
+async def stop_tracker():
+    """Stop the event tracker on shutdown"""
+    tracker.stop()
+    _tracker_task.cancel()
 
 def main():
-    """Run the tracker with web UI"""
-    # Start event tracker in background thread
-    tracker_thread = Thread(target=run_tracker, daemon=True)
-    tracker_thread.start()
+    """
+    Run the tracker with web UI, served by Hypercorn (equivalent to
+    hypercorn -b 0.0.0.0:5000 tracker:app)
+    """
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
     
-    # Start Flask web UI
-    app.run(host="0.0.0.0", port=5000, debug=False)
+    hypercorn_config = Config()
+    hypercorn_config.bind = ["0.0.0.0:5000"]
+    asyncio.run(serve(app, hypercorn_config))
 
 if __name__ == "__main__":
     main()
-
@@ -1,135 +1,286 @@
 """
 Web3 utilities for interacting with Polygon Amoy
 """
-import json
+import orjson
+import time
+import asyncio
+import threading
+from functools import lru_cache
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional, Dict, Any, Tuple
-from web3 import Web3
+from web3 import AsyncWeb3, AsyncHTTPProvider, Web3, WebsocketProviderV2
 from web3.contract import Contract
+from web3.exceptions import TimeExhausted, TransactionNotFound
 from eth_account import Account
-from eth_account.messages import encode_typed_data
 from eth_abi import encode
+from hexbytes import HexBytes
 import config
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(config.POLYGON_AMOY_RPC_URL))
+class PooledHTTPProvider(Web3.HTTPProvider):
+    """
+    HTTPProvider whose requests all go through one HTTPAdapter. web3 keeps a
+    requests.Session per thread and would hand other threads a plain session,
+    so each thread gets its own session here with the shared adapter mounted.
+    """
+    
+    def __init__(self, endpoint_uri: str, adapter: HTTPAdapter, **kwargs):
+        super().__init__(endpoint_uri, **kwargs)
+        self._adapter = adapter
+        self._sessions = threading.local()
+    
+    def _session(self) -> requests.Session:
+        session = getattr(self._sessions, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            self._sessions.session = session
+        return session
+    
+    def make_request(self, method, params):
+        response = self._session().post(
+            self.endpoint_uri,
+            data=self.encode_rpc_request(method, params),
+            **self.get_request_kwargs(),
+        )
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+# Initialize Web3 over one keep-alive pool shared by the server's handler
+# threads and the facilitator's worker threads. PooledHTTPProvider applies the
+# retry policy and timeout on every thread. Only failed connection attempts are
+# retried (read and status retries are off), so a transaction is never
+# submitted twice.
+RPC_POOL_SIZE = 32
+RPC_TIMEOUT_SECONDS = 30
+_rpc_adapter = HTTPAdapter(
+    pool_connections=RPC_POOL_SIZE,
+    pool_maxsize=RPC_POOL_SIZE,
+    max_retries=Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.3),
+)
+w3 = Web3(PooledHTTPProvider(
+    config.POLYGON_AMOY_RPC_URL,
+    _rpc_adapter,
+    request_kwargs={"timeout": RPC_TIMEOUT_SECONDS},
+))
+
+# Async counterpart for code running on an event loop (the tracker); the
+# provider keeps one aiohttp keep-alive session per loop
+async_w3 = AsyncWeb3(AsyncHTTPProvider(config.POLYGON_AMOY_RPC_URL, request_kwargs={"timeout": RPC_TIMEOUT_SECONDS}))
+
+# EIP-712 type hashes for EIP-2612 permits
+EIP712_DOMAIN_TYPEHASH = Web3.keccak(
+    text="EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)"
+)
+PERMIT_TYPEHASH = Web3.keccak(
+    text="Permit(address owner,address spender,uint256 value,uint256 nonce,uint256 deadline)"
+)
+
+# Permit domain separators keyed by (token address, chain ID); immutable per deployed token
+_DOMAIN_CACHE: Dict[Tuple[str, int], bytes] = {}
+
+# Next permit nonce per (token address, owner), read from chain on first use and
+# counted locally after each signature; reset_permit_nonce() resyncs it
+_PERMIT_NONCES: Dict[Tuple[str, str], int] = {}
+_permit_nonce_lock = threading.Lock()
+
+# Next transaction nonce per sender, shared by every thread of the process.
+# Sends without an explicit nonce hold the lock from nonce choice to submission,
+# so concurrent requests never pick the same nonce.
+_TX_NONCES: Dict[str, int] = {}
+_tx_nonce_lock = threading.Lock()
+
+# Another process sending from the same key (the server and the facilitator
+# share FACILITATOR_PRIVATE_KEY) can take a nonce first; such sends are
+# rejected with one of these messages, then resynced and resent
+NONCE_ERROR_HINTS = ("nonce too low", "replacement transaction underpriced")
+NONCE_SEND_ATTEMPTS = 3
+
+class NewHeadsWatcher:
+    """
+    Background newHeads subscription on POLYGON_AMOY_WS_URL; threads waiting on
+    a receipt sleep until the next block instead of polling on a timer
+    """
+    
+    def __init__(self, ws_url: str):
+        self.ws_url = ws_url
+        self.block_number = 0
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._subscribe()), name="new-heads", daemon=True)
+        self._thread.start()
+    
+    async def _subscribe(self):
+        while True:
+            try:
+                async with AsyncWeb3.persistent_websocket(WebsocketProviderV2(self.ws_url)) as ws_w3:
+                    await ws_w3.eth.subscribe("newHeads")
+                    async for message in ws_w3.ws.listen_to_websocket():
+                        number = message["result"]["number"]
+                        if isinstance(number, str):
+                            number = int(number, 16)
+                        with self._condition:
+                            self.block_number = number
+                            self._condition.notify_all()
+            except Exception as e:
+                print(f"newHeads subscription dropped ({e}), reconnecting...")
+                await asyncio.sleep(1)
+    
+    def wait_for_block(self, after: int, timeout: float) -> int:
+        """Block until a head newer than `after` arrives (or timeout); returns the latest head"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.block_number > after, timeout)
+            return self.block_number
+
+_new_heads: Optional[NewHeadsWatcher] = None
+_new_heads_lock = threading.Lock()
+
+def get_new_heads_watcher() -> NewHeadsWatcher:
+    """Process-wide newHeads watcher, started on first use"""
+    global _new_heads
+    with _new_heads_lock:
+        if _new_heads is None:
+            _new_heads = NewHeadsWatcher(config.POLYGON_AMOY_WS_URL)
+        return _new_heads
 
 def get_contract(address: str, abi: list) -> Contract:
     """Get a contract instance"""
     return w3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
 
+@lru_cache(maxsize=None)
 def load_abi(contract_name: str) -> list:
-    """Load ABI from compiled contract artifacts"""
+    """Load ABI from compiled contract artifacts (read from disk once per contract)"""
     # For MockUSDC and MockEURC, use minimal ERC20 + Permit ABI
     if contract_name in ["MockUSDC", "MockEURC"]:
         return get_erc20_permit_abi()
     
     try:
         # Try to load from Foundry out directory
-        with open(f"../out/{contract_name}.sol/{contract_name}.json", "r") as f:
-            artifact = json.load(f)
+        with open(f"../out/{contract_name}.sol/{contract_name}.json", "rb") as f:
+            artifact = orjson.loads(f.read())
             return artifact["abi"]
     except FileNotFoundError:
         # Try interface directory
         try:
-            with open(f"../out/I{contract_name}.sol/I{contract_name}.json", "r") as f:
-                artifact = json.load(f)
+            with open(f"../out/I{contract_name}.sol/I{contract_name}.json", "rb") as f:
+                artifact = orjson.loads(f.read())
                 return artifact["abi"]
         except FileNotFoundError:
             print(f"Warning: Could not find ABI for {contract_name}")
             return []
 
+@lru_cache(maxsize=None)
+def load_contract(contract_name: str, address: str) -> Contract:
+    """Contract instance for a compiled artifact, built once per (contract, address)"""
+    return get_contract(address, load_abi(contract_name))
+
+def settlement_id_hex(raw_id: bytes) -> str:
+    """0x-prefixed hex form of a bytes32 settlement ID (bytes.hex() has no prefix)"""
+    return "0x" + bytes(raw_id).hex()
+
+@lru_cache(maxsize=10_000)
+def settlement_id_bytes(settlement_id: str) -> bytes:
+    """bytes32 settlement ID from its hex form, with or without the 0x prefix (memoized per ID)"""
+    if settlement_id.startswith(("0x", "0X")):
+        settlement_id = settlement_id[2:]
+    return bytes.fromhex(settlement_id)
+
+# Minimal ERC20 + EIP-2612 Permit ABI, shared by every MockUSDC/MockEURC contract
+ERC20_PERMIT_ABI = [
+    {
+        "inputs": [{"name": "account", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "decimals",
+        "outputs": [{"name": "", "type": "uint8"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "name",
+        "outputs": [{"name": "", "type": "string"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"name": "owner", "type": "address"}],
+        "name": "nonces",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"name": "owner", "type": "address"},
+            {"name": "spender", "type": "address"}
+        ],
+        "name": "allowance",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"name": "owner", "type": "address"},
+            {"name": "spender", "type": "address"},
+            {"name": "value", "type": "uint256"},
+            {"name": "deadline", "type": "uint256"},
+            {"name": "v", "type": "uint8"},
+            {"name": "r", "type": "bytes32"},
+            {"name": "s", "type": "bytes32"}
+        ],
+        "name": "permit",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"name": "to", "type": "address"},
+            {"name": "amount", "type": "uint256"}
+        ],
+        "name": "transfer",
+        "outputs": [{"name": "", "type": "bool"}],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"name": "from", "type": "address"},
+            {"name": "to", "type": "address"},
+            {"name": "amount", "type": "uint256"}
+        ],
+        "name": "transferFrom",
+        "outputs": [{"name": "", "type": "bool"}],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"name": "spender", "type": "address"},
+            {"name": "amount", "type": "uint256"}
+        ],
+        "name": "approve",
+        "outputs": [{"name": "", "type": "bool"}],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    }
+]
+
 def get_erc20_permit_abi() -> list:
-    """Return minimal ERC20 + EIP-2612 Permit ABI"""
-    return [
-        {
-            "inputs": [{"name": "account", "type": "address"}],
-            "name": "balanceOf",
-            "outputs": [{"name": "", "type": "uint256"}],
-            "stateMutability": "view",
-            "type": "function"
-        },
-        {
-            "inputs": [],
-            "name": "decimals",
-            "outputs": [{"name": "", "type": "uint8"}],
-            "stateMutability": "view",
-            "type": "function"
-        },
-        {
-            "inputs": [],
-            "name": "name",
-            "outputs": [{"name": "", "type": "string"}],
-            "stateMutability": "view",
-            "type": "function"
-        },
-        {
-            "inputs": [{"name": "owner", "type": "address"}],
-            "name": "nonces",
-            "outputs": [{"name": "", "type": "uint256"}],
-            "stateMutability": "view",
-            "type": "function"
-        },
-        {
-            "inputs": [
-                {"name": "owner", "type": "address"},
-                {"name": "spender", "type": "address"}
-            ],
-            "name": "allowance",
-            "outputs": [{"name": "", "type": "uint256"}],
-            "stateMutability": "view",
-            "type": "function"
-        },
-        {
-            "inputs": [
-                {"name": "owner", "type": "address"},
-                {"name": "spender", "type": "address"},
-                {"name": "value", "type": "uint256"},
-                {"name": "deadline", "type": "uint256"},
-                {"name": "v", "type": "uint8"},
-                {"name": "r", "type": "bytes32"},
-                {"name": "s", "type": "bytes32"}
-            ],
-            "name": "permit",
-            "outputs": [],
-            "stateMutability": "nonpayable",
-            "type": "function"
-        },
-        {
-            "inputs": [
-                {"name": "to", "type": "address"},
-                {"name": "amount", "type": "uint256"}
-            ],
-            "name": "transfer",
-            "outputs": [{"name": "", "type": "bool"}],
-            "stateMutability": "nonpayable",
-            "type": "function"
-        },
-        {
-            "inputs": [
-                {"name": "from", "type": "address"},
-                {"name": "to", "type": "address"},
-                {"name": "amount", "type": "uint256"}
-            ],
-            "name": "transferFrom",
-            "outputs": [{"name": "", "type": "bool"}],
-            "stateMutability": "nonpayable",
-            "type": "function"
-        },
-        {
-            "inputs": [
-                {"name": "spender", "type": "address"},
-                {"name": "amount", "type": "uint256"}
-            ],
-            "name": "approve",
-            "outputs": [{"name": "", "type": "bool"}],
-            "stateMutability": "nonpayable",
-            "type": "function"
-        }
-    ]
-
-def get_nonce(address: str) -> int:
-    """Get the current nonce for an address"""
-    return w3.eth.get_transaction_count(Web3.to_checksum_address(address))
+    """Return minimal ERC20 + EIP-2612 Permit ABI (a shared constant; do not mutate)"""
+    return ERC20_PERMIT_ABI
+
+def get_nonce(address: str, block_identifier: str = "latest") -> int:
+    """Get the current nonce for an address ("pending" also counts transactions not yet mined)"""
+    return w3.eth.get_transaction_count(Web3.to_checksum_address(address), block_identifier)
 
 def get_balance(address: str, token_address: Optional[str] = None) -> int:
     """Get balance (native or ERC20)"""
@@ -140,10 +291,40 @@ def get_balance(address: str, token_address: Optional[str] = None) -> int:
         return w3.eth.get_balance(address)
     else:
         # Get ERC20 balance
-        token_abi = load_abi("MockUSDC")  # All tokens have same ABI
-        token = get_contract(token_address, token_abi)
+        token = load_contract("MockUSDC", token_address)  # All tokens have same ABI
         return token.functions.balanceOf(address).call()
 
+def get_permit_domain_separator(token_address: str) -> bytes:
+    """EIP-712 domain separator of a permit token (token name read once per token)"""
+    token_address = Web3.to_checksum_address(token_address)
+    key = (token_address, config.CHAIN_ID)
+    
+    separator = _DOMAIN_CACHE.get(key)
+    if separator is not None:
+        return separator
+    
+    token = load_contract("MockUSDC", token_address)
+    try:
+        name = token.functions.name().call()
+        cacheable = True
+    except Exception:
+        name = "Unknown Token"
+        cacheable = False
+    
+    separator = Web3.keccak(encode(
+        ["bytes32", "bytes32", "bytes32", "uint256", "address"],
+        [EIP712_DOMAIN_TYPEHASH, Web3.keccak(text=name), Web3.keccak(text="1"), config.CHAIN_ID, token_address]
+    ))
+    if cacheable:
+        _DOMAIN_CACHE[key] = separator
+    return separator
+
+def reset_permit_nonce(token_address: str, owner_address: str):
+    """Forget the locally counted permit nonce (e.g. after a signed permit was never used)"""
+    key = (Web3.to_checksum_address(token_address), Web3.to_checksum_address(owner_address))
+    with _permit_nonce_lock:
+        _PERMIT_NONCES.pop(key, None)
+
 def create_permit_signature(
     token_address: str,
     owner_address: str,
@@ -162,67 +343,25 @@ def create_permit_signature(
     spender_address = Web3.to_checksum_address(spender_address)
     
     # Get token contract
-    token_abi = load_abi("MockUSDC")
-    token = get_contract(token_address, token_abi)
-    
-    # Get nonce for permit
-    try:
-        nonce = token.functions.nonces(owner_address).call()
-    except Exception as e:
-        print(f"Error getting nonce: {e}")
-        nonce = 0
-    
-    # Get token name and version for EIP-712
-    try:
-        name = token.functions.name().call()
-    except:
-        name = "Unknown Token"
-    
-    # EIP-712 domain
-    domain = {
-        "name": name,
-        "version": "1",
-        "chainId": config.CHAIN_ID,
-        "verifyingContract": token_address,
-    }
-    
-    # Permit message
-    message = {
-        "owner": owner_address,
-        "spender": spender_address,
-        "value": value,
-        "nonce": nonce,
-        "deadline": deadline,
-    }
-    
-    # Types for EIP-712
-    types = {
-        "EIP712Domain": [
-            {"name": "name", "type": "string"},
-            {"name": "version", "type": "string"},
-            {"name": "chainId", "type": "uint256"},
-            {"name": "verifyingContract", "type": "address"},
-        ],
-        "Permit": [
-            {"name": "owner", "type": "address"},
-            {"name": "spender", "type": "address"},
-            {"name": "value", "type": "uint256"},
-            {"name": "nonce", "type": "uint256"},
-            {"name": "deadline", "type": "uint256"},
-        ],
-    }
+    token = load_contract("MockUSDC", token_address)
     
-    # Create typed data structure
-    typed_data = {
-        "types": types,
-        "primaryType": "Permit",
-        "domain": domain,
-        "message": message,
-    }
+    # Get nonce for permit (each signature reserves the next one locally).
+    # A failed read raises rather than guessing, so a wrong nonce is never cached.
+    key = (token_address, owner_address)
+    with _permit_nonce_lock:
+        nonce = _PERMIT_NONCES.get(key)
+        if nonce is None:
+            nonce = token.functions.nonces(owner_address).call()
+        _PERMIT_NONCES[key] = nonce + 1
     
-    # Sign the message
-    encoded_data = encode_typed_data(full_message=typed_data)
-    signed_message = Account.from_key(private_key).sign_message(encoded_data)
+    # EIP-712 digest: keccak256("\x19\x01" || domainSeparator || hashStruct(permit)),
+    # with the domain separator cached per token
+    struct_hash = Web3.keccak(encode(
+        ["bytes32", "address", "address", "uint256", "uint256", "uint256"],
+        [PERMIT_TYPEHASH, owner_address, spender_address, value, nonce, deadline]
+    ))
+    digest = Web3.keccak(b"\x19\x01" + get_permit_domain_separator(token_address) + struct_hash)
+    signed_message = Account.from_key(private_key).signHash(digest)
     
     # Extract v, r, s
     v = signed_message.v
@@ -236,21 +375,44 @@ def send_transaction(
     function_name: str,
     args: list,
     private_key: str,
-    value: int = 0
+    value: int = 0,
+    nonce: Optional[int] = None
 ) -> str:
     """
     Send a transaction to a contract
     
+    Args:
+        nonce: Explicit nonce, for sending several transactions before any is mined
+               (default: the next nonce of the sender's process-wide counter,
+               never below the node's pending transaction count)
+    
     Returns: transaction hash
     """
     account = Account.from_key(private_key)
-    
-    # Build transaction
     function = getattr(contract.functions, function_name)(*args)
     
+    if nonce is not None:
+        return _sign_and_send(account, function, value, nonce)
+    
+    with _tx_nonce_lock:
+        for attempt in range(NONCE_SEND_ATTEMPTS):
+            nonce = max(_TX_NONCES.get(account.address, 0), get_nonce(account.address, "pending"))
+            try:
+                tx_hash = _sign_and_send(account, function, value, nonce)
+            except Exception as e:
+                if attempt + 1 < NONCE_SEND_ATTEMPTS and any(hint in str(e).lower() for hint in NONCE_ERROR_HINTS):
+                    # The nonce is taken; move past it even if the node's count lags
+                    _TX_NONCES[account.address] = nonce + 1
+                    continue
+                raise
+            _TX_NONCES[account.address] = nonce + 1
+            return tx_hash
+
+def _sign_and_send(account, function, value: int, nonce: int) -> str:
+    """Build, sign and submit a contract call with the given nonce"""
     tx = function.build_transaction({
         'from': account.address,
-        'nonce': get_nonce(account.address),
+        'nonce': nonce,
         'gas': 500000,  # Estimate or set manually
         'gasPrice': w3.eth.gas_price,
         'value': value,
@@ -272,6 +434,52 @@ def wait_for_transaction(tx_hash: str, timeout: int = 120) -> Dict[str, Any]:
     receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
     return dict(receipt)
 
+# Longest wait for a pushed head before the receipt is polled anyway, so a
+# dropped newHeads subscription degrades to polling instead of a full timeout
+RECEIPT_POLL_INTERVAL = 2.0
+
+def wait_for_transaction_ws(tx_hash: str, timeout: int = 120) -> Dict[str, Any]:
+    """
+    Wait for a transaction to be mined, checking for the receipt once per new
+    block pushed over POLYGON_AMOY_WS_URL, and at least every
+    RECEIPT_POLL_INTERVAL seconds (falls back to wait_for_transaction)
+    
+    Returns: transaction receipt
+    """
+    if not config.POLYGON_AMOY_WS_URL:
+        return wait_for_transaction(tx_hash, timeout)
+    
+    watcher = get_new_heads_watcher()
+    deadline = time.monotonic() + timeout
+    seen_block = 0
+    
+    while True:
+        try:
+            return dict(w3.eth.get_transaction_receipt(tx_hash))
+        except TransactionNotFound:
+            pass
+        
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeExhausted(f"Transaction {tx_hash} is not in the chain after {timeout} seconds")
+        seen_block = watcher.wait_for_block(seen_block, min(remaining, RECEIPT_POLL_INTERVAL))
+
+def format_log(log: Dict[str, Any]) -> Dict[str, Any]:
+    """Coerce a raw JSON-RPC log (hex strings, as pushed by a subscription) into web3's log shape"""
+    if isinstance(log['blockNumber'], int):
+        return log
+    return {
+        **log,
+        'address': Web3.to_checksum_address(log['address']),
+        'blockHash': HexBytes(log['blockHash']),
+        'blockNumber': int(log['blockNumber'], 16),
+        'data': HexBytes(log['data']),
+        'logIndex': int(log['logIndex'], 16),
+        'topics': [HexBytes(topic) for topic in log['topics']],
+        'transactionHash': HexBytes(log['transactionHash']),
+        'transactionIndex': int(log['transactionIndex'], 16),
+    }
+
 def get_block_number() -> int:
     """Get current block number"""
     return w3.eth.block_number
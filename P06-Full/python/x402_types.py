@@ -1,15 +1,42 @@
 """
 x402 Protocol Types and Structures
 """
+import time
+import logging
+from functools import lru_cache
 from typing import Dict, Any, Optional
-from pydantic import BaseModel, Field
-from datetime import datetime, timedelta
+import msgpack
+import orjson
+from pydantic import BaseModel, ConfigDict, Field
+
+try:
+    # SIMD base64 codec; same b64encode/b64decode API as the stdlib module
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+logger = logging.getLogger(__name__)
+
+# Base-unit scales of the asset (YieldPoolShare, 18 decimals) and MockUSDC (6 decimals)
+_ASSET_SCALE = 10 ** 18
+_USDC_SCALE = 10 ** 6
+
+# Path of the purchase endpoint a requirement refers to, up to the amount
+_RESOURCE_PREFIX = "/buy-asset?amount="
+
+# Requirement metadata that does not depend on the price
+_METADATA_BASE = {
+    "asset_decimals": 18,
+    "settlement_decimals": 6,
+}
 
 class X402PaymentRequirement(BaseModel):
     """
     x402 Payment Requirement object
     Describes what payment is required to access the resource
     """
+    model_config = ConfigDict(frozen=True)
+    
     version: str = "1.0"
     chain: str = "polygon-amoy"
     chain_id: int = 80002
@@ -29,6 +56,8 @@ class X402PaymentProof(BaseModel):
     x402 Payment Proof object
     Provided by client to prove payment intent/capability
     """
+    model_config = ConfigDict(frozen=True)
+    
     version: str = "1.0"
     client_address: str
     payment_token: str  # MockEURC address
@@ -40,12 +69,16 @@ class X402PaymentProof(BaseModel):
 
 class SettlementRequest(BaseModel):
     """Request to purchase assets via OTC"""
+    model_config = ConfigDict(frozen=True)
+    
     asset_amount: int  # Amount of asset to purchase (in smallest unit)
     client_address: str
     max_eurc_payment: Optional[int] = None  # Optional max EURC willing to pay
 
 class SettlementResponse(BaseModel):
     """Response after settlement is created"""
+    model_config = ConfigDict(frozen=True)
+    
     settlement_id: str
     status: str
     message: str
@@ -56,6 +89,8 @@ class SettlementResponse(BaseModel):
 
 class PermitSignature(BaseModel):
     """EIP-2612 Permit Signature"""
+    model_config = ConfigDict(frozen=True)
+    
     deadline: int
     v: int
     r: str  # hex string
@@ -85,13 +120,33 @@ def create_x402_payment_requirement(
     Returns:
         X402PaymentRequirement object
     """
-    # Calculate required USDC (assuming 18 decimals for asset, 6 for USDC)
-    # Convert asset amount to human-readable, multiply by price, convert to USDC decimals
-    asset_human = asset_amount / (10 ** 18)
-    required_usdc_human = asset_human * price_per_unit_usdc
-    required_usdc_smallest = int(required_usdc_human * (10 ** 6))
-    
-    deadline = int((datetime.now() + timedelta(seconds=deadline_seconds)).timestamp())
+    # Everything but the deadline is fixed per listing: reuse the validated
+    # model and only stamp the deadline on a copy
+    template = _payment_requirement_template(
+        asset_amount,
+        price_per_unit_usdc,
+        seller_address,
+        asset_token_address,
+        settlement_vault_address,
+        mock_usdc_address,
+    )
+    return template.model_copy(update={"payment_deadline": int(time.time()) + deadline_seconds})
+
+@lru_cache(maxsize=256)
+def _payment_requirement_template(
+    asset_amount: int,
+    price_per_unit_usdc: float,
+    seller_address: str,
+    asset_token_address: str,
+    settlement_vault_address: str,
+    mock_usdc_address: str,
+) -> X402PaymentRequirement:
+    """Payment requirement for a listing with a placeholder deadline (memoized per listing)"""
+    # Calculate required USDC in integer base units (18 decimals for asset, 6 for
+    # USDC): the price is taken to 6-decimal precision, so amounts beyond 2**53
+    # stay exact and match the server's settlement quote
+    price_usdc_units = round(price_per_unit_usdc * _USDC_SCALE)
+    required_usdc_smallest = asset_amount * price_usdc_units // _ASSET_SCALE
     
     return X402PaymentRequirement(
         chain="polygon-amoy",
@@ -100,18 +155,26 @@ def create_x402_payment_requirement(
         settlement_token_symbol="MockUSDC",
         required_amount=required_usdc_smallest,
         settlement_vault=settlement_vault_address,
-        payment_deadline=deadline,
-        resource=f"/buy-asset?amount={asset_amount}",
+        payment_deadline=0,
+        resource=_RESOURCE_PREFIX + str(asset_amount),
         asset_token=asset_token_address,
         asset_amount=asset_amount,
         seller=seller_address,
-        metadata={
-            "price_per_unit_usdc": price_per_unit_usdc,
-            "asset_decimals": 18,
-            "settlement_decimals": 6,
-        }
+        metadata={"price_per_unit_usdc": price_per_unit_usdc, **_METADATA_BASE}
     )
 
+# Constant parts of every 402 response, built once. The headers dict is shared
+# between responses, so callers must not mutate it.
+X402_RESPONSE_HEADERS = {
+    "Content-Type": "application/json",
+    "WWW-Authenticate": 'x402 realm="OTC Asset Purchase"',
+    "X-Payment-Required": "true",
+}
+_X402_RESPONSE_BODY_BASE = {
+    "error": "Payment Required",
+    "message": "Payment required to access this resource",
+}
+
 def create_x402_response(payment_requirement: X402PaymentRequirement) -> tuple[str, int, dict]:
     """
     Create an HTTP 402 response with x402 payment requirements
@@ -119,52 +182,80 @@ def create_x402_response(payment_requirement: X402PaymentRequirement) -> tuple[s
     Returns:
         (response_body, status_code, headers)
     """
-    headers = {
-        "Content-Type": "application/json",
-        "WWW-Authenticate": 'x402 realm="OTC Asset Purchase"',
-        "X-Payment-Required": "true",
-    }
-    
     response_body = {
-        "error": "Payment Required",
-        "message": "Payment required to access this resource",
+        **_X402_RESPONSE_BODY_BASE,
+        # Dumped to fresh dicts: the model's metadata is shared with the
+        # memoized template, which callers must never be able to mutate
         "payment_requirement": payment_requirement.model_dump(),
     }
     
-    return (response_body, 402, headers)
+    return (response_body, 402, X402_RESPONSE_HEADERS)
+
+# Scheme prefix of X-PAYMENT header values
+X402_HEADER_PREFIX = "x402 "
+_X402_PREFIX_LEN = len(X402_HEADER_PREFIX)
+_X402_PREFIX_BYTES = X402_HEADER_PREFIX.encode("ascii")
+# v2 carries the proof as msgpack instead of JSON
+X402_V2_HEADER_PREFIX = "x402v2 "
+_X402_V2_PREFIX_LEN = len(X402_V2_HEADER_PREFIX)
 
 def parse_x402_payment_header(payment_header: str) -> Optional[X402PaymentProof]:
     """
     Parse X-PAYMENT header from client request
     
-    Expected format: "x402 <base64_encoded_json>"
+    Expected format: "x402 <base64_encoded_json>" or "x402v2 <base64_encoded_msgpack>"
     """
-    import json
-    import base64
+    if payment_header.startswith(X402_V2_HEADER_PREFIX):
+        return _parse_x402_v2_payment_header(payment_header)
     
-    if not payment_header.startswith("x402 "):
+    # Shorter than the prefix plus one base64 quantum cannot hold a proof
+    if len(payment_header) < _X402_PREFIX_LEN + 4 or not payment_header.startswith(X402_HEADER_PREFIX):
         return None
     
     try:
-        encoded_data = payment_header[5:]  # Remove "x402 " prefix
+        encoded_data = payment_header[_X402_PREFIX_LEN:]
         decoded_data = base64.b64decode(encoded_data)
-        payment_data = json.loads(decoded_data)
-        return X402PaymentProof(**payment_data)
-    except Exception as e:
-        print(f"Error parsing X-PAYMENT header: {e}")
+        # Parse and validate the JSON bytes in one pass, without building a dict first
+        return X402PaymentProof.model_validate_json(decoded_data)
+    except ValueError as e:
+        # Malformed base64 (binascii.Error) or JSON/fields (pydantic's
+        # ValidationError) are both ValueErrors
+        logger.warning("Error parsing X-PAYMENT header: %s", e)
         return None
 
+def _parse_x402_v2_payment_header(payment_header: str) -> Optional[X402PaymentProof]:
+    """Parse a v2 X-PAYMENT header value ("x402v2 <base64_encoded_msgpack>")"""
+    try:
+        decoded_data = base64.b64decode(payment_header[_X402_V2_PREFIX_LEN:])
+        return X402PaymentProof.model_validate(msgpack.unpackb(decoded_data))
+    except (ValueError, msgpack.UnpackException) as e:
+        logger.warning("Error parsing X-PAYMENT header: %s", e)
+        return None
+
+def create_x402_payment_header_bytes(payment_proof: X402PaymentProof) -> bytes:
+    """
+    Create X-PAYMENT header value from payment proof, as bytes (HTTP clients
+    and ASGI servers take header values as bytes without a str round trip)
+    
+    Returns: b"x402 <base64_encoded_json>"
+    """
+    json_data = orjson.dumps(payment_proof.model_dump())
+    return _X402_PREFIX_BYTES + base64.b64encode(json_data)
+
 def create_x402_payment_header(payment_proof: X402PaymentProof) -> str:
     """
     Create X-PAYMENT header value from payment proof
     
     Returns: "x402 <base64_encoded_json>"
     """
-    import json
-    import base64
-    
-    json_data = payment_proof.model_dump_json()
-    encoded_data = base64.b64encode(json_data.encode()).decode()
-    
-    return f"x402 {encoded_data}"
+    return create_x402_payment_header_bytes(payment_proof).decode("ascii")
 
+def create_x402_payment_header_v2(payment_proof: X402PaymentProof) -> str:
+    """
+    Create a v2 X-PAYMENT header value: the proof as msgpack, which is smaller
+    than JSON before base64 and cheaper to parse
+    
+    Returns: "x402v2 <base64_encoded_msgpack>"
+    """
+    packed = msgpack.packb(payment_proof.model_dump())
+    return X402_V2_HEADER_PREFIX + base64.b64encode(packed).decode("ascii")